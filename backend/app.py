@@ -1,32 +1,153 @@
 """
 Main Flask application for PolicySim backend
 """
-from flask import Flask, jsonify
+import os
+from flask import Flask, jsonify, request, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from routes.simulation_routes import simulation_bp
 from routes.comparison_routes import comparison_bp
+from routes.portfolio_routes import portfolio_bp
+from routes.bulk_routes import bulk_bp
+from routes.job_routes import job_bp
+from routes.policy_space_routes import policy_space_bp
+from routes.schedule_routes import schedule_bp
+from routes.debug_routes import debug_bp
+from services.admission_control import admission_controller, AdmissionRejected
+from services.single_flight import single_flight
+from services.result_cache import result_cache
+from services.cache_warmer import cache_warmer
+from services.profiler import sampling_profiler, request_tracer, trace_stage
+
+
+class PolicySimJSONProvider(DefaultJSONProvider):
+    """JSON provider that renders compact result objects at the response boundary"""
+    
+    @staticmethod
+    def default(o):
+        if hasattr(o, 'to_dict'):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 
 def create_app():
     """Application factory function"""
     app = Flask(__name__)
+    app.json = PolicySimJSONProvider(app)
     
     # Enable CORS for frontend communication
     CORS(app, resources={
         r"/api/*": {
             "origins": ["http://localhost:3000", "http://localhost:5000"],
             "methods": ["GET", "POST", "PUT", "DELETE"],
-            "allow_headers": ["Content-Type"]
+            "allow_headers": ["Content-Type", "X-Client-Id"]
         }
     })
     
     # Configuration
-    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max request size (bulk uploads are streamed and exempt)
     app.config['JSON_SORT_KEYS'] = False
     
     # Register blueprints
     app.register_blueprint(simulation_bp)
     app.register_blueprint(comparison_bp)
+    app.register_blueprint(portfolio_bp)
+    app.register_blueprint(bulk_bp)
+    app.register_blueprint(job_bp)
+    app.register_blueprint(policy_space_bp)
+    app.register_blueprint(schedule_bp)
+    app.register_blueprint(debug_bp)
+    
+    # Request tracing: stage timings for slow request captures, and
+    # sampling while an on-demand profiling session is running
+    @app.before_request
+    def trace_request():
+        """Start the request trace and claim a profiling slot if a session wants one"""
+        if request.path.startswith('/api/debug'):
+            return None
+        request_tracer.begin(request.method, request.path, request.content_length)
+        g.profiled = sampling_profiler.begin_request()
+        return None
+    
+    @app.after_request
+    def record_response(response):
+        """Note the response status and size for the request trace"""
+        request_tracer.set_response(response.status_code, response.content_length)
+        return response
+    
+    @app.teardown_request
+    def finish_trace(error=None):
+        """Capture the trace if the request was slow and release the profiling slot"""
+        if g.pop('profiled', False):
+            sampling_profiler.end_request()
+        request_tracer.finish(error=str(error) if error else None)
+    
+    # Admission control: per endpoint class concurrency, queueing and rate limits.
+    # POLICYSIM_TRUST_CLIENT_ID=1 keys clients on X-Client-Id instead of the
+    # address, for load tests whose virtual users all share one address
+    trust_client_id = os.environ.get('POLICYSIM_TRUST_CLIENT_ID') == '1'
+    
+    @app.before_request
+    def admit_request():
+        """Admit, queue or shed the request before it reaches a view"""
+        if request.method == 'OPTIONS':
+            return None
+        
+        endpoint_class = admission_controller.classify(request.path)
+        if endpoint_class is None:
+            return None
+        
+        # Rate limits are per address: X-Client-Id is chosen by the client, so
+        # a fresh id per request would get a fresh bucket every time
+        client_id = request.remote_addr or 'anonymous'
+        if trust_client_id:
+            client_id = request.headers.get('X-Client-Id') or client_id
+        try:
+            with trace_stage('admission'):
+                started = admission_controller.acquire(endpoint_class, client_id)
+        except AdmissionRejected as e:
+            response = jsonify({
+                'error': e.reason,
+                'status': e.status,
+                'retry_after': e.retry_after
+            })
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, e.status
+        
+        g.admission = (endpoint_class, started)
+        return None
+    
+    @app.teardown_request
+    def release_admission(error=None):
+        """Release the admission slot once the response is finished"""
+        admission = g.pop('admission', None)
+        if admission is not None:
+            admission_controller.release(*admission)
+    
+    @app.route('/api/admission/stats', methods=['GET'])
+    def admission_stats():
+        """Queue depth and shed counts per endpoint class"""
+        return jsonify({
+            'success': True,
+            'stats': admission_controller.stats()
+        }), 200
+    
+    @app.route('/api/coalescing/stats', methods=['GET'])
+    def coalescing_stats():
+        """How many identical concurrent computations were collapsed into one"""
+        return jsonify({
+            'success': True,
+            'stats': single_flight.stats()
+        }), 200
+    
+    @app.route('/api/cache/stats', methods=['GET'])
+    def cache_stats():
+        """Hit rates and sizes of the per-process and shared result cache tiers, and warming progress"""
+        return jsonify({
+            'success': True,
+            'stats': result_cache.stats(),
+            'warmer': cache_warmer.stats()
+        }), 200
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -47,9 +168,25 @@ def create_app():
             'version': '1.0.0',
             'endpoints': {
                 'simulation': '/api/simulate',
+                'simulation_update': '/api/simulate/update',
+                'preview': '/api/preview',
                 'comparison': '/api/compare',
+                'sensitivities': '/api/sensitivities',
                 'explain': '/api/explain',
                 'download_report': '/api/download-report',
+                'portfolio_simulate': '/api/portfolio/simulate',
+                'portfolio_optimize': '/api/portfolio/optimize',
+                'bulk_simulate': '/api/bulk-simulate',
+                'schedule_simulate': '/api/schedule/simulate',
+                'schedule_optimize': '/api/schedule/optimize',
+                'jobs': '/api/jobs',
+                'policy_space': '/api/policy-space',
+                'policy_space_query': '/api/policy-space/query',
+                'admission_stats': '/api/admission/stats',
+                'coalescing_stats': '/api/coalescing/stats',
+                'cache_stats': '/api/cache/stats',
+                'debug_profile': '/api/debug/profile',
+                'debug_slow_requests': '/api/debug/slow-requests',
                 'policy_types': '/api/policy-types',
                 'health': '/api/health'
             },
@@ -93,13 +230,34 @@ if __name__ == '__main__':
     print("📚 API Documentation available at root endpoint")
     print("\nAvailable endpoints:")
     print("  POST /api/simulate - Run policy simulation")
+    print("  POST /api/simulate/update - Recompute only what a what-if edit changes")
+    print("  POST /api/preview - Fast final-metrics preview for slider drags")
     print("  POST /api/compare - Compare two policies")
+    print("  POST /api/sensitivities - Exact sensitivities of results to each lever")
     print("  POST /api/explain - Get AI explanation")
     print("  POST /api/download-report - Download PDF report")
+    print("  POST /api/portfolio/simulate - Simulate combined policies")
+    print("  POST /api/portfolio/optimize - Optimize a policy portfolio")
+    print("  POST /api/bulk-simulate - Stream results for an uploaded scenario CSV")
+    print("  POST /api/schedule/simulate - Simulate per-year strength and budget schedules")
+    print("  POST /api/schedule/optimize - Optimize a year-by-year schedule under budget and risk limits")
+    print("  POST /api/jobs - Submit a background sweep, batch, Monte Carlo or paired uncertainty job")
+    print("  POST /api/policy-space/query - Range, filter and top-k queries over all configurations")
+    print("  GET  /api/policy-space - Policy space index status")
     print("  GET  /api/policy-types - Get available policy types")
+    print("  GET  /api/admission/stats - Admission control statistics")
+    print("  GET  /api/coalescing/stats - Coalesced identical request statistics")
+    print("  GET  /api/cache/stats - Shared result cache and cache warming statistics")
+    print("  POST /api/debug/profile - Profile the next N requests or T seconds (needs POLICYSIM_DEBUG_TOKEN)")
+    print("  GET  /api/debug/slow-requests - Captured slow request traces (needs POLICYSIM_DEBUG_TOKEN)")
     print("  GET  /api/health - Health check")
     print("\n✨ Ready to simulate policies!")
     
+    # Precompute presets and popular scenarios in the background while idle;
+    # with the reloader, only in the child process that serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        cache_warmer.start()
+    
     app.run(
         host='0.0.0.0',
         port=5000,
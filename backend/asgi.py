@@ -0,0 +1,28 @@
+"""
+ASGI entry point for PolicySim backend
+Serve with an ASGI server (uvicorn asgi:app), or run this file to use the built-in asyncio server
+"""
+import argparse
+from app import create_app
+from services.asgi_adapter import ASGIAdapter
+
+app = ASGIAdapter(create_app())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the PolicySim backend over ASGI")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    print("🚀 Starting PolicySim Backend Server (ASGI)...")
+    print(f"📍 Server running at: http://localhost:{args.port}")
+    print(f"🧵 {app.threads} request threads; network I/O on the event loop")
+
+    try:
+        import uvicorn
+    except ImportError:
+        from services.asgi_server import run
+        run(app, host=args.host, port=args.port)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, lifespan="on")
@@ -0,0 +1,545 @@
+"""
+Load generator that steps up concurrency against a running backend
+Reports throughput, latency percentiles and error rate per step plus the knee
+
+Usage (from the backend directory):
+    python -m loadtest.runner loadtest/scenarios/mixed.json --start-server
+    python -m loadtest.runner loadtest/scenarios/mixed.json --base-url http://host:5000 --output result.json
+    python -m loadtest.runner loadtest/scenarios/mixed.json --start-server --server asgi --slow-clients 32
+"""
+import argparse
+import copy
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16, 32, 64]
+DEFAULT_STEP_SECONDS = 10.0
+DEFAULT_WARMUP_SECONDS = 2.0
+REQUEST_TIMEOUT = 60.0
+SERVER_START_TIMEOUT = 20.0
+SERVER_KINDS = ("dev", "wsgi", "asgi")
+DEFAULT_SERVER_THREADS = 8
+DEFAULT_SLOW_BYTES_PER_SECOND = 2048
+
+# Slow clients send and read in this many pieces per second
+SLOW_TICKS_PER_SECOND = 10
+SLOW_RECEIVE_BUFFER = 4096
+
+
+def load_scenario(path):
+    """
+    Read and check a scenario file
+
+    A scenario lists weighted request templates and, optionally, fixtures:
+    requests sent once before the test whose responses can be referenced
+    from template bodies as {"$fixture": "name"}. With client_ids "user"
+    each virtual user is one client to admission control (so per-client
+    rate limits apply); "request" sends a fresh X-Client-Id per request to
+    measure capacity behind the concurrency limits only. slow_clients
+    connections repeat the slow_request template (by default the one with
+    the largest body) throughout every step, uploading and downloading at
+    slow_bytes_per_second, to show how the server copes with slow networks.
+
+    Returns:
+        Scenario dictionary with defaults filled in
+
+    Raises:
+        ValueError: The scenario is malformed
+    """
+    with open(path, "r", encoding="utf-8") as handle:
+        scenario = json.load(handle)
+
+    requests = scenario.get("requests")
+    if not requests:
+        raise ValueError("Scenario needs at least one entry in requests")
+    for entry in requests:
+        for field in ("name", "path"):
+            if field not in entry:
+                raise ValueError(f"Request template missing {field}: {entry}")
+        entry.setdefault("method", "POST" if "body" in entry else "GET")
+        entry.setdefault("weight", 1)
+        if entry["weight"] <= 0:
+            raise ValueError(f"Request {entry['name']} weight must be positive")
+
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    scenario.setdefault("fixtures", {})
+    scenario.setdefault("concurrency", DEFAULT_CONCURRENCY)
+    scenario.setdefault("step_seconds", DEFAULT_STEP_SECONDS)
+    scenario.setdefault("warmup_seconds", DEFAULT_WARMUP_SECONDS)
+    scenario.setdefault("think_time", 0.0)
+    scenario.setdefault("client_ids", "user")
+    if scenario["client_ids"] not in ("user", "request"):
+        raise ValueError("client_ids must be 'user' or 'request'")
+    scenario.setdefault("slow_clients", 0)
+    scenario.setdefault("slow_bytes_per_second", DEFAULT_SLOW_BYTES_PER_SECOND)
+    scenario.setdefault("slow_request", None)
+    if scenario["slow_request"] is not None and scenario["slow_request"] not in [entry["name"] for entry in requests]:
+        raise ValueError(f"slow_request {scenario['slow_request']} is not a request name")
+    if scenario["slow_bytes_per_second"] <= 0:
+        raise ValueError("slow_bytes_per_second must be positive")
+    return scenario
+
+
+def percentile(ordered, q):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return None
+    rank = min(max(1, math.ceil(q * len(ordered))), len(ordered))
+    return ordered[rank - 1]
+
+
+def find_knee(steps):
+    """
+    Pick the knee of the saturation curve
+
+    Uses Kleinrock's power (throughput / latency, here p99): it grows while
+    added concurrency buys throughput and falls once requests only queue,
+    so its peak is the best operating point. Steps with errors above 1%
+    are not eligible.
+
+    Returns:
+        Concurrency at the knee, or None
+    """
+    best = None
+    best_power = 0.0
+    for step in steps:
+        p99 = step["latency_ms"]["p99"]
+        if not p99 or step["error_rate"] > 0.01:
+            continue
+        power = step["throughput_rps"] / p99
+        if power > best_power:
+            best, best_power = step["concurrency"], power
+    return best
+
+
+class Client:
+    """One virtual user holding a keep-alive connection"""
+
+    def __init__(self, base_url, client_id):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.https = parsed.scheme == "https"
+        self.prefix = parsed.path.rstrip("/")
+        self.client_id = client_id
+        self.connection = None
+
+    def send(self, method, path, body):
+        """
+        Send one request and read the full response
+
+        Returns:
+            Tuple of (status, response_bytes); status 0 on connection errors
+        """
+        headers = {"X-Client-Id": self.client_id}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        for attempt in range(2):
+            if self.connection is None:
+                connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self.connection = connection_class(self.host, self.port, timeout=REQUEST_TIMEOUT)
+            try:
+                self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                if response.will_close:
+                    self.close()
+                return response.status, data
+            except (http.client.HTTPException, OSError):
+                self.close()
+                # A kept-alive connection may have been closed by the server; retry once
+                if attempt:
+                    return 0, b""
+        return 0, b""
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class SlowClient:
+    """
+    A client on a slow network
+
+    Sends the request body and reads the response in small pieces at a
+    fixed byte rate over a connection with a small receive buffer, one
+    request per connection.
+    """
+
+    def __init__(self, base_url, client_id, bytes_per_second):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.prefix = parsed.path.rstrip("/")
+        self.client_id = client_id
+        self.piece = max(1, int(bytes_per_second / SLOW_TICKS_PER_SECOND))
+
+    def send(self, method, path, body, stop_at):
+        """
+        Send one request slowly and read the response slowly
+
+        Returns:
+            Status code, 0 on connection errors, or None if stop_at passed first
+        """
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = (
+            f"{method} {self.prefix + path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            f"X-Client-Id: {self.client_id}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("latin-1")
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_RECEIVE_BUFFER)
+        sock.settimeout(REQUEST_TIMEOUT)
+        try:
+            sock.connect((self.host, self.port))
+            sock.sendall(head)
+            for offset in range(0, len(payload), self.piece):
+                if time.perf_counter() >= stop_at:
+                    return None
+                sock.sendall(payload[offset:offset + self.piece])
+                time.sleep(1 / SLOW_TICKS_PER_SECOND)
+
+            response = b""
+            while True:
+                if time.perf_counter() >= stop_at:
+                    return None
+                data = sock.recv(self.piece)
+                if not data:
+                    break
+                response += data
+                time.sleep(1 / SLOW_TICKS_PER_SECOND)
+            status_line = response.split(b"\r\n", 1)[0].split()
+            return int(status_line[1]) if len(status_line) > 1 else 0
+        except (OSError, ValueError):
+            return 0
+        finally:
+            sock.close()
+
+
+class LoadTest:
+    """Runs a scenario at increasing concurrency levels"""
+
+    def __init__(self, scenario, base_url, seed=None):
+        self.scenario = scenario
+        self.base_url = base_url
+        self.rng = random.Random(seed)
+        self.fixtures = {}
+        self.templates = scenario["requests"]
+        self.weights = [entry["weight"] for entry in self.templates]
+
+    def prepare_fixtures(self):
+        """Send each fixture request once and keep its response field"""
+        client = Client(self.base_url, "loadtest-setup")
+        for name, fixture in self.scenario["fixtures"].items():
+            body = self._resolve(fixture.get("body"), self.rng)
+            status, data = client.send(fixture.get("method", "POST"), fixture["path"], body)
+            if status != 200:
+                raise RuntimeError(f"Fixture {name} failed with status {status}: {data[:200]!r}")
+            value = json.loads(data)
+            for key in fixture.get("extract", []):
+                value = value[key]
+            self.fixtures[name] = value
+        client.close()
+
+    def run(self, progress=None):
+        """
+        Run every concurrency step
+
+        Returns:
+            Machine-readable result dictionary
+        """
+        self.prepare_fixtures()
+        steps = []
+        for concurrency in self.scenario["concurrency"]:
+            step = self.run_step(concurrency)
+            steps.append(step)
+            if progress:
+                progress(step)
+
+        return {
+            "scenario": self.scenario["name"],
+            "base_url": self.base_url,
+            "step_seconds": self.scenario["step_seconds"],
+            "warmup_seconds": self.scenario["warmup_seconds"],
+            "client_ids": self.scenario["client_ids"],
+            "mix": {entry["name"]: entry["weight"] for entry in self.templates},
+            "slow_clients": self.scenario["slow_clients"],
+            "slow_bytes_per_second": self.scenario["slow_bytes_per_second"],
+            "steps": steps,
+            "knee_concurrency": find_knee(steps),
+            "max_throughput_rps": max((step["throughput_rps"] for step in steps), default=0.0)
+        }
+
+    def run_step(self, concurrency):
+        """Run one closed-loop step with the given number of virtual users"""
+        warmup = self.scenario["warmup_seconds"]
+        measured = self.scenario["step_seconds"]
+        think_time = self.scenario["think_time"]
+        per_request_ids = self.scenario["client_ids"] == "request"
+
+        started = time.perf_counter()
+        measure_from = started + warmup
+        stop_at = measure_from + measured
+        samples = []
+        samples_lock = threading.Lock()
+
+        def virtual_user(number):
+            rng = random.Random(self.rng.random())
+            client = Client(self.base_url, f"loadtest-{concurrency}-{number}")
+            local = []
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    break
+                template = rng.choices(self.templates, weights=self.weights)[0]
+                body = self._resolve(template.get("body"), rng, template.get("vary"))
+                if per_request_ids:
+                    client.client_id = f"loadtest-{rng.getrandbits(64):016x}"
+                sent = time.perf_counter()
+                status, _ = client.send(template["method"], template["path"], body)
+                finished = time.perf_counter()
+                if sent >= measure_from and finished <= stop_at:
+                    local.append((template["name"], status, finished - sent))
+                if think_time:
+                    time.sleep(rng.expovariate(1 / think_time))
+            client.close()
+            with samples_lock:
+                samples.extend(local)
+
+        slow_statuses = {}
+        slow_template = self._slow_template()
+
+        def slow_user(number):
+            rng = random.Random(self.rng.random())
+            client = SlowClient(self.base_url, f"loadtest-slow-{concurrency}-{number}",
+                                self.scenario["slow_bytes_per_second"])
+            while time.perf_counter() < stop_at:
+                body = self._resolve(slow_template.get("body"), rng, slow_template.get("vary"))
+                status = client.send(slow_template["method"], slow_template["path"], body, stop_at)
+                if status is not None:
+                    with samples_lock:
+                        slow_statuses[str(status)] = slow_statuses.get(str(status), 0) + 1
+
+        threads = [
+            threading.Thread(target=slow_user, args=(number,), daemon=True)
+            for number in range(self.scenario["slow_clients"])
+        ]
+        threads.extend(
+            threading.Thread(target=virtual_user, args=(number,), daemon=True)
+            for number in range(concurrency)
+        )
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        step = summarize_samples(samples, measured)
+        step["concurrency"] = concurrency
+        if self.scenario["slow_clients"]:
+            step["slow_requests"] = {"request": slow_template["name"], "statuses": slow_statuses}
+        step["endpoints"] = {
+            name: summarize_samples([sample for sample in samples if sample[0] == name], measured)
+            for name in sorted({sample[0] for sample in samples})
+        }
+        return step
+
+    def _slow_template(self):
+        """The request template slow clients repeat"""
+        name = self.scenario["slow_request"]
+        if name is not None:
+            return next(entry for entry in self.templates if entry["name"] == name)
+        return max(self.templates, key=lambda entry: len(json.dumps(self._resolve(entry.get("body"), self.rng))))
+
+    def _resolve(self, body, rng, vary=None):
+        """Fill fixture references and randomize varied fields in a body template"""
+        if body is None:
+            return None
+        body = self._substitute(copy.deepcopy(body))
+        for dotted, spec in (vary or {}).items():
+            *parents, field = dotted.split(".")
+            target = body
+            for parent in parents:
+                target = target[parent]
+            if isinstance(spec, dict) and "choices" in spec:
+                target[field] = rng.choice(spec["choices"])
+            else:
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    target[field] = rng.randint(low, high)
+                else:
+                    target[field] = rng.uniform(low, high)
+        return body
+
+    def _substitute(self, value):
+        if isinstance(value, dict):
+            if set(value) == {"$fixture"}:
+                return copy.deepcopy(self.fixtures[value["$fixture"]])
+            return {key: self._substitute(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._substitute(item) for item in value]
+        return value
+
+
+def summarize_samples(samples, seconds):
+    """Throughput, latency percentiles and error counts for (name, status, latency) samples"""
+    latencies = sorted(sample[2] * 1000 for sample in samples)
+    statuses = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    errors = sum(1 for _, status, _ in samples if status == 0 or status >= 400)
+    count = len(samples)
+
+    def rounded(value):
+        return round(value, 2) if value is not None else None
+
+    return {
+        "requests": count,
+        "throughput_rps": round(count / seconds, 2) if seconds else 0.0,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "statuses": statuses,
+        "latency_ms": {
+            "p50": rounded(percentile(latencies, 0.50)),
+            "p95": rounded(percentile(latencies, 0.95)),
+            "p99": rounded(percentile(latencies, 0.99)),
+            "max": rounded(latencies[-1] if latencies else None),
+            "mean": rounded(sum(latencies) / count if count else None)
+        }
+    }
+
+
+def start_server(port, server="dev", threads=DEFAULT_SERVER_THREADS):
+    """
+    Start the backend in a subprocess on a local port and wait for /api/health
+
+    "dev" is the Flask dev server, threaded (a thread per connection)
+    without the debugger or reloader, so the numbers reflect the
+    application rather than debug tooling. "wsgi" serves the app from a
+    fixed pool of threads and "asgi" through the ASGI entry point with the
+    same number of request threads (see loadtest.serve).
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if server == "dev":
+        command = [
+            sys.executable, "-c",
+            "from app import create_app; "
+            f"create_app().run(host='127.0.0.1', port={port}, debug=False, threaded=True)"
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "loadtest.serve", server,
+            "--port", str(port), "--threads", str(threads)
+        ]
+    # Virtual users all connect from this host, so admission control has to
+    # tell them apart by X-Client-Id
+    env = dict(os.environ)
+    env.setdefault("POLICYSIM_TRUST_CLIENT_ID", "1")
+    process = subprocess.Popen(
+        command, cwd=backend_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    client = Client(f"http://127.0.0.1:{port}", "loadtest-setup")
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Backend exited during startup")
+        status, _ = client.send("GET", "/api/health", None)
+        if status == 200:
+            client.close()
+            return process
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Backend did not become healthy in time")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def print_step(step):
+    latency = step["latency_ms"]
+    print(
+        f"  c={step['concurrency']:<4} {step['throughput_rps']:>9.1f} rps  "
+        f"p50={latency['p50']}ms p95={latency['p95']}ms p99={latency['p99']}ms  "
+        f"errors={step['error_rate'] * 100:.2f}%"
+        + (f"  slow={step['slow_requests']['statuses']}" if "slow_requests" in step else ""),
+        file=sys.stderr
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Step-load the PolicySim backend")
+    parser.add_argument("scenario", help="Scenario JSON file")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--start-server", action="store_true",
+                        help="Start the backend locally on a free port for the run")
+    parser.add_argument("--server", choices=SERVER_KINDS, default="dev",
+                        help="Server started by --start-server")
+    parser.add_argument("--threads", type=int, default=DEFAULT_SERVER_THREADS,
+                        help="Request threads of the wsgi and asgi servers")
+    parser.add_argument("--slow-clients", type=int, help="Slow connections kept busy during every step")
+    parser.add_argument("--slow-bytes-per-second", type=int, help="Upload and download rate of slow clients")
+    parser.add_argument("--concurrency", help="Comma separated levels, overrides the scenario")
+    parser.add_argument("--step-seconds", type=float, help="Measured seconds per step")
+    parser.add_argument("--warmup-seconds", type=float, help="Unmeasured seconds per step")
+    parser.add_argument("--seed", type=int, help="Seed for request mix and parameter draws")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    scenario = load_scenario(args.scenario)
+    if args.concurrency:
+        scenario["concurrency"] = [int(level) for level in args.concurrency.split(",")]
+    if args.step_seconds is not None:
+        scenario["step_seconds"] = args.step_seconds
+    if args.warmup_seconds is not None:
+        scenario["warmup_seconds"] = args.warmup_seconds
+    if args.slow_clients is not None:
+        scenario["slow_clients"] = args.slow_clients
+    if args.slow_bytes_per_second is not None:
+        scenario["slow_bytes_per_second"] = args.slow_bytes_per_second
+
+    server = None
+    base_url = args.base_url
+    if args.start_server:
+        port = free_port()
+        server = start_server(port, args.server, args.threads)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        print(f"Scenario {scenario['name']} against {base_url}", file=sys.stderr)
+        result = LoadTest(scenario, base_url, seed=args.seed).run(progress=print_step)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"  knee at concurrency {result['knee_concurrency']}", file=sys.stderr)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Backend servers for load tests
+A fixed thread pool WSGI server (the shape of a threaded WSGI worker) or the ASGI entry point
+
+Usage (from the backend directory):
+    python -m loadtest.serve wsgi --port 5000 --threads 8
+    python -m loadtest.serve asgi --port 5000 --threads 8
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server handling connections on a fixed number of threads
+
+    Like a threaded WSGI worker, a connection keeps its thread while its
+    request body is read, the view runs and the response is written, so
+    slow clients use up the pool. Connections beyond the pool wait in
+    the accept queue.
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi-worker")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the backend for a load test")
+    parser.add_argument("server", choices=["wsgi", "asgi"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8, help="Request threads")
+    args = parser.parse_args(argv)
+
+    # Every virtual user connects from this host; admission control tells
+    # them apart by X-Client-Id only on a load test server
+    os.environ.setdefault("POLICYSIM_TRUST_CLIENT_ID", "1")
+
+    from app import create_app
+    if args.server == "wsgi":
+        # The ASGI adapter starts cache warming on lifespan startup
+        from services.cache_warmer import cache_warmer
+        cache_warmer.start()
+        PooledWSGIServer(args.host, args.port, create_app(), args.threads).serve_forever()
+    else:
+        from services.asgi_adapter import ASGIAdapter
+        from services.asgi_server import run
+        run(ASGIAdapter(create_app(), threads=args.threads), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
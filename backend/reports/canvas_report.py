@@ -0,0 +1,569 @@
+"""
+Direct-canvas renderer for simulation reports
+Draws the fixed report layout at precomputed coordinates, filling in only the variable fields
+"""
+from functools import lru_cache
+import re
+import threading
+from datetime import datetime
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.rl_accel import fp_str, escapePDF
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# Page geometry shared with the platypus renderer. The frame inset matches
+# SimpleDocTemplate's default one inch side margins and 6 point frame padding
+REPORT_PAGE_SIZE = letter
+REPORT_TOP_MARGIN = 0.75 * inch
+REPORT_BOTTOM_MARGIN = 0.75 * inch
+REPORT_SIDE_MARGIN = inch
+FRAME_PADDING = 6
+
+REPORT_TITLE = "EQUQLICY: Gender Policy Impact Report"
+REPORT_FOOTER = "This report was generated by PolicySim, an AI-powered gender policy impact simulator. " \
+                "Results are based on statistical models and should be used as guidance alongside expert consultation."
+
+# Table layouts shared with the platypus renderer's TableStyles
+POLICY_TABLE_LAYOUT = {
+    "col_widths": (2.5 * inch, 4 * inch),
+    "header_color": colors.HexColor('#3498DB'),
+    "body_color": colors.beige
+}
+RESULTS_TABLE_LAYOUT = {
+    "col_widths": (2.5 * inch, 2 * inch, 1.5 * inch),
+    "header_color": colors.HexColor('#2ECC71'),
+    "body_color": colors.lightgrey
+}
+TABLE_HEADER_FONT_SIZE = 12
+TABLE_BODY_FONT_SIZE = 10
+TABLE_HEADER_BOTTOM_PADDING = 12
+TABLE_LEFT_PADDING = 10
+TABLE_GRID_COLOR = colors.grey
+TABLE_GRID_WIDTH = 1
+
+# reportlab table cell defaults for the paddings and leading the styles leave unset
+TABLE_CELL_PADDING = 3
+TABLE_LEADING = 12
+
+# Bold label and value lines of the metadata and timeline paragraphs as
+# (label, whether the label is a slot, value slot)
+METADATA_LINES = (
+    ("Generated:", False, "generated"),
+    ("Policy Name:", False, "policy_name"),
+    ("Policy Type:", False, "policy_type")
+)
+TIMELINE_LINES = (
+    ("Year 0 (Baseline):", False, "timeline_baseline"),
+    ("timeline_final_label", True, "timeline_final"),
+    ("Total Improvement:", False, "timeline_improvement")
+)
+
+# Paragraph line fitting: reportlab lets spaces shrink by this share before breaking
+SPACE_SHRINKAGE = 0.05
+
+_FUZZ = 1e-6
+_BOLD_MARKDOWN = re.compile(r'\*\*(.+?)\*\*', re.S)
+# Text platypus would read as markup; such reports are left to the platypus renderer
+_MARKUP = re.compile(r'[<>]|&[#A-Za-z]')
+
+
+class UnsupportedLayout(Exception):
+    """Report content the fixed template cannot reproduce exactly"""
+
+
+@lru_cache(maxsize=8192)
+def _width(text, font_name, font_size):
+    """String width, memoized: report text repeats the same words across reports"""
+    return stringWidth(text, font_name, font_size)
+
+
+def _bold_font(font_name):
+    """Bold variant of a standard font family, as paragraph <b> markup selects it"""
+    return {"Helvetica": "Helvetica-Bold", "Times-Roman": "Times-Bold", "Courier": "Courier-Bold"}.get(
+        font_name, font_name
+    )
+
+
+def _italic_font(font_name):
+    """Italic variant of a standard font family, as paragraph <i> markup selects it"""
+    return {"Helvetica": "Helvetica-Oblique", "Times-Roman": "Times-Italic", "Courier": "Courier-Oblique"}.get(
+        font_name, font_name
+    )
+
+
+def break_lines(runs, width, font_size):
+    """
+    Break styled text into lines the way platypus paragraphs do
+
+    Words are placed greedily; a word still fits when the line overflows
+    by no more than SPACE_SHRINKAGE of the line's spaces. Whitespace runs
+    collapse to single spaces, measured in the font of the word before them.
+
+    Args:
+        runs: List of (font name, text) pairs
+        width: Available line width
+        font_size: Font size of every run
+
+    Returns:
+        List of lines, each a tuple of (width, [(font name, text), ...])
+
+    Raises:
+        UnsupportedLayout: A single word is wider than the line
+    """
+    # Words as lists of (font, piece), split on whitespace across runs
+    words = []
+    current = []
+    for font_name, text in runs:
+        for piece in re.split(r'(\s+)', text):
+            if not piece:
+                continue
+            if piece.isspace():
+                if current:
+                    words.append(current)
+                    current = []
+            else:
+                current.append((font_name, piece))
+    if current:
+        words.append(current)
+
+    lines = []
+    line = []
+    line_width = 0.0
+    spaces_width = 0.0
+    space_width = 0.0
+    for word in words:
+        word_width = 0.0
+        for font_name, piece in word:
+            word_width += _width(piece, font_name, font_size)
+        if word_width > width:
+            raise UnsupportedLayout("word wider than the line")
+
+        if line:
+            limit = width + SPACE_SHRINKAGE * (spaces_width + space_width)
+            if line_width + space_width + word_width > limit:
+                lines.append((line_width, line))
+                line = []
+
+        if line:
+            line_width += space_width + word_width
+            spaces_width += space_width
+            line.append((line[-1][0], " "))
+        else:
+            line_width = word_width
+            spaces_width = 0.0
+        line.extend(word)
+        space_width = _width(" ", word[-1][0], font_size)
+
+    if line:
+        lines.append((line_width, line))
+
+    # Merge consecutive pieces in the same font into one run per font change
+    merged = []
+    for line_width, pieces in lines:
+        line_runs = []
+        for font_name, piece in pieces:
+            if line_runs and line_runs[-1][0] == font_name:
+                line_runs[-1][1] += piece
+            else:
+                line_runs.append([font_name, piece])
+        merged.append((line_width, [tuple(run) for run in line_runs]))
+    return merged
+
+
+class _Cursor:
+    """
+    Vertical position in the page frame, following platypus frame spacing
+
+    Space before a block is dropped at the top of a frame and otherwise
+    overlaps the space after the previous block.
+    """
+
+    def __init__(self, left, bottom, top, width):
+        self.left = left
+        self.bottom = bottom
+        self.top = top
+        self.width = width
+        self.new_page()
+
+    def new_page(self):
+        self.y = self.top
+        self.at_top = True
+        self.space_after = 0
+
+    def gap(self, space_before):
+        return 0 if self.at_top else max(space_before - self.space_after, 0)
+
+    def room(self, space_before):
+        """Height available to a block below the gap it needs"""
+        return self.y - self.bottom - self.gap(space_before)
+
+    def place(self, height, space_before=0, space_after=0):
+        """
+        Take room for a block
+
+        Returns:
+            Bottom y of the block, or None if it does not fit on this page
+        """
+        gap = self.gap(space_before)
+        if self.y - self.bottom - gap <= 0:
+            return None
+        bottom = self.y - gap - height
+        if bottom < self.bottom - _FUZZ:
+            return None
+        y = bottom - space_after
+        if y != self.y:
+            self.at_top = False
+        self.y = y
+        self.space_after = space_after
+        return bottom
+
+
+class CanvasReportRenderer:
+    """
+    Fast simulation report renderer drawing straight onto a canvas
+
+    The platypus renderer re-measures and lays out the same report on every
+    build. Here the first page is laid out once into a template: its static
+    content compiled to a PDF operator stream, plus slots for the policy
+    details, result values and timeline figures. Each report copies the
+    stream into its first page and draws only the slots.
+    Only the explanation and footer are flowed per report, across pages,
+    with the platypus paragraph and page-break rules. The output matches
+    the platypus renderer's layout; content the template cannot reproduce
+    exactly (markup characters, values too long for their line) raises
+    UnsupportedLayout so the caller can fall back to platypus.
+    """
+
+    def __init__(self, styles, generator):
+        """
+        Args:
+            styles: Stylesheet with the generator's CustomTitle, SectionHeader
+                and CustomBody paragraph styles
+            generator: Object providing policy_rows and result_rows
+        """
+        self.styles = styles
+        self.generator = generator
+        page_width, page_height = REPORT_PAGE_SIZE
+        self.frame = (
+            REPORT_SIDE_MARGIN + FRAME_PADDING,
+            REPORT_BOTTOM_MARGIN + FRAME_PADDING,
+            page_height - REPORT_TOP_MARGIN - FRAME_PADDING,
+            page_width - 2 * (REPORT_SIDE_MARGIN + FRAME_PADDING)
+        )
+        self._lock = threading.Lock()
+        self._template = None
+
+    def write(self, simulation_results, explanation_text, output):
+        """
+        Render the simulation report into a writable binary file object
+
+        Raises:
+            UnsupportedLayout: The report needs the platypus renderer
+        """
+        template = self.template()
+        body = self.styles['CustomBody']
+        body_bold = _bold_font(body.fontName)
+
+        policy = simulation_results["policy"]
+        final = simulation_results["final_metrics"]
+        risk = simulation_results["risk"]
+        timeline = simulation_results["timeline"]
+
+        values = {}
+        for number, (_, value) in enumerate(self.generator.policy_rows(policy)[1:]):
+            values[f"policy_{number}"] = value
+        for number, (_, value, impact) in enumerate(self.generator.result_rows(final, risk)[1:]):
+            values[f"result_{number}"] = value
+            values[f"impact_{number}"] = impact
+
+        # Metadata and timeline lines must each stay on one line, as in the template
+        values.update({
+            "generated": datetime.now().strftime("%B %d, %Y at %I:%M %p"),
+            "policy_name": policy['name'],
+            "policy_type": policy['type_name'],
+            "timeline_baseline": f"Pay Gap = {timeline['pay_gap'][0]:.1f}%",
+            "timeline_final_label": f"Year {policy['duration']} (Final):",
+            "timeline_final": f"Pay Gap = {timeline['pay_gap'][-1]:.1f}%",
+            "timeline_improvement": f"{timeline['pay_gap'][0] - timeline['pay_gap'][-1]:.1f} percentage points"
+        })
+        for label, label_is_slot, slot in METADATA_LINES + TIMELINE_LINES:
+            label = values[label] if label_is_slot else label
+            if _MARKUP.search(label) or _MARKUP.search(values[slot]):
+                raise UnsupportedLayout("markup characters in report text")
+            runs = [(body_bold, label), (body.fontName, " " + values[slot])]
+            if len(break_lines(runs, self.frame[3], body.fontSize)) != 1:
+                raise UnsupportedLayout(f"{slot} does not fit on one line")
+
+        if _MARKUP.search(explanation_text):
+            raise UnsupportedLayout("markup characters in explanation")
+        blocks = []
+        for block in explanation_text.split('\n\n'):
+            if block.strip():
+                runs = []
+                for number, part in enumerate(_BOLD_MARKDOWN.split(block)):
+                    if part:
+                        runs.append((body_bold if number % 2 else body.fontName, part))
+                blocks.append(break_lines(runs, self.frame[3], body.fontSize))
+        footer_font = _italic_font(body.fontName)
+        footer = break_lines([(footer_font, REPORT_FOOTER)], self.frame[3], body.fontSize)
+
+        pdf = canvas.Canvas(output, pagesize=REPORT_PAGE_SIZE)
+        # The static content refers to fonts by this document's resource names
+        fonts = [pdf._doc.getInternalFontName(font_name) for font_name in template["fonts"]]
+        pdf.addLiteral(template["stream"].format(*fonts))
+        _replay(pdf, template["ops"], values)
+
+        cursor = _Cursor(*self.frame)
+        cursor.y, cursor.at_top, cursor.space_after = template["cursor"]
+
+        header = self.styles['SectionHeader']
+        self._flow_paragraph(pdf, cursor, header, template["analysis_header"])
+        for block_lines in blocks:
+            self._flow_paragraph(pdf, cursor, body, block_lines)
+        self._flow_spacer(pdf, cursor, 0.3 * inch)
+        self._flow_spacer(pdf, cursor, 0.2 * inch)
+        self._flow_paragraph(pdf, cursor, body, footer)
+
+        pdf.showPage()
+        pdf.save()
+
+    def template(self):
+        """The first page template, built on first use"""
+        if self._template is None:
+            with self._lock:
+                if self._template is None:
+                    self._template = self._build_template()
+        return self._template
+
+    def _build_template(self):
+        """
+        Lay out the first page once
+
+        Every block on the first page has a fixed height: the tables hold
+        single-line cells and the metadata and timeline paragraphs hold one
+        line per <br/>. Static content (title, headings, table backgrounds,
+        headers, labels and grid) is compiled into one PDF operator stream;
+        variable text stays as named slots drawn per report. The template
+        also records the cursor state where the explanation section starts.
+        """
+        styles = self.styles
+        title = styles['CustomTitle']
+        header = styles['SectionHeader']
+        body = styles['CustomBody']
+        body_bold = _bold_font(body.fontName)
+        left, _, _, width = self.frame
+
+        cursor = _Cursor(*self.frame)
+        static = []
+        ops = []
+
+        def place(height, space_before=0, space_after=0):
+            bottom = cursor.place(height, space_before, space_after)
+            if bottom is None:
+                raise RuntimeError("Report template does not fit on the first page")
+            return bottom
+
+        def static_paragraph(style, text):
+            lines = break_lines([(style.fontName, text)], width, style.fontSize)
+            height = len(lines) * style.leading
+            baseline = place(height, style.spaceBefore, style.spaceAfter) + height - style.fontSize
+            static.append(("fill", style.textColor))
+            for line_width, runs in lines:
+                x = left + ((width - line_width) / 2 if style.alignment == TA_CENTER else 0)
+                static.append(("text", x, baseline, style.fontSize, runs))
+                baseline -= style.leading
+
+        def labelled_lines(entries):
+            height = len(entries) * body.leading
+            baseline = place(height, body.spaceBefore, body.spaceAfter) + height - body.fontSize
+            ops.append(("fill", body.textColor))
+            for label, label_is_slot, slot in entries:
+                ops.append(("line", left, baseline, body.fontSize,
+                            ((body_bold, label, label_is_slot), (body.fontName, slot, True))))
+                baseline -= body.leading
+
+        def table(layout, header_row, labels, slots):
+            col_widths = layout["col_widths"]
+            table_width = sum(col_widths)
+            header_height = TABLE_LEADING + TABLE_CELL_PADDING + TABLE_HEADER_BOTTOM_PADDING
+            row_height = TABLE_LEADING + 2 * TABLE_CELL_PADDING
+            height = header_height + row_height * len(labels)
+            bottom = place(height)
+            top = bottom + height
+            header_bottom = top - header_height
+            columns = [left + (width - table_width) / 2]
+            for col_width in col_widths:
+                columns.append(columns[-1] + col_width)
+            x0, x1 = columns[0], columns[-1]
+
+            static.append(("fill", layout["header_color"]))
+            static.append(("rect", x0, header_bottom, table_width, header_height))
+            static.append(("fill", layout["body_color"]))
+            static.append(("rect", x0, bottom, table_width, header_bottom - bottom))
+
+            # Vertically centred cells: baseline from the row bottom and paddings
+            baseline = header_bottom + (header_height + TABLE_HEADER_BOTTOM_PADDING - TABLE_CELL_PADDING
+                                        + TABLE_LEADING) / 2 - TABLE_HEADER_FONT_SIZE
+            static.append(("fill", colors.whitesmoke))
+            for column, text in enumerate(header_row):
+                static.append(("text", columns[column] + TABLE_LEFT_PADDING, baseline, TABLE_HEADER_FONT_SIZE,
+                               (("Helvetica-Bold", text),)))
+
+            static.append(("fill", colors.black))
+            ops.append(("fill", colors.black))
+            row_bottoms = []
+            for number, label in enumerate(labels):
+                row_bottom = header_bottom - (number + 1) * row_height
+                row_bottoms.append(row_bottom)
+                baseline = row_bottom + (row_height + TABLE_LEADING) / 2 - TABLE_BODY_FONT_SIZE
+                static.append(("text", columns[0] + TABLE_LEFT_PADDING, baseline, TABLE_BODY_FONT_SIZE,
+                               (("Helvetica-Bold", label),)))
+                for column, slot in enumerate(slots, start=1):
+                    ops.append(("slot", columns[column] + TABLE_LEFT_PADDING, baseline, "Helvetica",
+                                TABLE_BODY_FONT_SIZE, f"{slot}_{number}"))
+
+            segments = [(x0, top, x1, top), (x0, bottom, x1, bottom), (x0, bottom, x0, top),
+                        (x1, bottom, x1, top), (x0, header_bottom, x1, header_bottom)]
+            segments.extend((x0, y, x1, y) for y in row_bottoms[:-1])
+            segments.extend((x, bottom, x, top) for x in columns[1:-1])
+            static.append(("grid", TABLE_GRID_COLOR, TABLE_GRID_WIDTH, segments))
+
+        static_paragraph(title, REPORT_TITLE)
+        place(0.2 * inch)
+        labelled_lines(METADATA_LINES)
+        place(0.3 * inch)
+
+        policy_rows = self.generator.policy_rows(_SAMPLE_POLICY)
+        static_paragraph(header, "Policy Configuration")
+        table(POLICY_TABLE_LAYOUT, policy_rows[0], [row[0] for row in policy_rows[1:]], ("policy",))
+        place(0.3 * inch)
+
+        result_rows = self.generator.result_rows(_SAMPLE_FINAL, _SAMPLE_RISK)
+        static_paragraph(header, "Key Results")
+        table(RESULTS_TABLE_LAYOUT, result_rows[0], [row[0] for row in result_rows[1:]], ("result", "impact"))
+        place(0.3 * inch)
+
+        static_paragraph(header, "Timeline Summary")
+        labelled_lines(TIMELINE_LINES)
+        place(0.3 * inch)
+
+        fonts, stream = _compile_static(static)
+        return {
+            "fonts": fonts,
+            "stream": stream,
+            "ops": ops,
+            "cursor": (cursor.y, cursor.at_top, cursor.space_after),
+            "analysis_header": break_lines([(header.fontName, "AI Analysis & Insights")], width, header.fontSize)
+        }
+
+    def _flow_paragraph(self, pdf, cursor, style, lines):
+        """Place broken lines, splitting across pages without leaving a lone first line behind"""
+        leading = style.leading
+        while lines:
+            bottom = cursor.place(len(lines) * leading, style.spaceBefore, style.spaceAfter)
+            if bottom is not None:
+                _draw_lines(pdf, cursor.left, bottom + len(lines) * leading, style, lines)
+                return
+            fit = int(cursor.room(style.spaceBefore) / leading) if cursor.room(style.spaceBefore) > _FUZZ else 0
+            if fit > 1:
+                bottom = cursor.place(fit * leading, style.spaceBefore, style.spaceAfter)
+                _draw_lines(pdf, cursor.left, bottom + fit * leading, style, lines[:fit])
+                lines = lines[fit:]
+            elif cursor.at_top:
+                raise UnsupportedLayout("paragraph line taller than the page")
+            pdf.showPage()
+            cursor.new_page()
+
+    def _flow_spacer(self, pdf, cursor, height):
+        if cursor.place(height) is None:
+            pdf.showPage()
+            cursor.new_page()
+            cursor.place(height)
+
+
+def _draw_lines(pdf, left, top, style, lines):
+    """Draw left-aligned paragraph lines below a block top"""
+    pdf.setFillColor(style.textColor)
+    baseline = top - style.fontSize
+    for _, runs in lines:
+        text = pdf.beginText(left, baseline)
+        for font_name, piece in runs:
+            text.setFont(font_name, style.fontSize)
+            text.textOut(piece)
+        pdf.drawText(text)
+        baseline -= style.leading
+
+
+def _compile_static(static):
+    """
+    Compile static drawing operations into a PDF operator stream
+
+    The stream is a format string with one positional field per font, to
+    be filled with each document's font resource names. It runs inside its
+    own graphics state so the canvas's own font and colour state stays valid.
+
+    Returns:
+        Tuple of (font names in field order, stream format string)
+    """
+    fonts = []
+    code = ["q"]
+    for op in static:
+        kind = op[0]
+        if kind == "fill":
+            code.append(f"{fp_str(*op[1].rgb())} rg")
+        elif kind == "rect":
+            code.append(f"n {fp_str(*op[1:])} re f*")
+        elif kind == "text":
+            _, x, y, font_size, runs = op
+            parts = [f"BT 1 0 0 1 {fp_str(x, y)} Tm"]
+            for font_name, text in runs:
+                if font_name not in fonts:
+                    fonts.append(font_name)
+                text = escapePDF(text.encode("ascii")).replace("{", "{{").replace("}", "}}")
+                parts.append(f"{{{fonts.index(font_name)}}} {fp_str(font_size)} Tf ({text}) Tj")
+            parts.append("ET")
+            code.append(" ".join(parts))
+        elif kind == "grid":
+            _, color, line_width, segments = op
+            code.append(f"q 1 J 1 j {fp_str(*color.rgb())} RG {fp_str(line_width)} w")
+            code.extend(f"n {fp_str(x1, y1)} m {fp_str(x2, y2)} l S" for x1, y1, x2, y2 in segments)
+            code.append("Q")
+    code.append("Q")
+    return fonts, "\n".join(code)
+
+
+def _replay(pdf, ops, values):
+    """Draw the variable template operations, filling slots from values"""
+    for op in ops:
+        kind = op[0]
+        if kind == "fill":
+            pdf.setFillColor(op[1])
+        elif kind == "slot":
+            _, x, y, font_name, font_size, name = op
+            pdf.setFont(font_name, font_size)
+            pdf.drawString(x, y, values[name])
+        elif kind == "line":
+            # Bold label and its value on one paragraph line
+            _, x, y, font_size, runs = op
+            text = pdf.beginText(x, y)
+            for number, (font_name, name, is_slot) in enumerate(runs):
+                piece = values[name] if is_slot else name
+                text.setFont(font_name, font_size)
+                text.textOut(" " + piece if number else piece)
+            pdf.drawText(text)
+
+
+# Placeholder inputs used only to read the static labels of the table rows
+_SAMPLE_POLICY = {"type_name": "", "percentage": 0, "duration": 0, "budget": 0, "description": ""}
+_SAMPLE_FINAL = {
+    "pay_gap_reduction": 0.0,
+    "final_pay_gap": 0.0,
+    "employment_improvement": 0.0,
+    "final_leadership": {"female": 0.0},
+    "total_budget_spent": 0.0
+}
+_SAMPLE_RISK = {"level": "low", "score": 0}
@@ -10,6 +10,35 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.pdfgen import canvas
 from datetime import datetime
 import io
+import re
+import tempfile
+from services.profiler import trace_stage, traced
+from reports.canvas_report import (
+    CanvasReportRenderer,
+    UnsupportedLayout,
+    REPORT_PAGE_SIZE,
+    REPORT_TOP_MARGIN,
+    REPORT_BOTTOM_MARGIN,
+    REPORT_TITLE,
+    REPORT_FOOTER,
+    POLICY_TABLE_LAYOUT,
+    RESULTS_TABLE_LAYOUT,
+    TABLE_HEADER_FONT_SIZE,
+    TABLE_BODY_FONT_SIZE,
+    TABLE_HEADER_BOTTOM_PADDING,
+    TABLE_LEFT_PADDING,
+    TABLE_GRID_COLOR,
+    TABLE_GRID_WIDTH
+)
+
+# Finished reports larger than this are spooled to disk while they stream
+REPORT_SPOOL_BYTES = 1024 * 1024
+
+# Renderer modes: "full" lays the report out with platypus flowables,
+# "fast" replays a cached first-page template on the canvas
+REPORT_MODE_FULL = "full"
+REPORT_MODE_FAST = "fast"
+REPORT_MODES = (REPORT_MODE_FULL, REPORT_MODE_FAST)
 
 
 class PDFReportGenerator:
@@ -18,6 +47,7 @@ class PDFReportGenerator:
     def __init__(self):
         self.styles = getSampleStyleSheet()
         self._setup_custom_styles()
+        self.canvas_renderer = CanvasReportRenderer(self.styles, self)
     
     def _setup_custom_styles(self):
         """Setup custom paragraph styles"""
@@ -53,27 +83,86 @@ class PDFReportGenerator:
             fontName='Helvetica'
         ))
     
-    def generate_simulation_report(self, simulation_results, explanation_text):
+    def generate_simulation_report(self, simulation_results, explanation_text, mode=REPORT_MODE_FULL):
         """
         Generate PDF report for a single simulation
         
         Args:
             simulation_results: Simulation results dictionary
             explanation_text: AI-generated explanation
+            mode: Renderer mode (see REPORT_MODES)
         
         Returns:
             PDF file as bytes
         """
         buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter,
-                              topMargin=0.75*inch, bottomMargin=0.75*inch)
+        self.write_simulation_report(simulation_results, explanation_text, buffer, mode)
+        return buffer.getvalue()
+    
+    def open_simulation_report(self, simulation_results, explanation_text, mode=REPORT_MODE_FULL):
+        """
+        Generate PDF report into a spooled temporary file for streaming
+        
+        ReportLab assembles the finished document in memory once when it
+        saves; that single copy is written straight into the spool and
+        released. Reports up to REPORT_SPOOL_BYTES stay in memory, larger
+        ones roll over to disk, so a report waiting to be streamed holds at
+        most REPORT_SPOOL_BYTES.
+        
+        Returns:
+            Tuple of (file positioned at the start, size in bytes); the
+            caller owns the file and must close it
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_BYTES)
+        try:
+            self.write_simulation_report(simulation_results, explanation_text, spool, mode)
+            size = spool.tell()
+            spool.seek(0)
+        except Exception:
+            spool.close()
+            raise
+        return spool, size
+    
+    @traced("pdf_report")
+    def write_simulation_report(self, simulation_results, explanation_text, output, mode=REPORT_MODE_FULL):
+        """
+        Build the simulation report into a writable binary file object
+        
+        The fast mode draws the same layout straight onto the canvas from a
+        cached template at a fraction of the cost; reports it cannot lay
+        out exactly are built with platypus instead.
+        
+        Args:
+            simulation_results: Simulation results dictionary
+            explanation_text: AI-generated explanation
+            output: File-like object the PDF is written to
+            mode: Renderer mode (see REPORT_MODES)
+        
+        Raises:
+            ValueError: Unknown renderer mode
+        """
+        if mode not in REPORT_MODES:
+            raise ValueError(f"Invalid report mode: {mode}. Must be one of {', '.join(REPORT_MODES)}")
+        
+        if mode == REPORT_MODE_FAST:
+            # The canvas writes nothing until the report is complete, so a
+            # rejected layout leaves the output untouched for platypus
+            try:
+                with trace_stage("pdf_canvas"):
+                    self.canvas_renderer.write(simulation_results, explanation_text, output)
+                return
+            except UnsupportedLayout:
+                pass
+        
+        doc = SimpleDocTemplate(output, pagesize=REPORT_PAGE_SIZE,
+                              topMargin=REPORT_TOP_MARGIN, bottomMargin=REPORT_BOTTOM_MARGIN)
         
         # Container for document elements
         elements = []
         
         # Title
         title = Paragraph(
-            "EQUQLICY: Gender Policy Impact Report",
+            REPORT_TITLE,
             self.styles['CustomTitle']
         )
         elements.append(title)
@@ -94,29 +183,20 @@ class PDFReportGenerator:
         # Policy Details Section
         elements.append(Paragraph("Policy Configuration", self.styles['SectionHeader']))
         
-        policy_details = [
-            ['Parameter', 'Value'],
-            ['Policy Type', policy['type_name']],
-            ['Policy Strength', f"{policy['percentage']}%"],
-            ['Duration', f"{policy['duration']} years"],
-            ['Total Budget', f"${policy['budget']:,.0f}"],
-            ['Description', policy['description']]
-        ]
-        
-        policy_table = Table(policy_details, colWidths=[2.5*inch, 4*inch])
+        policy_table = Table(self.policy_rows(policy), colWidths=list(POLICY_TABLE_LAYOUT['col_widths']))
         policy_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3498DB')),
+            ('BACKGROUND', (0, 0), (-1, 0), POLICY_TABLE_LAYOUT['header_color']),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('FONTSIZE', (0, 0), (-1, 0), TABLE_HEADER_FONT_SIZE),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), TABLE_HEADER_BOTTOM_PADDING),
+            ('BACKGROUND', (0, 1), (-1, -1), POLICY_TABLE_LAYOUT['body_color']),
+            ('GRID', (0, 0), (-1, -1), TABLE_GRID_WIDTH, TABLE_GRID_COLOR),
             ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), TABLE_BODY_FONT_SIZE),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('LEFTPADDING', (0, 0), (-1, -1), TABLE_LEFT_PADDING),
             ('RIGHTPADDING', (0, 0), (-1, -1), 10),
         ]))
         
@@ -129,33 +209,20 @@ class PDFReportGenerator:
         final = simulation_results["final_metrics"]
         risk = simulation_results["risk"]
         
-        results_data = [
-            ['Metric', 'Value', 'Impact'],
-            ['Pay Gap Reduction', f"{final['pay_gap_reduction']:.1f}%", 
-             self._get_impact_label(final['pay_gap_reduction'], 'pay_gap')],
-            ['Final Pay Gap', f"{final['final_pay_gap']:.1f}%", ''],
-            ['Employment Ratio Increase', f"{final['employment_improvement']:.1f}%",
-             self._get_impact_label(final['employment_improvement'], 'employment')],
-            ['Female Leadership', f"{final['final_leadership']['female']:.1f}%", ''],
-            ['Total Budget Spent', f"${final['total_budget_spent']:,.0f}", ''],
-            ['Risk Level', f"{risk['level'].upper()} ({risk['score']:.0f}/100)",
-             self._get_risk_color(risk['level'])]
-        ]
-        
-        results_table = Table(results_data, colWidths=[2.5*inch, 2*inch, 1.5*inch])
+        results_table = Table(self.result_rows(final, risk), colWidths=list(RESULTS_TABLE_LAYOUT['col_widths']))
         results_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2ECC71')),
+            ('BACKGROUND', (0, 0), (-1, 0), RESULTS_TABLE_LAYOUT['header_color']),
             ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
             ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
             ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('FONTSIZE', (0, 0), (-1, 0), TABLE_HEADER_FONT_SIZE),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), TABLE_HEADER_BOTTOM_PADDING),
+            ('BACKGROUND', (0, 1), (-1, -1), RESULTS_TABLE_LAYOUT['body_color']),
+            ('GRID', (0, 0), (-1, -1), TABLE_GRID_WIDTH, TABLE_GRID_COLOR),
             ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), TABLE_BODY_FONT_SIZE),
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('LEFTPADDING', (0, 0), (-1, -1), TABLE_LEFT_PADDING),
         ]))
         
         elements.append(results_table)
@@ -176,29 +243,51 @@ class PDFReportGenerator:
         # AI Explanation Section
         elements.append(Paragraph("AI Analysis & Insights", self.styles['SectionHeader']))
         
-        # Clean up explanation text for PDF
-        clean_explanation = explanation_text.replace('**', '<b>').replace('**', '</b>')
-        clean_explanation = clean_explanation.replace('\n\n', '<br/><br/>')
-        
-        explanation_para = Paragraph(clean_explanation, self.styles['CustomBody'])
-        elements.append(explanation_para)
+        # One paragraph per block: a single paragraph spanning many pages is
+        # re-split on every page break, which grows quadratically with length.
+        # Markdown bold pairs become <b>...</b> within each block, so a tag
+        # never opens in one paragraph and closes in the next
+        for block in explanation_text.split('\n\n'):
+            if block.strip():
+                clean_block = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', block)
+                elements.append(Paragraph(clean_block, self.styles['CustomBody']))
         elements.append(Spacer(1, 0.3*inch))
         
         # Footer note
-        footer_text = "<i>This report was generated by PolicySim, an AI-powered gender policy impact simulator. " \
-                     "Results are based on statistical models and should be used as guidance alongside expert consultation.</i>"
+        footer_text = f"<i>{REPORT_FOOTER}</i>"
         footer = Paragraph(footer_text, self.styles['CustomBody'])
         elements.append(Spacer(1, 0.2*inch))
         elements.append(footer)
         
         # Build PDF
-        doc.build(elements)
-        
-        # Get PDF data
-        pdf_data = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_data
+        with trace_stage("pdf_build"):
+            doc.build(elements)
+    
+    def policy_rows(self, policy):
+        """Rows of the policy configuration table, header first"""
+        return [
+            ['Parameter', 'Value'],
+            ['Policy Type', policy['type_name']],
+            ['Policy Strength', f"{policy['percentage']}%"],
+            ['Duration', f"{policy['duration']} years"],
+            ['Total Budget', f"${policy['budget']:,.0f}"],
+            ['Description', policy['description']]
+        ]
+    
+    def result_rows(self, final, risk):
+        """Rows of the key results table, header first"""
+        return [
+            ['Metric', 'Value', 'Impact'],
+            ['Pay Gap Reduction', f"{final['pay_gap_reduction']:.1f}%", 
+             self._get_impact_label(final['pay_gap_reduction'], 'pay_gap')],
+            ['Final Pay Gap', f"{final['final_pay_gap']:.1f}%", ''],
+            ['Employment Ratio Increase', f"{final['employment_improvement']:.1f}%",
+             self._get_impact_label(final['employment_improvement'], 'employment')],
+            ['Female Leadership', f"{final['final_leadership']['female']:.1f}%", ''],
+            ['Total Budget Spent', f"${final['total_budget_spent']:,.0f}", ''],
+            ['Risk Level', f"{risk['level'].upper()} ({risk['score']:.0f}/100)",
+             self._get_risk_color(risk['level'])]
+        ]
     
     def _get_impact_label(self, value, metric_type):
         """Get impact label based on value"""
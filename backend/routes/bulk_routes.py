@@ -0,0 +1,84 @@
+"""
+Routes for bulk scenario uploads
+"""
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from werkzeug.wsgi import get_input_stream
+from services.scenario_batch import (
+    read_scenario_header,
+    iter_scenarios,
+    iter_chunks,
+    run_scenario_chunk,
+    format_csv_chunk,
+    format_columnar_chunk
+)
+import csv
+import io
+
+bulk_bp = Blueprint('bulk', __name__)
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+
+
+@bulk_bp.route('/api/bulk-simulate', methods=['POST'])
+def bulk_simulate():
+    """
+    Run every scenario in an uploaded CSV and stream results back
+    
+    The request body is the raw CSV (Content-Type: text/csv) with columns
+    policy_type, percentage, duration, budget and optional policy_name.
+    Rows are parsed as the body arrives and results are streamed per chunk,
+    so neither the upload nor the results are held in memory in full.
+    
+    Query parameters:
+        format: "csv" (default) or "columnar" (one JSON object of columns per chunk)
+        chunk_size: Rows simulated per chunk (default 500)
+    """
+    output_format = request.args.get('format', 'csv')
+    if output_format not in ('csv', 'columnar'):
+        return jsonify({
+            'error': 'format must be "csv" or "columnar"'
+        }), 400
+    
+    try:
+        chunk_size = int(request.args.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        chunk_size = 0
+    if chunk_size < 1 or chunk_size > MAX_CHUNK_SIZE:
+        return jsonify({
+            'error': f'chunk_size must be between 1 and {MAX_CHUNK_SIZE}'
+        }), 400
+    
+    # Bulk jobs are streamed, so the app-wide MAX_CONTENT_LENGTH cap does not
+    # apply; the stream is still bounded by the request's Content-Length
+    body_stream = get_input_stream(request.environ, max_content_length=None)
+    text_stream = io.TextIOWrapper(body_stream, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text_stream)
+    
+    column_index, error = read_scenario_header(reader)
+    if error:
+        return jsonify({
+            'error': error
+        }), 400
+    
+    def generate():
+        scenarios = iter_scenarios(reader, column_index)
+        for number, chunk in enumerate(iter_chunks(scenarios, chunk_size)):
+            records = run_scenario_chunk(chunk)
+            if output_format == 'csv':
+                yield format_csv_chunk(records, include_header=(number == 0))
+            else:
+                yield format_columnar_chunk(records)
+    
+    if output_format == 'csv':
+        mimetype = 'text/csv'
+        filename = 'PolicySim_Bulk_Results.csv'
+    else:
+        mimetype = 'application/x-ndjson'
+        filename = 'PolicySim_Bulk_Results.ndjson'
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
@@ -1,11 +1,15 @@
 """
 Routes for policy comparison operations
 """
+import io
 from flask import Blueprint, request, jsonify, send_file
 from services.simulation_engine import simulation_engine
 from services.ai_explainer import explain_comparison
-from reports.pdf_generator import pdf_generator
-import io
+from services.single_flight import single_flight, fork_file
+from services.result_cache import result_cache, MAX_VALUE_BYTES
+from services.comparison_encoding import encode_comparison, ENCODINGS, ENCODING_FULL, ENCODING_DELTA
+from services.paired_uncertainty import compare_under_uncertainty, parse_options, MAX_INLINE_SAMPLES
+from reports.pdf_generator import pdf_generator, REPORT_MODES, REPORT_MODE_FULL
 
 comparison_bp = Blueprint('comparison', __name__)
 
@@ -30,31 +34,83 @@ def compare_policies():
             "duration": 7,
             "budget": 1500000,
             "policy_name": "Policy B"
-        }
+        },
+        "encoding": "delta",          (optional, "full" by default)
+        "baseline_id": "...",         (optional, with "delta")
+        "uncertainty": {"samples": 1024, "seed": 42}  (optional, {} for defaults)
     }
+    
+    With "delta" encoding, data holds policy_a in full as the baseline and
+    policy_b as its differences (see services.comparison_encoding). A client
+    that already holds the baseline sends its baseline_id and receives
+    "baseline": null when it still matches.
+    
+    With "uncertainty", the response also holds the probability that policy
+    A beats policy B on each metric under uncertain coefficients, with
+    confidence intervals (see services.paired_uncertainty); runs above
+    MAX_INLINE_SAMPLES go through the paired_uncertainty job.
     """
     try:
         data = request.get_json()
         
         policy_a = data.get('policy_a')
         policy_b = data.get('policy_b')
+        encoding = data.get('encoding', ENCODING_FULL)
         
         if not policy_a or not policy_b:
             return jsonify({
                 'error': 'Both policy_a and policy_b are required'
             }), 400
         
-        # Run comparison
-        comparison_results = simulation_engine.compare_policies(policy_a, policy_b)
+        if encoding not in ENCODINGS:
+            return jsonify({
+                'error': f"Invalid encoding: {encoding}. Must be one of {', '.join(ENCODINGS)}"
+            }), 400
         
-        # Generate explanation
-        explanation = explain_comparison(comparison_results)
+        uncertainty_options = data.get('uncertainty')
+        if uncertainty_options is not None:
+            if not isinstance(uncertainty_options, dict):
+                return jsonify({
+                    'error': 'uncertainty must be an object of sampling options'
+                }), 400
+            uncertainty_options = parse_options(uncertainty_options)
+            if uncertainty_options.get('samples', 0) > MAX_INLINE_SAMPLES:
+                return jsonify({
+                    'error': f'uncertainty samples above {MAX_INLINE_SAMPLES} must be submitted as a paired_uncertainty job'
+                }), 400
         
-        return jsonify({
-            'success': True,
-            'data': comparison_results,
-            'explanation': explanation
-        }), 200
+        # Serve from the shared result cache; identical concurrent misses
+        # run comparison and explanation once
+        key = result_cache.key('compare', [policy_a, policy_b])
+        comparison_results, explanation = result_cache.get_or_compute(
+            key,
+            lambda: single_flight.do(key, lambda: _compare_and_explain(policy_a, policy_b))
+        )
+        
+        if encoding == ENCODING_DELTA:
+            response = {
+                'success': True,
+                'encoding': ENCODING_DELTA,
+                'data': encode_comparison(comparison_results, known_baseline=data.get('baseline_id')),
+                'explanation': explanation
+            }
+        else:
+            response = {
+                'success': True,
+                'data': comparison_results,
+                'explanation': explanation
+            }
+        
+        if uncertainty_options is not None:
+            key = result_cache.key('compare_uncertainty', [policy_a, policy_b, uncertainty_options])
+            response['uncertainty'] = result_cache.get_or_compute(
+                key,
+                lambda: single_flight.do(key, lambda: compare_under_uncertainty(
+                    policy_a, policy_b, **uncertainty_options
+                ))
+            )
+        
+        return jsonify(response), 200
         
     except ValueError as e:
         return jsonify({
@@ -66,6 +122,21 @@ def compare_policies():
         }), 500
 
 
+def _compare_and_explain(policy_a, policy_b):
+    """Compare two policies and explain the comparison"""
+    comparison_results = simulation_engine.compare_policies(policy_a, policy_b)
+    return comparison_results, explain_comparison(comparison_results)
+
+
+def _open_and_cache_report(key, simulation_results, explanation, mode):
+    """Generate a report for streaming and store it in the result cache if it is small enough"""
+    pdf_file, pdf_size = pdf_generator.open_simulation_report(simulation_results, explanation, mode)
+    if pdf_size <= MAX_VALUE_BYTES:
+        result_cache.put(key, pdf_file.read())
+        pdf_file.seek(0)
+    return pdf_file, pdf_size
+
+
 @comparison_bp.route('/api/download-report', methods=['POST'])
 def download_report():
     """
@@ -74,40 +145,57 @@ def download_report():
     Expected JSON body:
     {
         "simulation_results": { ... },
-        "explanation": "..."
+        "explanation": "...",
+        "mode": "fast"        (optional, "full" by default)
     }
+    
+    The fast mode draws the same layout directly on the canvas and falls
+    back to the full renderer for content it cannot lay out.
     """
     try:
         data = request.get_json()
         
         simulation_results = data.get('simulation_results')
         explanation = data.get('explanation', '')
+        mode = data.get('mode', REPORT_MODE_FULL)
         
         if not simulation_results:
             return jsonify({
                 'error': 'Missing simulation_results'
             }), 400
         
-        # Generate PDF
-        pdf_bytes = pdf_generator.generate_simulation_report(
-            simulation_results,
-            explanation
-        )
-        
-        # Create file-like object
-        pdf_buffer = io.BytesIO(pdf_bytes)
-        pdf_buffer.seek(0)
+        if mode not in REPORT_MODES:
+            return jsonify({
+                'error': f"Invalid report mode: {mode}. Must be one of {', '.join(REPORT_MODES)}"
+            }), 400
         
         # Generate filename
         policy_name = simulation_results['policy']['name'].replace(' ', '_')
         filename = f"PolicySim_{policy_name}_Report.pdf"
         
-        return send_file(
-            pdf_buffer,
+        # Reports already in the shared result cache are served from memory
+        key = result_cache.key('report', [simulation_results, explanation, mode])
+        cached = result_cache.get(key)
+        if cached is not None:
+            pdf_file, pdf_size = io.BytesIO(cached), len(cached)
+        else:
+            # Generate PDF into a spooled file; the response streams it in
+            # blocks and closes it when the download finishes. Identical
+            # concurrent requests each stream their own reader of one report
+            pdf_file, pdf_size = single_flight.do(
+                key,
+                lambda: _open_and_cache_report(key, simulation_results, explanation, mode),
+                fork=fork_file
+            )
+        
+        response = send_file(
+            pdf_file,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=filename
         )
+        response.content_length = pdf_size
+        return response
         
     except Exception as e:
         return jsonify({
@@ -0,0 +1,164 @@
+"""
+Routes for the authenticated debug surface: on-demand profiling and slow request captures
+"""
+import hmac
+import os
+from functools import wraps
+from flask import Blueprint, request, jsonify, Response
+from services.profiler import sampling_profiler, request_tracer, DEFAULT_SAMPLE_INTERVAL
+
+debug_bp = Blueprint('debug', __name__)
+
+
+def require_debug_token(view):
+    """
+    Allow the view only with the token in POLICYSIM_DEBUG_TOKEN
+    
+    The token is sent as "Authorization: Bearer <token>" or X-Debug-Token.
+    Without the environment variable the debug surface does not exist.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = os.environ.get('POLICYSIM_DEBUG_TOKEN')
+        if not expected:
+            return jsonify({
+                'error': 'Endpoint not found',
+                'status': 404
+            }), 404
+        
+        supplied = request.headers.get('X-Debug-Token', '')
+        authorization = request.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            supplied = authorization[len('Bearer '):]
+        if not hmac.compare_digest(supplied.encode(), expected.encode()):
+            return jsonify({
+                'error': 'Invalid or missing debug token'
+            }), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@debug_bp.route('/api/debug/profile', methods=['POST'])
+@require_debug_token
+def start_profile():
+    """
+    Start sampling the next N requests or the next T seconds
+    
+    Expected JSON body (all optional):
+    {
+        "requests": 50,
+        "seconds": 30,
+        "interval_ms": 5
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        requests = data.get('requests')
+        seconds = data.get('seconds')
+        
+        status = sampling_profiler.start(
+            requests=int(requests) if requests is not None else None,
+            seconds=float(seconds) if seconds is not None else None,
+            interval=float(data.get('interval_ms', DEFAULT_SAMPLE_INTERVAL * 1000)) / 1000
+        )
+        
+        return jsonify({
+            'success': True,
+            'profile': status
+        }), 200
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+
+
+@debug_bp.route('/api/debug/profile', methods=['GET'])
+@require_debug_token
+def get_profile():
+    """
+    Get the session status and its aggregated stacks
+    
+    With ?format=collapsed the stacks are returned as plain text, one
+    "frame;frame;frame count" line per stack, ready for flamegraph.pl or
+    speedscope.
+    """
+    if request.args.get('format') == 'collapsed':
+        return Response(sampling_profiler.collapsed() + '\n', mimetype='text/plain')
+    
+    collapsed = sampling_profiler.collapsed()
+    return jsonify({
+        'success': True,
+        'profile': sampling_profiler.status(),
+        'stacks': collapsed.split('\n') if collapsed else []
+    }), 200
+
+
+@debug_bp.route('/api/debug/profile', methods=['DELETE'])
+@require_debug_token
+def stop_profile():
+    """
+    Stop the running profiling session early, keeping its samples
+    """
+    return jsonify({
+        'success': True,
+        'profile': sampling_profiler.stop()
+    }), 200
+
+
+@debug_bp.route('/api/debug/slow-requests', methods=['GET'])
+@require_debug_token
+def get_slow_requests():
+    """
+    List captured slow requests, newest first, with stage timings and payload sizes
+    
+    Query parameters: limit (optional)
+    """
+    try:
+        limit = request.args.get('limit', type=int)
+        return jsonify({
+            'success': True,
+            'stats': request_tracer.stats(),
+            'captures': request_tracer.captures(limit)
+        }), 200
+    
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+
+
+@debug_bp.route('/api/debug/slow-requests', methods=['PUT'])
+@require_debug_token
+def configure_slow_requests():
+    """
+    Change the slow request threshold or ring buffer size
+    
+    Expected JSON body (all optional):
+    {
+        "threshold_ms": 500,
+        "capacity": 200,
+        "clear": false
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        threshold_ms = data.get('threshold_ms')
+        capacity = data.get('capacity')
+        
+        if data.get('clear'):
+            request_tracer.clear()
+        stats = request_tracer.configure(
+            threshold_ms=float(threshold_ms) if threshold_ms is not None else None,
+            capacity=int(capacity) if capacity is not None else None
+        )
+        
+        return jsonify({
+            'success': True,
+            'stats': stats
+        }), 200
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
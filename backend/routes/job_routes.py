@@ -0,0 +1,134 @@
+"""
+Routes for background simulation jobs
+"""
+from flask import Blueprint, request, jsonify
+from services.job_scheduler import job_scheduler
+
+job_bp = Blueprint('jobs', __name__)
+
+
+def _client_id():
+    """Identify the submitting client for fairness and pending-job limits"""
+    return request.headers.get('X-Client-Id') or request.remote_addr or 'anonymous'
+
+
+@job_bp.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Submit a long-running job
+    
+    Expected JSON body:
+    {
+        "kind": "sweep",  (batch, sweep, grid_sweep, monte_carlo or paired_uncertainty)
+        "priority": "normal",  (high, normal or low)
+        "params": { ... }
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        kind = data.get('kind')
+        params = data.get('params')
+        
+        if not kind or not isinstance(params, dict):
+            return jsonify({
+                'error': 'Missing required fields',
+                'required': ['kind', 'params']
+            }), 400
+        
+        job = job_scheduler.submit(
+            kind,
+            params,
+            client_id=_client_id(),
+            priority=data.get('priority', 'normal')
+        )
+        
+        return jsonify({
+            'success': True,
+            'job': job.to_dict()
+        }), 202
+        
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except OverflowError as e:
+        return jsonify({
+            'error': str(e)
+        }), 429
+    except Exception as e:
+        return jsonify({
+            'error': f'Job submission failed: {str(e)}'
+        }), 500
+
+
+@job_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Poll job status and progress
+    """
+    job = job_scheduler.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            'error': f'Unknown or expired job: {job_id}'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    }), 200
+
+
+@job_bp.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Retrieve the result of a completed job
+    """
+    job = job_scheduler.get(job_id)
+    
+    if job is None:
+        return jsonify({
+            'error': f'Unknown or expired job: {job_id}'
+        }), 404
+    
+    if job.status != 'completed':
+        return jsonify({
+            'error': f'Job is {job.status}',
+            'job': job.to_dict()
+        }), 409
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict(),
+        'result': job.result
+    }), 200
+
+
+@job_bp.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """
+    Cancel a queued or running job
+    """
+    job = job_scheduler.cancel(job_id)
+    
+    if job is None:
+        return jsonify({
+            'error': f'Unknown or expired job: {job_id}'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    }), 200
+
+
+@job_bp.route('/api/jobs/stats', methods=['GET'])
+def job_stats():
+    """
+    Worker pool and queue statistics
+    """
+    return jsonify({
+        'success': True,
+        'stats': job_scheduler.stats()
+    }), 200
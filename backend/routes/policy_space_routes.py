@@ -0,0 +1,75 @@
+"""
+Routes for querying the precomputed policy space index
+"""
+from flask import Blueprint, request, jsonify
+from services.policy_index import policy_space_index, DEFAULT_LIMIT
+
+policy_space_bp = Blueprint('policy_space', __name__)
+
+
+@policy_space_bp.route('/api/policy-space/query', methods=['POST'])
+def query_policy_space():
+    """
+    Find configurations by their outcomes
+
+    Expected JSON body:
+    {
+        "where": {
+            "risk_score": {"lt": 30},
+            "pay_gap_reduction": {"gt": 10},
+            "duration": {"lte": 5}
+        },
+        "policy_types": ["equal_pay", "parental_leave"],   (optional)
+        "order_by": "total_budget_spent",                  (optional)
+        "descending": false,                               (optional)
+        "limit": 20,                                       (optional, default 50)
+        "offset": 0,                                       (optional)
+        "columns": ["policy_type", "percentage", ...]       (optional)
+    }
+
+    Operators are lt, lte, gt, gte, eq, ne and in. Sorting descending with a
+    limit returns the top k by that column.
+    """
+    try:
+        data = request.get_json() or {}
+
+        results = policy_space_index.query(
+            where=data.get('where'),
+            policy_types=data.get('policy_types'),
+            order_by=data.get('order_by'),
+            descending=bool(data.get('descending', False)),
+            limit=data.get('limit', DEFAULT_LIMIT),
+            offset=data.get('offset', 0),
+            columns=data.get('columns')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': results
+        }), 200
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Policy space query failed: {str(e)}'
+        }), 500
+
+
+@policy_space_bp.route('/api/policy-space', methods=['GET'])
+def get_policy_space():
+    """
+    Describe the index: model version, row count, grid and queryable columns
+    """
+    try:
+        return jsonify({
+            'success': True,
+            'data': policy_space_index.stats()
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'error': f'Policy space index unavailable: {str(e)}'
+        }), 500
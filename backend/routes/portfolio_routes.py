@@ -0,0 +1,111 @@
+"""
+Routes for combined policy portfolios
+"""
+from flask import Blueprint, request, jsonify
+from services.simulation_engine import simulation_engine
+from services.portfolio_optimizer import portfolio_optimizer
+
+portfolio_bp = Blueprint('portfolio', __name__)
+
+
+@portfolio_bp.route('/api/portfolio/simulate', methods=['POST'])
+def simulate_portfolio():
+    """
+    Simulate several policies running concurrently
+    
+    Expected JSON body:
+    {
+        "policies": [
+            {"policy_type": "equal_pay", "percentage": 75, "budget": 2000000},
+            {"policy_type": "parental_leave", "percentage": 60, "budget": 3000000}
+        ],
+        "duration": 5,
+        "interactions": {"equal_pay+parental_leave": 0.1},
+        "portfolio_name": "Combined Program"
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        policies = data.get('policies')
+        duration = data.get('duration')
+        
+        if not policies or not duration:
+            return jsonify({
+                'error': 'Missing required fields',
+                'required': ['policies', 'duration']
+            }), 400
+        
+        results = simulation_engine.run_portfolio_simulation(
+            policies=policies,
+            duration=int(duration),
+            interactions=data.get('interactions'),
+            portfolio_name=data.get('portfolio_name', 'Unnamed Portfolio')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': results
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Portfolio simulation failed: {str(e)}'
+        }), 500
+
+
+@portfolio_bp.route('/api/portfolio/optimize', methods=['POST'])
+def optimize_portfolio():
+    """
+    Find the budget and strength allocation with the largest pay gap reduction
+    
+    Expected JSON body:
+    {
+        "total_budget": 6000000,
+        "duration": 5,
+        "risk_ceiling": 60,
+        "policy_types": ["equal_pay", "leadership_quota", "parental_leave"],
+        "percentage_step": 5,
+        "budget_step": 50000,
+        "interactions": {"equal_pay+parental_leave": 0.1}
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        total_budget = data.get('total_budget')
+        duration = data.get('duration')
+        
+        if total_budget is None or not duration:
+            return jsonify({
+                'error': 'Missing required fields',
+                'required': ['total_budget', 'duration']
+            }), 400
+        
+        results = portfolio_optimizer.optimize(
+            total_budget=float(total_budget),
+            duration=int(duration),
+            risk_ceiling=float(data.get('risk_ceiling', 60)),
+            policy_types=data.get('policy_types'),
+            percentage_step=float(data.get('percentage_step', 5)),
+            budget_step=float(data.get('budget_step', 50000)),
+            interactions=data.get('interactions')
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': results
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Portfolio optimization failed: {str(e)}'
+        }), 500
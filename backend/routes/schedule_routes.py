@@ -0,0 +1,123 @@
+"""
+Routes for per-year budget and strength schedules
+"""
+from flask import Blueprint, request, jsonify
+from services.simulation_engine import simulation_engine
+from services.schedule_optimizer import schedule_optimizer
+
+schedule_bp = Blueprint('schedule', __name__)
+
+
+@schedule_bp.route('/api/schedule/simulate', methods=['POST'])
+def simulate_schedule():
+    """
+    Simulate a policy whose strength and budget change year by year
+
+    Expected JSON body:
+    {
+        "policy_type": "equal_pay",
+        "percentages": [60, 70, 80, 80, 80],
+        "budgets": [300000, 400000, 500000, 500000, 400000],
+        "policy_name": "Phased Equal Pay"
+    }
+
+    Year y runs at percentages[y-1] (0 pauses the policy) with budgets[y-1].
+    """
+    try:
+        data = request.get_json()
+
+        policy_type = data.get('policy_type')
+        percentages = data.get('percentages')
+        budgets = data.get('budgets')
+
+        if not policy_type or not percentages or budgets is None:
+            return jsonify({
+                'error': 'Missing required fields',
+                'required': ['policy_type', 'percentages', 'budgets']
+            }), 400
+
+        results = simulation_engine.run_schedule_simulation(
+            policy_type=policy_type,
+            percentages=percentages,
+            budgets=budgets,
+            policy_name=data.get('policy_name', 'Unnamed Policy')
+        )
+
+        return jsonify({
+            'success': True,
+            'data': results,
+            'schedule': {
+                'percentages': [float(p) for p in percentages],
+                'budgets': [float(b) for b in budgets]
+            }
+        }), 200
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Schedule simulation failed: {str(e)}'
+        }), 500
+
+
+@schedule_bp.route('/api/schedule/optimize', methods=['POST'])
+def optimize_schedule():
+    """
+    Find the year-by-year schedule with the largest final pay gap reduction
+
+    Expected JSON body:
+    {
+        "policy_type": "equal_pay",
+        "total_budget": 3000000,
+        "duration": 10,
+        "risk_ceiling": 60,
+        "percentage_step": 5,
+        "budget_step": 10000,
+        "max_strength_change": 10,     (optional)
+        "max_yearly_budget": 600000,   (optional)
+        "allow_pause": true            (optional)
+    }
+    """
+    try:
+        data = request.get_json()
+
+        policy_type = data.get('policy_type')
+        total_budget = data.get('total_budget')
+        duration = data.get('duration')
+
+        if not policy_type or total_budget is None or not duration:
+            return jsonify({
+                'error': 'Missing required fields',
+                'required': ['policy_type', 'total_budget', 'duration']
+            }), 400
+
+        max_strength_change = data.get('max_strength_change')
+        max_yearly_budget = data.get('max_yearly_budget')
+
+        results = schedule_optimizer.optimize(
+            policy_type=policy_type,
+            total_budget=float(total_budget),
+            duration=int(duration),
+            risk_ceiling=float(data.get('risk_ceiling', 60)),
+            percentage_step=float(data.get('percentage_step', 5)),
+            budget_step=float(data.get('budget_step', 10000)),
+            max_strength_change=float(max_strength_change) if max_strength_change is not None else None,
+            max_yearly_budget=float(max_yearly_budget) if max_yearly_budget is not None else None,
+            allow_pause=bool(data.get('allow_pause', True))
+        )
+
+        return jsonify({
+            'success': True,
+            'data': results
+        }), 200
+
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Schedule optimization failed: {str(e)}'
+        }), 500
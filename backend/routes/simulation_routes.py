@@ -1,9 +1,18 @@
 """
 Routes for policy simulation operations
 """
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from services.simulation_engine import simulation_engine
 from services.ai_explainer import explain_simulation_results, get_policy_insights
+from services.policy_models import validate_policy_parameters
+from services.single_flight import single_flight
+from services.result_cache import result_cache
+from services.cache_warmer import cache_warmer
+from services.incremental import evaluate_changes, SIMULATION_INPUTS
+from services.preview_service import preview_service, SPARKLINE_POINTS, MAX_SPARKLINE_POINTS
+from utilities.sensitivities import calculate_sensitivities_batch
+from utilities.model_registry import get_model
 
 simulation_bp = Blueprint('simulation', __name__)
 
@@ -39,14 +48,22 @@ def run_simulation():
                 'required': ['policy_type', 'percentage', 'duration', 'budget']
             }), 400
         
-        # Run simulation
-        results = simulation_engine.run_simulation(
-            policy_type=policy_type,
-            percentage=float(percentage),
-            duration=int(duration),
-            budget=float(budget),
-            policy_name=policy_name
+        params = {
+            'policy_type': policy_type,
+            'percentage': float(percentage),
+            'duration': int(duration),
+            'budget': float(budget),
+            'policy_name': policy_name
+        }
+        
+        # Serve from the shared result cache; identical concurrent misses share one run
+        key = result_cache.key('simulate', params)
+        results = result_cache.get_or_compute(
+            key,
+            lambda: single_flight.do(key, lambda: simulation_engine.run_simulation(**params))
         )
+        # Popular parameter sets are warmed into the cache after a restart
+        cache_warmer.record(params)
         
         return jsonify({
             'success': True,
@@ -63,6 +80,198 @@ def run_simulation():
         }), 500
 
 
+@simulation_bp.route('/api/simulate/update', methods=['POST'])
+def update_simulation():
+    """
+    Recompute only the fields of a previous simulation that a what-if edit affects
+    
+    Expected JSON body:
+    {
+        "previous": {
+            "policy_type": "equal_pay",
+            "percentage": 75,
+            "duration": 5,
+            "budget": 2000000,
+            "policy_name": "Equal Pay Initiative 2024"
+        },
+        "changes": {"budget": 2500000}
+    }
+    
+    The response carries the changed field paths and a partial result with
+    the same nesting as /api/simulate; the client merges it over the
+    previous result. The timestamp always changes.
+    """
+    try:
+        data = request.get_json()
+        previous = data.get('previous') or {}
+        changes = data.get('changes') or {}
+    
+        previous_params = {'policy_name': 'Unnamed Policy', **_coerce_simulation_params(previous)}
+        if any(name not in previous_params for name in SIMULATION_INPUTS):
+            return jsonify({
+                'error': 'Missing required fields in previous',
+                'required': ['policy_type', 'percentage', 'duration', 'budget']
+            }), 400
+    
+        params, changed, partial = evaluate_changes(previous_params, _coerce_simulation_params(changes))
+        partial['timestamp'] = datetime.now().isoformat()
+    
+        return jsonify({
+            'success': True,
+            'changed': [f'{section}.{field}' if field else section for section, field in changed] + ['timestamp'],
+            'params': params,
+            'data': partial
+        }), 200
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Simulation update failed: {str(e)}'
+        }), 500
+
+
+def _coerce_simulation_params(data):
+    """Convert the simulation parameters present in a request body to their types"""
+    params = {}
+    for name, value in data.items():
+        if name in ('percentage', 'budget'):
+            params[name] = float(value)
+        elif name == 'duration':
+            params[name] = int(value)
+        else:
+            params[name] = value
+    return params
+
+
+@simulation_bp.route('/api/preview', methods=['POST'])
+def preview_simulation():
+    """
+    Preview final metrics and risk while the user drags a slider
+    
+    Expected JSON body:
+    {
+        "policy_type": "equal_pay",
+        "percentage": 75,
+        "duration": 5,
+        "budget": 2000000,
+        "seq": 17,            (optional, increasing per client)
+        "sparkline": true     (optional, or a number of points up to 11)
+    }
+    
+    Requests older than one already seen from the same client (X-Client-Id
+    header, else remote address) come back with "superseded": true and no data.
+    """
+    try:
+        data = request.get_json()
+    
+        seq = data.get('seq')
+        sparkline = data.get('sparkline', False)
+        if sparkline is True:
+            sparkline_points = SPARKLINE_POINTS
+        else:
+            sparkline_points = min(int(sparkline or 0), MAX_SPARKLINE_POINTS)
+    
+        preview = preview_service.preview(
+            client_id=request.headers.get('X-Client-Id') or request.remote_addr or 'anonymous',
+            policy_type=data.get('policy_type'),
+            percentage=float(data.get('percentage')),
+            duration=int(data.get('duration')),
+            budget=float(data.get('budget')),
+            seq=int(seq) if seq is not None else None,
+            sparkline_points=sparkline_points
+        )
+    
+        return jsonify({
+            'success': True,
+            'seq': seq,
+            'superseded': preview is None,
+            'data': preview
+        }), 200
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Preview failed: {str(e)}'
+        }), 500
+
+
+@simulation_bp.route('/api/sensitivities', methods=['POST'])
+def get_sensitivities():
+    """
+    Get exact derivatives of final metrics and risk for one or many configurations
+    
+    Expected JSON body (a single configuration may also be sent at top level):
+    {
+        "configs": [
+            {"policy_type": "equal_pay", "percentage": 75, "duration": 5, "budget": 2000000},
+            ...
+        ]
+    }
+    
+    Results are columnar: every list is aligned with the input configs.
+    """
+    try:
+        data = request.get_json()
+        configs = data.get('configs') or [data]
+        
+        policy_types, percentages, durations, budgets = [], [], [], []
+        for number, config in enumerate(configs):
+            policy_type = config.get('policy_type')
+            percentage = float(config.get('percentage'))
+            duration = int(config.get('duration'))
+            budget = float(config.get('budget'))
+            
+            is_valid, error = validate_policy_parameters(policy_type, percentage, duration, budget)
+            if not is_valid:
+                raise ValueError(f"Config {number}: {error}")
+            
+            policy_types.append(policy_type)
+            percentages.append(percentage)
+            durations.append(duration)
+            budgets.append(budget)
+        
+        sensitivities = calculate_sensitivities_batch(policy_types, percentages, durations, budgets)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'count': len(policy_types),
+                'units': {
+                    'percentage': 'per percentage point',
+                    'budget': 'per dollar',
+                    'duration': 'per year'
+                },
+                'values': {
+                    field: column.tolist()
+                    for field, column in sensitivities['values'].items()
+                },
+                'derivatives': {
+                    field: {parameter: column.tolist() for parameter, column in columns.items()}
+                    for field, columns in sensitivities['derivatives'].items()
+                },
+                'elasticities': {
+                    field: {parameter: column.tolist() for parameter, column in columns.items()}
+                    for field, columns in sensitivities['elasticities'].items()
+                }
+            }
+        }), 200
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'error': f'Sensitivity analysis failed: {str(e)}'
+        }), 500
+
+
 @simulation_bp.route('/api/explain', methods=['POST'])
 def explain_results():
     """
@@ -82,8 +291,11 @@ def explain_results():
                 'error': 'Missing simulation_results'
             }), 400
         
-        # Generate explanation
-        explanation = explain_simulation_results(simulation_results)
+        # Generate explanation (cached by the results it explains)
+        explanation = result_cache.get_or_compute(
+            result_cache.key('explain', simulation_results),
+            lambda: explain_simulation_results(simulation_results)
+        )
         
         return jsonify({
             'success': True,
@@ -117,4 +329,17 @@ def get_insights(policy_type):
     except Exception as e:
         return jsonify({
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
+
+
+@simulation_bp.route('/api/policy-types', methods=['GET'])
+def get_policy_types():
+    """
+    List the policy types registered in the current model
+    """
+    model = get_model()
+    return jsonify({
+        'success': True,
+        'model_version': model.model_version,
+        'policy_types': model.policy_info
+    }), 200
@@ -0,0 +1,245 @@
+"""
+Admission control and load shedding per endpoint class
+Bounds concurrency and queueing per class and rate limits each client
+"""
+import math
+import threading
+import time
+
+# Endpoint classes are matched by path prefix, first match wins.
+# Paths that match no class (health checks, stats) are never throttled.
+ENDPOINT_CLASSES = {
+    "report": {
+        "paths": ["/api/download-report"],
+        "max_concurrency": 2,
+        "max_queue": 4,
+        "queue_timeout": 10.0,
+        "rate": 1.0,  # Requests per second per client
+        "burst": 3
+    },
+    "compute": {
+        "paths": ["/api/compare", "/api/portfolio/optimize", "/api/bulk-simulate", "/api/schedule/optimize"],
+        "max_concurrency": 4,
+        "max_queue": 16,
+        "queue_timeout": 5.0,
+        "rate": 5.0,
+        "burst": 10
+    },
+    "preview": {
+        # Slider drags: many tiny requests per client, useless once stale
+        "paths": ["/api/preview"],
+        "max_concurrency": 16,
+        "max_queue": 32,
+        "queue_timeout": 0.25,
+        "rate": 60.0,
+        "burst": 120
+    },
+    "interactive": {
+        "paths": ["/api/simulate", "/api/explain", "/api/policy-insights", "/api/sensitivities",
+                  "/api/portfolio/simulate", "/api/jobs", "/api/policy-space", "/api/schedule/simulate"],
+        "max_concurrency": 16,
+        "max_queue": 64,
+        "queue_timeout": 2.0,
+        "rate": 20.0,
+        "burst": 40
+    }
+}
+
+MAX_TRACKED_CLIENTS = 10000
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, status, reason, retry_after):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate tokens per second"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """
+        Take one token
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class EndpointClass:
+    """Concurrency limit, bounded wait queue and counters for one class"""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.paths = tuple(config["paths"])
+        self.max_concurrency = config["max_concurrency"]
+        self.max_queue = config["max_queue"]
+        self.queue_timeout = config["queue_timeout"]
+        self.rate = config["rate"]
+        self.burst = config["burst"]
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.buckets = {}
+
+        self.admitted = 0
+        self.max_queue_seen = 0
+        self.shed_rate_limited = 0
+        self.shed_queue_full = 0
+        self.shed_queue_timeout = 0
+        self.service_time_total = 0.0
+        self.completed = 0
+
+    def average_service_time(self):
+        """Mean seconds a request holds a slot (1s before any completes)"""
+        if not self.completed:
+            return 1.0
+        return self.service_time_total / self.completed
+
+    def retry_after(self):
+        """Estimated seconds until a queued slot frees up"""
+        waves = (self.queued + 1) / self.max_concurrency
+        return max(1, math.ceil(waves * self.average_service_time()))
+
+    def stats(self):
+        """Counters for sizing the limits"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_queue_depth_seen": self.max_queue_seen,
+            "admitted": self.admitted,
+            "shed": {
+                "rate_limited": self.shed_rate_limited,
+                "queue_full": self.shed_queue_full,
+                "queue_timeout": self.shed_queue_timeout
+            },
+            "average_service_ms": round(self.average_service_time() * 1000, 2)
+        }
+
+
+class AdmissionController:
+    """
+    Admits, queues or sheds requests before they reach a worker
+
+    Each endpoint class has its own concurrency limit and bounded queue, so
+    a burst of PDF reports can only occupy report slots and never delays
+    interactive simulations. Clients over their token-bucket rate get 429;
+    requests arriving to a full queue, or waiting longer than the class
+    timeout, get 503. Both carry a Retry-After estimate.
+    """
+
+    def __init__(self, classes=None):
+        self.classes = [
+            EndpointClass(name, config)
+            for name, config in (classes or ENDPOINT_CLASSES).items()
+        ]
+
+    def classify(self, path):
+        """Get the endpoint class for a request path, or None"""
+        for endpoint_class in self.classes:
+            if path.startswith(endpoint_class.paths):
+                return endpoint_class
+        return None
+
+    def acquire(self, endpoint_class, client_id):
+        """
+        Admit a request, waiting in the class queue if all slots are busy
+
+        Returns:
+            Admission start time, to pass back to release
+
+        Raises:
+            AdmissionRejected: The request was shed
+        """
+        with endpoint_class.condition:
+            wait = self._take_token(endpoint_class, client_id)
+            if wait:
+                endpoint_class.shed_rate_limited += 1
+                raise AdmissionRejected(429, "Rate limit exceeded", max(1, math.ceil(wait)))
+
+            if endpoint_class.in_flight >= endpoint_class.max_concurrency:
+                if endpoint_class.queued >= endpoint_class.max_queue:
+                    endpoint_class.shed_queue_full += 1
+                    raise AdmissionRejected(
+                        503, "Server busy, queue full", endpoint_class.retry_after()
+                    )
+
+                endpoint_class.queued += 1
+                endpoint_class.max_queue_seen = max(endpoint_class.max_queue_seen, endpoint_class.queued)
+                deadline = time.monotonic() + endpoint_class.queue_timeout
+                try:
+                    while endpoint_class.in_flight >= endpoint_class.max_concurrency:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            endpoint_class.shed_queue_timeout += 1
+                            raise AdmissionRejected(
+                                503, "Server busy, queue wait timed out", endpoint_class.retry_after()
+                            )
+                        endpoint_class.condition.wait(remaining)
+                finally:
+                    endpoint_class.queued -= 1
+
+            endpoint_class.in_flight += 1
+            endpoint_class.admitted += 1
+
+        return time.monotonic()
+
+    def release(self, endpoint_class, started):
+        """Free the slot taken by acquire"""
+        with endpoint_class.condition:
+            endpoint_class.in_flight -= 1
+            endpoint_class.completed += 1
+            endpoint_class.service_time_total += time.monotonic() - started
+            endpoint_class.condition.notify()
+
+    def busy(self):
+        """Whether any admitted request is running or waiting in a queue"""
+        for endpoint_class in self.classes:
+            with endpoint_class.condition:
+                if endpoint_class.in_flight or endpoint_class.queued:
+                    return True
+        return False
+
+    def stats(self):
+        """Per-class queue depth, limits and shed counters"""
+        result = {}
+        for endpoint_class in self.classes:
+            with endpoint_class.condition:
+                result[endpoint_class.name] = endpoint_class.stats()
+        return result
+
+    def _take_token(self, endpoint_class, client_id):
+        """Charge the client's bucket; caller holds the class condition"""
+        buckets = endpoint_class.buckets
+        bucket = buckets.get(client_id)
+        if bucket is None:
+            if len(buckets) >= MAX_TRACKED_CLIENTS:
+                # Forget the oldest half; a forgotten client just starts with a full bucket
+                for stale in list(buckets)[:MAX_TRACKED_CLIENTS // 2]:
+                    del buckets[stale]
+            bucket = buckets[client_id] = TokenBucket(endpoint_class.rate, endpoint_class.burst)
+        return bucket.take()
+
+
+# Create singleton instance
+admission_controller = AdmissionController()
@@ -2,7 +2,10 @@
 AI-powered explanation service for simulation results
 Converts technical data into human-readable insights
 """
+from services.profiler import traced
 
+
+@traced("explain_simulation_results")
 def explain_simulation_results(simulation_results):
     """
     Generate a simple, human-readable explanation of simulation results
@@ -102,6 +105,7 @@ def explain_simulation_results(simulation_results):
     return "".join(explanation_parts)
 
 
+@traced("explain_comparison")
 def explain_comparison(comparison_results):
     """
     Generate explanation for policy comparison
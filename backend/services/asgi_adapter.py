@@ -0,0 +1,306 @@
+"""
+ASGI front end for the Flask application
+Network I/O runs on the event loop; each request's view code runs whole on an executor thread
+"""
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from services.cache_warmer import cache_warmer
+
+DEFAULT_THREADS = 32
+
+# Bodies up to this size are held in memory, larger ones in a temporary file
+MEMORY_BODY_BYTES = 1024 * 1024
+
+# Uploads are absorbed by the event loop before a thread is used; this caps
+# what a single request may park on disk (Flask still applies its own
+# MAX_CONTENT_LENGTH to every route except the streamed bulk upload)
+DEFAULT_MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+
+RECEIVE_CHUNK_BYTES = 64 * 1024
+
+# Chunks of a streamed response that may wait for a slow client before the
+# producing thread blocks
+STREAM_QUEUE_CHUNKS = 4
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+class _Body:
+    """Request or response body kept in memory, spilled to a temporary file when large"""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.file = None
+
+    def write(self, chunk):
+        """Append a chunk (blocking file I/O once spilled)"""
+        self.size += len(chunk)
+        if self.file is None and self.size > MEMORY_BODY_BYTES:
+            self.file = tempfile.TemporaryFile()
+            self.file.writelines(self.chunks)
+            self.chunks = []
+        if self.file is not None:
+            self.file.write(chunk)
+        else:
+            self.chunks.append(chunk)
+
+    def stream(self):
+        """Readable binary stream over the whole body"""
+        if self.file is None:
+            return io.BytesIO(b"".join(self.chunks))
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class ASGIAdapter:
+    """
+    ASGI application serving a WSGI application from a thread pool
+
+    The event loop reads each request body in full before the request gets
+    a thread, and responses with a Content-Length are collected on the
+    thread and written out by the loop after the view, its teardown and
+    the admission slot are finished. A slow upload or download therefore
+    holds a socket, not a worker. Responses without a Content-Length
+    (the streamed bulk results) stay on their thread and hand chunks to
+    the loop through a short queue, so generation keeps pace with the
+    client. Each request runs on a single thread from before_request to
+    teardown, as the thread-local request tracing expects.
+    """
+
+    def __init__(self, wsgi_app, threads=None, max_upload_bytes=None):
+        self.wsgi_app = wsgi_app
+        self.threads = threads or _env_int("POLICYSIM_ASGI_THREADS", DEFAULT_THREADS)
+        self.max_upload_bytes = max_upload_bytes or _env_int("POLICYSIM_ASGI_MAX_UPLOAD_BYTES",
+                                                             DEFAULT_MAX_UPLOAD_BYTES)
+        self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi-worker")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                # Precompute presets and popular scenarios in the background while idle
+                cache_warmer.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False, cancel_futures=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+        declared = _header(scope, b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > self.max_upload_bytes:
+            await _send_error(send, 413, "Request body too large")
+            return
+
+        body = _Body()
+        try:
+            # Read the upload at the client's pace without holding a thread
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                chunk = message.get("body", b"")
+                more_body = message.get("more_body", False)
+                if body.size + len(chunk) > self.max_upload_bytes:
+                    await _send_error(send, 413, "Request body too large")
+                    return
+                if chunk:
+                    if body.file is None and body.size + len(chunk) <= MEMORY_BODY_BYTES:
+                        body.write(chunk)
+                    else:
+                        await loop.run_in_executor(None, body.write, chunk)
+
+            environ = _environ(scope, body)
+            queue = asyncio.Queue(maxsize=STREAM_QUEUE_CHUNKS)
+            cancelled = threading.Event()
+            worker = loop.run_in_executor(self.executor, self._run, environ, loop, queue, cancelled)
+            try:
+                await self._respond(queue, worker, send, loop)
+            finally:
+                cancelled.set()
+                await _drain(queue, worker)
+        finally:
+            body.close()
+
+    def _run(self, environ, loop, queue, cancelled):
+        """Run the WSGI application on an executor thread, reporting to the loop through queue"""
+
+        def put(item):
+            if cancelled.is_set():
+                raise ConnectionAbortedError("Client went away")
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started.get("sent"):
+                raise exc_info[1].with_traceback(exc_info[2])
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+            return lambda data: None
+
+        try:
+            iterable = self.wsgi_app(environ, start_response)
+            try:
+                buffered = None
+                for chunk in iterable:
+                    if buffered is None:
+                        # Headers are final once the first chunk is produced
+                        if any(name.lower() == "content-length" for name, _ in started["headers"]):
+                            buffered = _Body()
+                        else:
+                            buffered = False
+                            started["sent"] = True
+                            put(("start", started["status"], started["headers"]))
+                    if not chunk:
+                        continue
+                    if buffered is False:
+                        put(("body", chunk))
+                    else:
+                        buffered.write(chunk)
+            finally:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+
+            if buffered is False:
+                put(("end",))
+            else:
+                put(("start", started["status"], started["headers"]))
+                put(("buffered", buffered if buffered is not None else _Body()))
+        except ConnectionAbortedError:
+            pass
+        except Exception as e:
+            if not cancelled.is_set():
+                put(("error", e, started.get("sent", False)))
+
+    async def _respond(self, queue, worker, send, loop):
+        while True:
+            item = await queue.get()
+            kind = item[0]
+            if kind == "start":
+                _, status, headers = item
+                await send({
+                    "type": "http.response.start",
+                    "status": status,
+                    "headers": [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                                for name, value in headers]
+                })
+            elif kind == "body":
+                await send({"type": "http.response.body", "body": item[1], "more_body": True})
+            elif kind == "end":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            elif kind == "buffered":
+                buffered = item[1]
+                try:
+                    await _send_buffered(buffered, send, loop)
+                finally:
+                    buffered.close()
+                return
+            elif kind == "error":
+                _, error, headers_sent = item
+                if headers_sent:
+                    raise error
+                print(f"Unhandled error serving request: {error!r}", file=sys.stderr)
+                await _send_error(send, 500, "Internal server error")
+                return
+
+
+async def _send_buffered(buffered, send, loop):
+    """Write a collected response body out at the client's pace"""
+    if buffered.file is None:
+        await send({"type": "http.response.body", "body": b"".join(buffered.chunks), "more_body": False})
+        return
+    stream = buffered.stream()
+    while True:
+        chunk = await loop.run_in_executor(None, stream.read, RECEIVE_CHUNK_BYTES)
+        await send({"type": "http.response.body", "body": chunk, "more_body": bool(chunk)})
+        if not chunk:
+            return
+
+
+async def _drain(queue, worker):
+    """Discard queued chunks until the worker thread has finished"""
+    while not worker.done():
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.wait({getter, worker}, return_when=asyncio.FIRST_COMPLETED)
+        getter.cancel()
+    # Retrieve the result so a failure is not reported as never retrieved
+    worker.exception()
+
+
+async def _send_error(send, status, message):
+    body = f'{{"error": "{message}", "status": {status}}}'.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    })
+    await send({"type": "http.response.body", "body": body, "more_body": False})
+
+
+def _header(scope, name):
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope whose body has been read in full"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        # The body is complete, so its length is known even for chunked uploads
+        "CONTENT_LENGTH": str(body.size),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body.stream(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name in ("CONTENT_LENGTH", "TRANSFER_ENCODING"):
+            # Replaced by the length of the body as read
+            continue
+        if name != "CONTENT_TYPE":
+            name = "HTTP_" + name
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
@@ -0,0 +1,318 @@
+"""
+Minimal asyncio HTTP/1.1 server for ASGI applications
+Used by asgi.py when no ASGI server (uvicorn, hypercorn) is installed
+"""
+import asyncio
+import signal
+import sys
+from http import HTTPStatus
+from urllib.parse import unquote
+
+MAX_HEADER_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+
+# Idle keep-alive connections and stalled request heads are closed after this
+KEEP_ALIVE_TIMEOUT = 75.0
+
+
+class _BadRequest(Exception):
+    """The request head could not be parsed"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ASGIServer:
+    """
+    Serves an ASGI application over plain HTTP/1.1 with keep-alive
+
+    Request bodies with a Content-Length or chunked encoding are passed to
+    the application as they arrive, and every response write waits for the
+    socket to drain, so slow clients cost a coroutine and their buffers
+    rather than a thread.
+    """
+
+    def __init__(self, app, host="127.0.0.1", port=5000):
+        self.app = app
+        self.host = host
+        self.port = port
+
+    async def serve(self):
+        """Run lifespan startup, accept connections until cancelled, then run lifespan shutdown"""
+        queue = asyncio.Queue()
+        done = {"lifespan.startup.complete": asyncio.Event(), "lifespan.shutdown.complete": asyncio.Event()}
+        lifespan = asyncio.ensure_future(self._lifespan(queue, done))
+        await queue.put({"type": "lifespan.startup"})
+        await asyncio.wait({lifespan, asyncio.ensure_future(done["lifespan.startup.complete"].wait())},
+                           return_when=asyncio.FIRST_COMPLETED)
+
+        server = await asyncio.start_server(self._connection, self.host, self.port, limit=MAX_HEADER_BYTES)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            if not lifespan.done():
+                await queue.put({"type": "lifespan.shutdown"})
+                await asyncio.wait({lifespan, asyncio.ensure_future(done["lifespan.shutdown.complete"].wait())},
+                                   return_when=asyncio.FIRST_COMPLETED)
+
+    async def _lifespan(self, queue, done):
+        async def send(message):
+            if message["type"] in done:
+                done[message["type"]].set()
+
+        try:
+            await self.app({"type": "lifespan", "asgi": {"version": "3.0"}}, queue.get, send)
+        except Exception:
+            # Applications without lifespan support may raise; that is allowed
+            pass
+
+    async def _connection(self, reader, writer):
+        peer = writer.get_extra_info("peername") or ("", 0)
+        local = writer.get_extra_info("sockname") or (self.host, self.port)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await _write_simple(writer, 431, "Request header fields too large")
+                    return
+                try:
+                    scope, keep_alive, body_reader = _parse_head(head, reader, peer[:2], local[:2])
+                except _BadRequest as e:
+                    await _write_simple(writer, e.status, str(e))
+                    return
+                if not await self._request(scope, body_reader, writer) or not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _request(self, scope, body_reader, writer):
+        """
+        Run one request through the application
+
+        Returns:
+            True if the connection can be reused for another request
+        """
+        response = _Response(writer, scope)
+        finished = asyncio.Event()
+
+        delivered = []
+
+        async def receive():
+            if body_reader.more:
+                if body_reader.expect_continue:
+                    body_reader.expect_continue = False
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                chunk = await body_reader.read()
+                delivered.append(True)
+                return {"type": "http.request", "body": chunk, "more_body": body_reader.more}
+            if not delivered:
+                # Requests without a body still get one (empty) request message
+                delivered.append(True)
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        try:
+            await self.app(scope, receive, response.send)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return False
+        except Exception as e:
+            print(f"ASGI application error: {e!r}", file=sys.stderr)
+            if response.started:
+                return False
+            await _write_simple(writer, 500, "Internal server error")
+            return False
+        finally:
+            finished.set()
+
+        if not response.complete:
+            return False
+        # The next request head follows the body, so unread body bytes must go
+        while body_reader.more:
+            await body_reader.read()
+        return True
+
+
+class _BodyReader:
+    """Reads a request body delimited by Content-Length or chunked encoding"""
+
+    def __init__(self, reader, length, chunked, expect_continue):
+        self.reader = reader
+        self.remaining = length
+        self.chunked = chunked
+        self.more = chunked or length > 0
+        self.expect_continue = expect_continue and self.more
+
+    async def read(self):
+        if self.chunked:
+            size_line = await self.reader.readline()
+            try:
+                size = int(size_line.split(b";", 1)[0], 16)
+            except ValueError:
+                raise ConnectionError("Malformed chunked body")
+            if size == 0:
+                # Skip trailers up to the blank line that ends the body
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                self.more = False
+                return b""
+            chunk = await self.reader.readexactly(size)
+            await self.reader.readexactly(2)
+            return chunk
+
+        chunk = await self.reader.read(min(self.remaining, READ_CHUNK_BYTES))
+        if not chunk:
+            raise ConnectionError("Client closed the connection mid-body")
+        self.remaining -= len(chunk)
+        self.more = self.remaining > 0
+        return chunk
+
+
+class _Response:
+    """ASGI send callable writing one HTTP/1.1 response"""
+
+    def __init__(self, writer, scope):
+        self.writer = writer
+        self.scope = scope
+        self.started = False
+        self.complete = False
+        self.chunked = False
+        self._start = None
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._start is None or self.complete:
+            raise RuntimeError(f"Unexpected ASGI message: {message['type']}")
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self._write_head(more_body, len(body))
+        if self.chunked:
+            if body:
+                self.writer.write(b"%x\r\n%b\r\n" % (len(body), body))
+            if not more_body:
+                self.writer.write(b"0\r\n\r\n")
+        elif body and self.scope["method"] != "HEAD":
+            self.writer.write(body)
+        self.complete = not more_body
+        await self.writer.drain()
+
+    def _write_head(self, more_body, length):
+        self.started = True
+        status = self._start["status"]
+        headers = list(self._start.get("headers", []))
+        names = {name.lower() for name, _ in headers}
+        if b"content-length" not in names:
+            if more_body:
+                self.chunked = True
+                headers.append((b"transfer-encoding", b"chunked"))
+            else:
+                headers.append((b"content-length", str(length).encode()))
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}".encode("latin-1")]
+        lines.extend(name + b": " + value for name, value in headers)
+        self.writer.write(b"\r\n".join(lines) + b"\r\n\r\n")
+
+
+def _parse_head(head, reader, client, server):
+    """
+    Parse a request head into an ASGI HTTP scope
+
+    Returns:
+        Tuple of (scope, whether the connection is kept alive, body reader)
+
+    Raises:
+        _BadRequest: The head is malformed or uses an unsupported feature
+    """
+    lines = head[:-4].split(b"\r\n")
+    try:
+        method, target, version = lines[0].decode("latin-1").split(" ")
+    except ValueError:
+        raise _BadRequest(400, "Malformed request line")
+    if version not in ("HTTP/1.0", "HTTP/1.1"):
+        raise _BadRequest(505, "HTTP version not supported")
+
+    headers = []
+    for line in lines[1:]:
+        name, separator, value = line.partition(b":")
+        if not separator or not name or name != name.strip():
+            raise _BadRequest(400, "Malformed header line")
+        headers.append((name.lower(), value.strip()))
+    values = dict(headers)
+
+    connection = values.get(b"connection", b"").lower()
+    keep_alive = b"close" not in connection if version == "HTTP/1.1" else b"keep-alive" in connection
+
+    chunked = b"chunked" in values.get(b"transfer-encoding", b"").lower()
+    length = 0
+    if not chunked and b"content-length" in values:
+        try:
+            length = int(values[b"content-length"])
+        except ValueError:
+            raise _BadRequest(400, "Invalid Content-Length")
+        if length < 0:
+            raise _BadRequest(400, "Invalid Content-Length")
+    expect_continue = values.get(b"expect", b"").lower() == b"100-continue"
+
+    path, _, query = target.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": version.split("/", 1)[1],
+        "method": method.upper(),
+        "scheme": "http",
+        "path": unquote(path, encoding="utf-8", errors="surrogateescape"),
+        "raw_path": path.encode("latin-1"),
+        "query_string": query.encode("latin-1"),
+        "root_path": "",
+        "headers": headers,
+        "client": client,
+        "server": server
+    }
+    return scope, keep_alive, _BodyReader(reader, length, chunked, expect_continue)
+
+
+async def _write_simple(writer, status, message):
+    body = f'{{"error": "{message}", "status": {status}}}'.encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        .encode("latin-1") + body
+    )
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+
+def run(app, host="127.0.0.1", port=5000):
+    """Serve app until interrupted"""
+    server = ASGIServer(app, host, port)
+
+    async def main():
+        task = asyncio.ensure_future(server.serve())
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, task.cancel)
+            except (NotImplementedError, RuntimeError):
+                pass
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
@@ -0,0 +1,352 @@
+"""
+Offline batch runner for large scenario books
+Runs scenario CSVs through the simulation engine on a local process pool,
+bypassing HTTP, with progress, resumable output and a throughput report
+
+Usage (from the backend directory):
+    python -m services.batch_runner scenarios.csv --output results.csv
+    python -m services.batch_runner scenarios.csv --output results.ndjson --format columnar --workers 8
+    python -m services.batch_runner scenarios.csv --output results.csv --resume
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from collections import deque
+
+from services.scenario_batch import (
+    read_scenario_header,
+    parse_scenario_row,
+    run_scenario_chunk,
+    format_csv_chunk,
+    format_columnar_chunk
+)
+from utilities.model_registry import model_registry, get_model
+
+DEFAULT_CHUNK_SIZE = 2000
+CHUNKS_IN_FLIGHT_PER_WORKER = 4
+PROGRESS_INTERVAL = 2.0
+CHECKPOINT_SUFFIX = ".progress"
+
+
+def count_data_lines(path):
+    """Count lines after the header quickly, for progress estimates (blank lines included)"""
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as handle:
+        while True:
+            block = handle.read(1024 * 1024)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def iter_raw_chunks(reader, chunk_size, start_row=2):
+    """
+    Group raw CSV rows into chunks of (row_number, values) without parsing them
+
+    Parsing and validation happen in the workers, so the reading process
+    only splits lines. Blank lines are dropped here, as iter_scenarios does.
+    """
+    chunk = []
+    for row_number, values in enumerate(reader, start=start_row):
+        if not any(value.strip() for value in values):
+            continue
+        chunk.append((row_number, values))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_raw_chunk(task):
+    """
+    Parse, simulate and format one chunk in a worker
+
+    Args:
+        task: Tuple of (column_index, raw rows, output format, include header)
+
+    Returns:
+        Tuple of (formatted text, rows, failed rows, worker pid)
+    """
+    column_index, rows, output_format, include_header = task
+    scenarios = []
+    for row_number, values in rows:
+        params, error = parse_scenario_row(values, column_index)
+        scenarios.append((row_number, params, error))
+
+    records = run_scenario_chunk(scenarios)
+    if output_format == "csv":
+        text = format_csv_chunk(records, include_header=include_header)
+    else:
+        text = format_columnar_chunk(records)
+    failed = sum(1 for record in records if record["status"] == "error")
+    return text, len(records), failed, os.getpid()
+
+
+def _init_worker(model_definition):
+    """Load the parent's model so every worker simulates with the same coefficients"""
+    # Ctrl-C is handled by the parent, which terminates the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if model_definition is not None:
+        model_registry.load(model_definition)
+
+
+class BatchRun:
+    """
+    One batch run from a scenario CSV to a results file
+
+    Chunks are simulated in parallel but written strictly in input order,
+    and after every written chunk a small checkpoint records how many
+    chunks and output bytes are complete. A resumed run truncates the
+    output to the last checkpoint (dropping any partly written chunk),
+    skips the chunks already done and appends from there. At most a few
+    chunks per worker are in flight, so memory stays flat however large
+    the scenario book is.
+    """
+
+    def __init__(self, input_path, output_path, output_format="csv", chunk_size=DEFAULT_CHUNK_SIZE,
+                 workers=None, resume=False, progress=True, model_definition=None):
+        if output_format not in ("csv", "columnar"):
+            raise ValueError('format must be "csv" or "columnar"')
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = output_path + CHECKPOINT_SUFFIX
+        self.output_format = output_format
+        self.chunk_size = chunk_size
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.resume = resume
+        self.progress = progress
+        self.model_definition = model_definition
+
+    def run(self):
+        """
+        Run the batch to completion
+
+        Returns:
+            Throughput report dictionary
+
+        Raises:
+            ValueError: Bad scenario header or a checkpoint from a different run
+        """
+        started = time.perf_counter()
+        total_rows = count_data_lines(self.input_path)
+        checkpoint = self._load_checkpoint()
+        model_version = get_model().model_version
+
+        skip_chunks = checkpoint["chunks_done"] if checkpoint else 0
+        stats = {
+            "rows": checkpoint["rows_done"] if checkpoint else 0,
+            "failed": checkpoint["rows_failed"] if checkpoint else 0,
+            "chunks": skip_chunks,
+            "rows_this_run": 0,
+            "rows_by_worker": {}
+        }
+
+        with open(self.input_path, "r", encoding="utf-8-sig", newline="") as input_handle:
+            reader = csv.reader(input_handle)
+            column_index, error = read_scenario_header(reader)
+            if error:
+                raise ValueError(error)
+
+            output_handle = self._open_output(checkpoint)
+            try:
+                context = multiprocessing.get_context("spawn")
+                with context.Pool(self.workers, initializer=_init_worker,
+                                  initargs=(self.model_definition,)) as pool:
+                    self._process(pool, reader, column_index, skip_chunks, output_handle,
+                                  stats, total_rows, model_version, started)
+            finally:
+                output_handle.close()
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        elapsed = time.perf_counter() - started
+        report = {
+            "input": self.input_path,
+            "output": self.output_path,
+            "format": self.output_format,
+            "model_version": model_version,
+            "workers": self.workers,
+            "chunk_size": self.chunk_size,
+            "resumed_from_chunk": skip_chunks,
+            "rows": stats["rows"],
+            "rows_failed": stats["failed"],
+            "rows_this_run": stats["rows_this_run"],
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(stats["rows_this_run"] / elapsed, 1) if elapsed else None,
+            "rows_per_second_per_worker": (
+                round(stats["rows_this_run"] / elapsed / self.workers, 1) if elapsed else None
+            ),
+            "rows_by_worker": sorted(stats["rows_by_worker"].values(), reverse=True)
+        }
+        return report
+
+    def _process(self, pool, reader, column_index, skip_chunks, output_handle,
+                 stats, total_rows, model_version, started):
+        """Submit chunks with a bounded window and write results in order"""
+        window = self.workers * CHUNKS_IN_FLIGHT_PER_WORKER
+        pending = deque()
+        last_report = time.perf_counter()
+
+        for number, rows in enumerate(iter_raw_chunks(reader, self.chunk_size)):
+            if number < skip_chunks:
+                continue
+            include_header = self.output_format == "csv" and number == 0
+            task = (column_index, rows, self.output_format, include_header)
+            pending.append(pool.apply_async(run_raw_chunk, (task,)))
+
+            if len(pending) >= window:
+                self._write_result(pending.popleft().get(), output_handle, stats, model_version)
+                last_report = self._report_progress(stats, total_rows, started, last_report)
+
+        while pending:
+            self._write_result(pending.popleft().get(), output_handle, stats, model_version)
+            last_report = self._report_progress(stats, total_rows, started, last_report)
+        self._report_progress(stats, total_rows, started, None)
+
+    def _write_result(self, result, output_handle, stats, model_version):
+        """Append one chunk's output and move the checkpoint past it"""
+        text, rows, failed, pid = result
+        output_handle.write(text.encode("utf-8"))
+        output_handle.flush()
+
+        stats["rows"] += rows
+        stats["failed"] += failed
+        stats["chunks"] += 1
+        stats["rows_this_run"] += rows
+        stats["rows_by_worker"][pid] = stats["rows_by_worker"].get(pid, 0) + rows
+
+        self._save_checkpoint({
+            "input": os.path.abspath(self.input_path),
+            "input_size": os.path.getsize(self.input_path),
+            "format": self.output_format,
+            "chunk_size": self.chunk_size,
+            "model_version": model_version,
+            "chunks_done": stats["chunks"],
+            "rows_done": stats["rows"],
+            "rows_failed": stats["failed"],
+            "output_bytes": output_handle.tell()
+        })
+
+    def _report_progress(self, stats, total_rows, started, last_report):
+        """Print a progress line at most every PROGRESS_INTERVAL seconds (always when last_report is None)"""
+        now = time.perf_counter()
+        if not self.progress or (last_report is not None and now - last_report < PROGRESS_INTERVAL):
+            return last_report
+        elapsed = now - started
+        rate = stats["rows_this_run"] / elapsed if elapsed else 0.0
+        line = f"{stats['rows']:,}/{total_rows:,} rows"
+        if total_rows:
+            line += f" ({stats['rows'] / total_rows:.1%})"
+        line += f", {rate:,.0f} rows/s, {stats['failed']:,} failed"
+        if rate and total_rows > stats["rows"]:
+            line += f", ETA {(total_rows - stats['rows']) / rate:,.0f}s"
+        print(line, file=sys.stderr, flush=True)
+        return now
+
+    def _open_output(self, checkpoint):
+        """Open the output for appending from the checkpoint, or truncate it for a fresh run"""
+        if checkpoint is None:
+            return open(self.output_path, "wb")
+        handle = open(self.output_path, "r+b")
+        handle.seek(checkpoint["output_bytes"])
+        handle.truncate()
+        return handle
+
+    def _load_checkpoint(self):
+        """The checkpoint of an interrupted run, if resuming; checks it belongs to this run"""
+        if not self.resume or not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path, "r", encoding="utf-8") as handle:
+            checkpoint = json.load(handle)
+
+        expected = {
+            "input": os.path.abspath(self.input_path),
+            "input_size": os.path.getsize(self.input_path),
+            "format": self.output_format,
+            "chunk_size": self.chunk_size,
+            "model_version": get_model().model_version
+        }
+        mismatched = [key for key, value in expected.items() if checkpoint.get(key) != value]
+        if mismatched:
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} is from a different run "
+                f"({', '.join(mismatched)} changed); rerun without --resume"
+            )
+        if not os.path.exists(self.output_path):
+            raise ValueError(f"Checkpoint found but {self.output_path} is missing; rerun without --resume")
+        return checkpoint
+
+    def _save_checkpoint(self, checkpoint):
+        """Write the checkpoint atomically so an interruption never leaves it half written"""
+        temp_path = self.checkpoint_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(checkpoint, handle)
+        os.replace(temp_path, self.checkpoint_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a scenario CSV through the simulation engine offline")
+    parser.add_argument("scenarios", help="CSV with policy_type, percentage, duration, budget "
+                                          "and optional policy_name columns")
+    parser.add_argument("--output", required=True, help="Results file")
+    parser.add_argument("--format", choices=["csv", "columnar"], default="csv",
+                        help="csv, or columnar (one JSON object of columns per chunk)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted run from its checkpoint")
+    parser.add_argument("--model", help="Model definition JSON to simulate with "
+                                        "(default: the current model)")
+    parser.add_argument("--report", help="Also write the throughput report to this JSON file")
+    parser.add_argument("--quiet", action="store_true", help="No progress lines")
+    args = parser.parse_args(argv)
+
+    model_definition = None
+    if args.model:
+        model_registry.load_file(args.model)
+        model_definition = get_model().definition
+
+    try:
+        report = BatchRun(
+            args.scenarios,
+            args.output,
+            output_format=args.format,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            resume=args.resume,
+            progress=not args.quiet,
+            model_definition=model_definition
+        ).run()
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print("Interrupted; rerun with --resume to continue", file=sys.stderr)
+        return 130
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    print(f"{report['rows_this_run']:,} rows in {report['elapsed_seconds']}s "
+          f"({report['rows_per_second']:,} rows/s, {report['workers']} workers, "
+          f"{report['rows_per_second_per_worker']:,} rows/s per worker); "
+          f"{report['rows_failed']:,} failed", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""
+Traffic-driven result cache warming
+Records popular simulation parameters and precomputes their results, explanations and reports after a restart
+"""
+import atexit
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
+
+from services.admission_control import admission_controller
+from services.ai_explainer import explain_simulation_results
+from services.policy_models import POLICY_TYPES
+from services.result_cache import result_cache, encode_value, decode_value
+from services.simulation_engine import simulation_engine
+from services.single_flight import single_flight, canonical_key
+from reports.pdf_generator import pdf_generator, REPORT_MODE_FULL
+from utilities.model_registry import get_model
+
+DEFAULT_POPULARITY_FILE = os.path.join(tempfile.gettempdir(), "policysim_popular_params.sqlite")
+DEFAULT_WARM_TOP = 50
+
+# Starting values of the dashboard's policy form (percentage is clamped to
+# each type's range) and the name /api/simulate uses when none is sent
+PRESET_PERCENTAGE = 75.0
+PRESET_DURATION = 5
+PRESET_BUDGET = 2000000.0
+PRESET_POLICY_NAME = "Unnamed Policy"
+
+# Request counts are buffered in memory and written out this often
+FLUSH_EVERY_RECORDS = 256
+FLUSH_INTERVAL_SECONDS = 60.0
+
+# Popularity halves every week without requests, so old favourites fade
+POPULARITY_HALF_LIFE = 7 * 24 * 3600.0
+MAX_TRACKED_PARAMS = 2000
+
+# Warming starts after startup settles and steps aside for live requests
+START_DELAY_SECONDS = 2.0
+IDLE_POLL_SECONDS = 0.2
+STEP_PAUSE_SECONDS = 0.05
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def preset_params():
+    """
+    Default configuration of every registered policy type
+
+    Returns:
+        List of /api/simulate parameter dictionaries
+    """
+    presets = []
+    for policy_type, info in get_model().policy_info.items():
+        percentage = min(max(PRESET_PERCENTAGE, info["min_percentage"]), info["max_percentage"])
+        presets.append({
+            "policy_type": policy_type,
+            "percentage": float(percentage),
+            "duration": PRESET_DURATION,
+            "budget": PRESET_BUDGET,
+            "policy_name": PRESET_POLICY_NAME
+        })
+    return presets
+
+
+class CacheWarmer:
+    """
+    Warms the result cache with what the dashboard is likely to ask for first
+
+    /api/simulate records the canonical parameters of every simulation it
+    serves. Counts are kept in a SQLite file with exponential decay, so the
+    ranking survives restarts and follows recent traffic. On startup a
+    background thread takes every policy type's default configuration plus
+    the most popular parameter sets and, for each, computes the simulation,
+    its explanation and its full PDF report under exactly the cache keys the
+    routes use. The thread runs at the lowest OS priority and only while no
+    admitted request is running or queued; a live request for something
+    being warmed joins the same computation through single-flight.
+    """
+
+    def __init__(self, path=None, top_n=None, enabled=None):
+        self.path = path or os.environ.get("POLICYSIM_POPULARITY_FILE") or DEFAULT_POPULARITY_FILE
+        self.top_n = top_n if top_n is not None else _env_int("POLICYSIM_WARM_TOP", DEFAULT_WARM_TOP)
+        if enabled is None:
+            enabled = os.environ.get("POLICYSIM_CACHE_WARMING", "1") != "0"
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._pending_records = 0
+        self._last_flush = time.monotonic()
+        self._recorded = 0
+        self._errors = 0
+        self._thread = None
+        self._progress = {
+            "state": "not_started",
+            "planned": 0,
+            "done": 0,
+            "failed": 0,
+            "computed": {"simulate": 0, "explain": 0, "report": 0},
+            "already_cached": {"simulate": 0, "explain": 0, "report": 0},
+            "started_at": None,
+            "finished_at": None
+        }
+
+    def record(self, params):
+        """
+        Count one served simulation
+
+        Args:
+            params: The /api/simulate parameter dictionary
+        """
+        key = canonical_key("simulate", params)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                entry = self._pending[key] = [dict(params), 0]
+            entry[1] += 1
+            self._pending_records += 1
+            self._recorded += 1
+            due = (self._pending_records >= FLUSH_EVERY_RECORDS
+                   or time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered request counts to the popularity file"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._pending_records = 0
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                for key, (params, count) in pending.items():
+                    row = connection.execute(
+                        "SELECT score, updated_at FROM popular WHERE key = ?", (key,)
+                    ).fetchone()
+                    score = count + (_decayed(row[0], now - row[1]) if row else 0.0)
+                    connection.execute(
+                        "INSERT OR REPLACE INTO popular (key, params, score, updated_at) VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(params, sort_keys=True), score, now)
+                    )
+                self._trim(connection, now)
+        except sqlite3.Error:
+            with self._lock:
+                self._errors += 1
+
+    def popular(self, limit):
+        """
+        Most requested parameter sets by decayed request count
+
+        Returns:
+            List of (params, score) tuples, most popular first
+        """
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection:
+                rows = connection.execute("SELECT params, score, updated_at FROM popular").fetchall()
+        except sqlite3.Error:
+            with self._lock:
+                self._errors += 1
+            return []
+        ranked = sorted(
+            ((json.loads(params), _decayed(score, now - updated_at)) for params, score, updated_at in rows),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return ranked[:limit]
+
+    def plan(self):
+        """Parameter sets to warm: every preset, then the popular ones not already covered"""
+        planned = []
+        seen = set()
+        popular = [params for params, _ in self.popular(self.top_n)] if self.top_n > 0 else []
+        for params in preset_params() + popular:
+            key = canonical_key("simulate", params)
+            if key not in seen and params.get("policy_type") in POLICY_TYPES:
+                seen.add(key)
+                planned.append(params)
+        return planned
+
+    def start(self):
+        """
+        Start warming in the background (once per process; no-op when disabled)
+
+        Called by the serving entry points rather than create_app, so scripts
+        and tests that build the app do not warm.
+        """
+        with self._lock:
+            if not self.enabled or self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="policysim-cache-warmer", daemon=True)
+            self._progress["state"] = "waiting"
+        self._thread.start()
+
+    def warm(self, params):
+        """
+        Bring one parameter set's simulation, explanation and report into the cache
+
+        Each value is computed only if the cache does not already hold it,
+        and only once no live request is running.
+        """
+        simulate_key = result_cache.key("simulate", params)
+        results = self._get_or_compute("simulate", simulate_key, lambda: single_flight.do(
+            simulate_key, lambda: simulation_engine.run_simulation(**params)
+        ))
+
+        # Later keys are built from the results as clients send them back
+        simulation_results = decode_value(*encode_value(results))
+        explanation = self._get_or_compute(
+            "explain",
+            result_cache.key("explain", simulation_results),
+            lambda: explain_simulation_results(simulation_results)
+        )
+
+        report_key = result_cache.key("report", [simulation_results, explanation, REPORT_MODE_FULL])
+        self._get_or_compute("report", report_key, lambda: pdf_generator.generate_simulation_report(
+            simulation_results, explanation, REPORT_MODE_FULL
+        ))
+
+    def stats(self):
+        """Recording counters and warming progress"""
+        with self._lock:
+            progress = json.loads(json.dumps(self._progress))
+            pending = self._pending_records
+            recorded = self._recorded
+            errors = self._errors
+        tracked = None
+        try:
+            with closing(self._connect()) as connection:
+                tracked = connection.execute("SELECT COUNT(*) FROM popular").fetchone()[0]
+        except sqlite3.Error:
+            errors += 1
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "top_n": self.top_n,
+            "recorded": recorded,
+            "pending_records": pending,
+            "tracked_params": tracked,
+            "errors": errors,
+            "warming": progress
+        }
+
+    def _run(self):
+        time.sleep(START_DELAY_SECONDS)
+        _lower_thread_priority()
+        planned = self.plan()
+        with self._lock:
+            self._progress.update(state="running", planned=len(planned), started_at=time.time())
+
+        for params in planned:
+            try:
+                self.warm(params)
+            except Exception:
+                with self._lock:
+                    self._progress["failed"] += 1
+            else:
+                with self._lock:
+                    self._progress["done"] += 1
+
+        with self._lock:
+            self._progress.update(state="finished", finished_at=time.time())
+
+    def _get_or_compute(self, kind, key, fn):
+        value = result_cache.get(key)
+        if value is not None:
+            with self._lock:
+                self._progress["already_cached"][kind] += 1
+            return value
+
+        _wait_until_idle()
+        value = fn()
+        result_cache.put(key, value)
+        with self._lock:
+            self._progress["computed"][kind] += 1
+        time.sleep(STEP_PAUSE_SECONDS)
+        return value
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS popular ("
+            " key TEXT PRIMARY KEY,"
+            " params TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        return connection
+
+    def _trim(self, connection, now):
+        """Forget the least popular parameter sets beyond MAX_TRACKED_PARAMS"""
+        count = connection.execute("SELECT COUNT(*) FROM popular").fetchone()[0]
+        if count <= MAX_TRACKED_PARAMS:
+            return
+        rows = connection.execute("SELECT key, score, updated_at FROM popular").fetchall()
+        rows.sort(key=lambda row: _decayed(row[1], now - row[2]))
+        connection.executemany(
+            "DELETE FROM popular WHERE key = ?",
+            [(row[0],) for row in rows[:count - MAX_TRACKED_PARAMS]]
+        )
+
+
+def _decayed(score, age):
+    return score * 0.5 ** (max(age, 0.0) / POPULARITY_HALF_LIFE)
+
+
+def _wait_until_idle():
+    """Block while any live request is running or queued"""
+    while admission_controller.busy():
+        time.sleep(IDLE_POLL_SECONDS)
+
+
+def _lower_thread_priority():
+    """Give the calling thread the lowest scheduling priority where the OS allows it per thread"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+# Create singleton instance
+cache_warmer = CacheWarmer()
+atexit.register(cache_warmer.flush)
@@ -0,0 +1,123 @@
+"""
+Baseline plus delta encoding for comparison responses
+One full baseline simulation, and per alternative only what differs from it
+"""
+import hashlib
+import json
+
+ENCODING_FULL = "full"
+ENCODING_DELTA = "delta"
+ENCODINGS = (ENCODING_FULL, ENCODING_DELTA)
+
+# Sections sent as the fields that differ from the baseline
+OVERRIDE_SECTIONS = ("policy", "final_metrics", "risk")
+
+# Timeline series as (name in the encoding, list key, field of each list entry)
+TIMELINE_SERIES = (
+    ("pay_gap", "pay_gap", None),
+    ("employment_ratio", "employment_ratio", None),
+    ("leadership_female", "leadership", "female"),
+    ("leadership_male", "leadership", "male"),
+    ("budget_spent", "budget_spent", None)
+)
+
+# Deltas are only sent for values with at most this many decimals
+MAX_DELTA_DECIMALS = 6
+
+
+def baseline_id(simulation):
+    """
+    Identity of a baseline simulation, ignoring when it was run
+
+    Clients that already hold a baseline send this back to have it left out.
+    """
+    content = {section: value for section, value in simulation.items() if section != "timestamp"}
+    encoded = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_comparison(comparison, baseline_key="policy_a", known_baseline=None):
+    """
+    Encode a comparison as one baseline and per-alternative differences
+
+    Each alternative keeps only its timestamp, the policy, final metric and
+    risk fields that differ from the baseline, and its timeline series as
+    element-wise deltas rounded to the series' decimals (so baseline plus
+    delta, rounded again, gives back the exact value). Series equal to the
+    baseline's are left out, and series of a different length are sent as
+    values. Clients rebuild years and duration from the policy (see
+    decodeComparison in the frontend API service).
+
+    Args:
+        comparison: ComparisonResult or its rendered dictionary
+        baseline_key: Which simulation of the comparison is the baseline
+        known_baseline: baseline_id the client already holds; the baseline
+            body is omitted when it matches
+
+    Returns:
+        Dictionary with baseline_id, baseline (or None), baseline_timestamp,
+        alternatives (by comparison key) and analysis
+    """
+    if hasattr(comparison, "to_dict"):
+        comparison = comparison.to_dict()
+    baseline = comparison[baseline_key]
+    identity = baseline_id(baseline)
+
+    alternatives = {}
+    for key, simulation in comparison.items():
+        if key != baseline_key and key != "analysis":
+            alternatives[key] = _encode_alternative(baseline, simulation)
+
+    return {
+        "baseline_key": baseline_key,
+        "baseline_id": identity,
+        "baseline": None if known_baseline == identity else baseline,
+        "baseline_timestamp": baseline["timestamp"],
+        "alternatives": alternatives,
+        "analysis": comparison.get("analysis")
+    }
+
+
+def _encode_alternative(baseline, simulation):
+    delta = {"timestamp": simulation["timestamp"]}
+    for section in OVERRIDE_SECTIONS:
+        changed = {
+            field: value for field, value in simulation[section].items()
+            if baseline[section].get(field) != value
+        }
+        if changed:
+            delta[section] = changed
+
+    series = {}
+    for name, list_key, field in TIMELINE_SERIES:
+        values = _series(simulation["timeline"], list_key, field)
+        base = _series(baseline["timeline"], list_key, field)
+        if values == base:
+            continue
+        decimals = max(_decimals(value) for value in values + base) if len(values) == len(base) else None
+        if decimals is None or decimals > MAX_DELTA_DECIMALS:
+            series[name] = {"values": values}
+        else:
+            steps = [round(value - previous, decimals) for value, previous in zip(values, base)]
+            series[name] = {
+                "decimals": decimals,
+                "delta": [int(step) for step in steps] if decimals == 0 else steps
+            }
+    if series:
+        delta["timeline"] = series
+    return delta
+
+
+def _series(timeline, list_key, field):
+    values = timeline[list_key]
+    return [entry[field] for entry in values] if field else list(values)
+
+
+def _decimals(value):
+    """Decimal places in the shortest representation of a number (99 if in exponent form)"""
+    if isinstance(value, int):
+        return 0
+    text = repr(value)
+    if "e" in text or "n" in text:
+        return 99
+    return len(text.split(".", 1)[1].rstrip("0")) if "." in text else 0
@@ -0,0 +1,171 @@
+"""
+Dependency-tracked incremental recomputation for what-if edits
+Knows which inputs every response field depends on and recomputes only
+the series a parameter change actually affects
+"""
+from utilities.data_generator import SERIES_GENERATORS
+from utilities.calculations import calculate_risk_level
+from services.policy_models import get_policy_info, validate_policy_parameters
+from utilities.model_registry import get_model
+
+SIMULATION_INPUTS = ("policy_name", "policy_type", "percentage", "duration", "budget")
+
+CURVE_INPUTS = ("policy_type", "percentage", "duration")
+SPENDING_INPUTS = ("policy_type", "percentage", "duration", "budget")
+
+# Inputs each timeline series and the risk assessment are computed from
+SERIES_DEPENDENCIES = {
+    "pay_gap": CURVE_INPUTS,
+    "employment_ratio": CURVE_INPUTS,
+    "leadership": CURVE_INPUTS,
+    "budget_spent": SPENDING_INPUTS,
+    "risk": SPENDING_INPUTS
+}
+
+# Response fields as (section, field) with the inputs or series they derive from.
+# A None field stands for the whole section.
+FIELD_DEPENDENCIES = (
+    (("policy", "name"), ("policy_name",)),
+    (("policy", "type"), ("policy_type",)),
+    (("policy", "type_name"), ("policy_type",)),
+    (("policy", "description"), ("policy_type",)),
+    (("policy", "percentage"), ("percentage",)),
+    (("policy", "duration"), ("duration",)),
+    (("policy", "budget"), ("budget",)),
+    (("timeline", "years"), ("duration",)),
+    (("timeline", "pay_gap"), ("pay_gap",)),
+    (("timeline", "employment_ratio"), ("employment_ratio",)),
+    (("timeline", "leadership"), ("leadership",)),
+    (("timeline", "budget_spent"), ("budget_spent",)),
+    (("timeline", "duration"), ("duration",)),
+    (("final_metrics", "final_pay_gap"), ("pay_gap",)),
+    (("final_metrics", "pay_gap_reduction"), ("pay_gap",)),
+    (("final_metrics", "final_employment_ratio"), ("employment_ratio",)),
+    (("final_metrics", "employment_improvement"), ("employment_ratio",)),
+    (("final_metrics", "final_leadership"), ("leadership",)),
+    (("final_metrics", "total_budget_spent"), ("budget_spent",)),
+    (("risk", None), ("risk",))
+)
+
+
+def affected_series(changed_inputs):
+    """Names of the series and risk that must be recomputed for a set of changed inputs"""
+    return [
+        series for series, inputs in SERIES_DEPENDENCIES.items()
+        if changed_inputs.intersection(inputs)
+    ]
+
+
+def affected_fields(changed_inputs, changed_series):
+    """Response fields that depend on a changed input or a changed series"""
+    sources = set(changed_inputs) | set(changed_series)
+    return [field for field, depends_on in FIELD_DEPENDENCIES if sources.intersection(depends_on)]
+
+
+def evaluate_changes(previous_params, changes):
+    """
+    Compute only the response fields a parameter delta can affect
+
+    The caller holds the previous response, so series are not compared:
+    every field whose inputs changed is returned.
+
+    Args:
+        previous_params: Dictionary with policy_name, policy_type,
+            percentage, duration and budget of the previous run
+        changes: Parameter delta
+
+    Returns:
+        Tuple of (new parameters, list of changed (section, field) pairs,
+        partial response dictionary holding just those fields)
+
+    Raises:
+        ValueError: Unknown inputs or invalid parameters
+    """
+    unknown = [name for name in changes if name not in SIMULATION_INPUTS]
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(unknown)}")
+
+    params = dict(previous_params)
+    changed_inputs = {name for name, value in changes.items() if params.get(name) != value}
+    params.update(changes)
+
+    is_valid, error = validate_policy_parameters(
+        params["policy_type"], params["percentage"], params["duration"], params["budget"]
+    )
+    if not is_valid:
+        raise ValueError(error)
+
+    series = {name: _evaluate_series(name, params) for name in affected_series(changed_inputs)}
+    fields = affected_fields(changed_inputs, series)
+    return params, fields, render_fields(fields, params, series)
+
+
+def render_fields(fields, params, series):
+    """
+    Render the given response fields into a nested partial response
+
+    Args:
+        fields: List of (section, field) pairs
+        params: Simulation parameters
+        series: Computed series by name (only those the fields need)
+    """
+    policy_info = get_policy_info(params["policy_type"])
+    policy_values = {
+        "name": params["policy_name"],
+        "type": params["policy_type"],
+        "type_name": policy_info["name"],
+        "description": policy_info["description"],
+        "percentage": params["percentage"],
+        "duration": params["duration"],
+        "budget": params["budget"]
+    }
+    partial = {}
+
+    for section, field in fields:
+        if section == "policy":
+            value = policy_values[field]
+        elif section == "risk":
+            partial["risk"] = dict(series["risk"])
+            continue
+        elif field == "years":
+            value = list(range(params["duration"] + 1))
+        elif field == "duration":
+            value = params["duration"]
+        elif section == "timeline" and field == "leadership":
+            female, male = series["leadership"]
+            value = [{"female": f, "male": m} for f, m in zip(female, male)]
+        elif section == "timeline":
+            value = series[field].tolist()
+        else:
+            value = _final_metric(field, series)
+        partial.setdefault(section, {})[field] = value
+
+    return partial
+
+
+def _evaluate_series(name, params):
+    """Compute one series (or the risk assessment) from parameters"""
+    if name == "risk":
+        return calculate_risk_level(
+            params["policy_type"], params["percentage"], params["budget"], params["duration"]
+        )
+    return SERIES_GENERATORS[name](
+        params["policy_type"], params["percentage"], params["duration"], params["budget"]
+    )
+
+
+def _final_metric(field, series):
+    """Final-year value of a final_metrics field from its series"""
+    if field == "final_pay_gap":
+        return series["pay_gap"][-1]
+    if field == "pay_gap_reduction":
+        return round(get_model().constants["base_pay_gap"] - series["pay_gap"][-1], 2)
+    if field == "final_employment_ratio":
+        return series["employment_ratio"][-1]
+    if field == "employment_improvement":
+        base_ratio = get_model().constants["base_employment_ratio"]
+        return round((series["employment_ratio"][-1] - base_ratio) * 100, 2)
+    if field == "final_leadership":
+        female, male = series["leadership"]
+        return {"female": female[-1], "male": male[-1]}
+    return series["budget_spent"][-1]
@@ -0,0 +1,254 @@
+"""
+In-process background job scheduler for long-running simulation work
+Runs jobs on a bounded worker pool with priorities and per-client fairness
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from services.job_tasks import JOB_HANDLERS
+
+JOB_PRIORITIES = {
+    "high": 0,
+    "normal": 1,
+    "low": 2
+}
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when its job has been cancelled"""
+
+
+class Job:
+    """State of one submitted job"""
+
+    def __init__(self, kind, params, client_id, priority):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.client_id = client_id
+        self.priority = priority
+        self.status = "queued"
+        self.progress_done = 0
+        self.progress_total = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    @property
+    def is_finished(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+    def report_progress(self, done, total):
+        """Record progress; raises JobCancelled once the job is cancelled"""
+        self.progress_done = done
+        self.progress_total = total
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self):
+        """Public job status"""
+        percent = 0.0
+        if self.progress_total:
+            percent = round(100 * self.progress_done / self.progress_total, 1)
+        elif self.status == "completed":
+            percent = 100.0
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "priority": next(name for name, rank in JOB_PRIORITIES.items() if rank == self.priority),
+            "progress": {
+                "done": self.progress_done,
+                "total": self.progress_total,
+                "percent": percent
+            },
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobScheduler:
+    """
+    Bounded worker pool with priority levels and round-robin fairness
+
+    Queued jobs are held per priority level and, within a level, per client.
+    Workers always serve the highest non-empty priority and rotate between
+    the clients waiting at that level, so one client submitting hundreds of
+    sweeps cannot starve another client's single job. Finished jobs keep
+    their result for result_ttl seconds.
+    """
+
+    def __init__(self, handlers=None, max_workers=2, result_ttl=3600, max_pending_per_client=20):
+        self.handlers = dict(handlers or {})
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self.max_pending_per_client = max_pending_per_client
+
+        self._jobs = {}
+        # priority -> OrderedDict(client_id -> deque of jobs); order is the round-robin turn
+        self._queues = {rank: OrderedDict() for rank in JOB_PRIORITIES.values()}
+        self._condition = threading.Condition()
+        self._workers = []
+
+    def register_handler(self, kind, handler):
+        """Register a callable handler(params, job) for a job kind"""
+        self.handlers[kind] = handler
+
+    def submit(self, kind, params, client_id="anonymous", priority="normal"):
+        """
+        Queue a job
+
+        Returns:
+            The queued Job
+
+        Raises:
+            ValueError: Unknown kind or priority
+            OverflowError: The client already has too many pending jobs
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if priority not in JOB_PRIORITIES:
+            raise ValueError(f"Priority must be one of: {', '.join(JOB_PRIORITIES)}")
+
+        with self._condition:
+            self._purge_expired()
+
+            pending = sum(
+                1 for job in self._jobs.values()
+                if job.client_id == client_id and not job.is_finished
+            )
+            if pending >= self.max_pending_per_client:
+                raise OverflowError(
+                    f"Client has {pending} pending jobs (limit {self.max_pending_per_client})"
+                )
+
+            job = Job(kind, params, client_id, JOB_PRIORITIES[priority])
+            self._jobs[job.id] = job
+            self._queues[job.priority].setdefault(client_id, deque()).append(job)
+
+            self._ensure_workers()
+            self._condition.notify()
+
+        return job
+
+    def get(self, job_id):
+        """Get a job by ID, or None if unknown or expired"""
+        with self._condition:
+            self._purge_expired()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job
+
+        Queued jobs are cancelled immediately; running jobs stop at their
+        next progress report.
+
+        Returns:
+            The Job, or None if unknown
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.is_finished:
+                return job
+
+            job.cancel_event.set()
+            if job.status == "queued":
+                clients = self._queues[job.priority]
+                queue = clients.get(job.client_id)
+                if queue is not None:
+                    queue.remove(job)
+                    if not queue:
+                        del clients[job.client_id]
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            return job
+
+    def stats(self):
+        """Queue and worker statistics"""
+        with self._condition:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return {
+                "workers": self.max_workers,
+                "jobs": counts,
+                "queued_by_priority": {
+                    name: sum(len(queue) for queue in self._queues[rank].values())
+                    for name, rank in JOB_PRIORITIES.items()
+                }
+            }
+
+    def _ensure_workers(self):
+        """Start worker threads on first use"""
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"policysim-job-worker-{len(self._workers)}",
+                daemon=True
+            )
+            self._workers.append(worker)
+            worker.start()
+
+    def _next_job(self):
+        """Pop the next job fairly; caller holds the condition"""
+        for rank in sorted(self._queues):
+            clients = self._queues[rank]
+            if not clients:
+                continue
+            client_id, queue = next(iter(clients.items()))
+            job = queue.popleft()
+            # Move the client to the back of the rotation
+            del clients[client_id]
+            if queue:
+                clients[client_id] = queue
+            return job
+        return None
+
+    def _worker_loop(self):
+        """Run queued jobs forever"""
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job()
+                job.status = "running"
+                job.started_at = time.time()
+
+            try:
+                result = self.handlers[job.kind](job.params, job)
+            except JobCancelled:
+                status, result, error = "cancelled", None, None
+            except Exception as e:
+                status, result, error = "failed", None, str(e)
+            else:
+                status, error = "completed", None
+
+            with self._condition:
+                job.result = result
+                job.error = error
+                job.status = status
+                job.finished_at = time.time()
+
+    def _purge_expired(self):
+        """Drop finished jobs older than the TTL; caller holds the condition"""
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.is_finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# Create singleton instance
+job_scheduler = JobScheduler(handlers=JOB_HANDLERS)
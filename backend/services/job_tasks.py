@@ -0,0 +1,296 @@
+"""
+Background job handlers for batches, parameter sweeps, Monte Carlo runs and paired uncertainty comparisons
+Each handler takes (params, job) and reports progress through the job
+"""
+import itertools
+import random
+import statistics
+
+from services.simulation_engine import simulation_engine
+from services.paired_uncertainty import parse_options
+from services.policy_models import POLICY_TYPES
+from services.scenario_batch import iter_chunks, run_scenario_chunk
+from services.sharded_sweep import run_sharded_sweep
+
+PROGRESS_CHUNK_SIZE = 200
+MAX_JOB_SCENARIOS = 1000000
+MAX_MONTE_CARLO_SAMPLES = 100000
+
+
+def run_batch_job(params, job):
+    """
+    Run a list of scenarios
+
+    Expected params:
+    {
+        "scenarios": [{"policy_type": ..., "percentage": ..., "duration": ..., "budget": ...}, ...]
+    }
+    """
+    scenarios = params.get("scenarios") or []
+    if len(scenarios) > MAX_JOB_SCENARIOS:
+        raise ValueError(f"Batch exceeds {MAX_JOB_SCENARIOS} scenarios")
+
+    rows = []
+    for number, scenario in enumerate(scenarios, start=1):
+        try:
+            row = {
+                "policy_type": scenario.get("policy_type"),
+                "percentage": float(scenario.get("percentage")),
+                "duration": int(scenario.get("duration")),
+                "budget": float(scenario.get("budget")),
+                "policy_name": scenario.get("policy_name", "Unnamed Policy")
+            }
+        except (TypeError, ValueError):
+            rows.append((number, None, "percentage, duration and budget must be numbers"))
+        else:
+            rows.append((number, row, None))
+
+    return _run_rows(rows, job)
+
+
+def run_sweep_job(params, job):
+    """
+    Run the full grid of parameter combinations
+
+    Expected params:
+    {
+        "policy_types": ["equal_pay", "parental_leave"],
+        "percentages": [50, 60, 70],  (or {"start": 50, "stop": 100, "step": 5})
+        "durations": [3, 5, 7],
+        "budgets": [1000000, 2000000]
+    }
+    """
+    policy_types = params.get("policy_types") or list(POLICY_TYPES.keys())
+    percentages = _expand_values(params.get("percentages"), "percentages")
+    durations = [int(value) for value in _expand_values(params.get("durations"), "durations")]
+    budgets = _expand_values(params.get("budgets"), "budgets")
+
+    total = len(policy_types) * len(percentages) * len(durations) * len(budgets)
+    if total > MAX_JOB_SCENARIOS:
+        raise ValueError(f"Sweep has {total} combinations (limit {MAX_JOB_SCENARIOS})")
+
+    grid = itertools.product(policy_types, percentages, durations, budgets)
+    rows = [
+        (number, {
+            "policy_type": policy_type,
+            "percentage": float(percentage),
+            "duration": duration,
+            "budget": float(budget)
+        }, None)
+        for number, (policy_type, percentage, duration, budget) in enumerate(grid, start=1)
+    ]
+
+    return _run_rows(rows, job)
+
+
+def run_grid_sweep_job(params, job):
+    """
+    Run a very large grid in parallel and summarize it
+
+    Cells are evaluated in a process pool into shared memory, so the grid
+    can reach hundreds of millions of cells; the result holds per-metric
+    min, max, mean and the configuration reaching each maximum.
+
+    Expected params:
+    {
+        "policy_types": ["equal_pay", "parental_leave"],
+        "percentages": {"start": 50, "stop": 100, "step": 1},
+        "durations": {"start": 1, "stop": 10},
+        "budgets": {"start": 100000, "stop": 10000000, "step": 10000},
+        "baselines": [{}, {"base_pay_gap": 18.0}],  (optional constant overrides)
+        "metrics": ["pay_gap_reduction", "risk_score"],  (optional)
+        "workers": 8  (optional, default all cores)
+    }
+    """
+    policy_types = params.get("policy_types") or list(POLICY_TYPES.keys())
+    percentages = _expand_values(params.get("percentages"), "percentages")
+    durations = [int(value) for value in _expand_values(params.get("durations"), "durations")]
+    budgets = _expand_values(params.get("budgets"), "budgets")
+    workers = params.get("workers")
+
+    result = run_sharded_sweep(
+        policy_types, percentages, durations, budgets,
+        baselines=params.get("baselines"),
+        metrics=params.get("metrics"),
+        workers=int(workers) if workers else None,
+        progress=job.report_progress
+    )
+    with result:
+        return {
+            "count": result.grid.cell_count,
+            "baselines": result.grid.baselines,
+            "shards": result.shards,
+            "workers": result.workers,
+            "elapsed_seconds": round(result.elapsed, 3),
+            "cells_per_second": round(result.grid.cell_count / result.elapsed) if result.elapsed else None,
+            "metrics": result.summary()
+        }
+
+
+def run_monte_carlo_job(params, job):
+    """
+    Estimate outcome uncertainty around one configuration
+
+    Strength and budget are drawn from normal distributions around the
+    planned values (implementation rarely matches the plan exactly) and
+    clipped to the policy type's valid range.
+
+    Expected params:
+    {
+        "policy": {"policy_type": "equal_pay", "percentage": 75, "duration": 5, "budget": 2000000},
+        "samples": 1000,
+        "percentage_sd": 5,
+        "budget_sd_ratio": 0.1,
+        "seed": 42
+    }
+    """
+    policy = params.get("policy") or {}
+    policy_type = policy.get("policy_type")
+    if policy_type not in POLICY_TYPES:
+        raise ValueError(f"Invalid policy type: {policy_type}")
+
+    percentage = float(policy.get("percentage"))
+    duration = int(policy.get("duration"))
+    budget = float(policy.get("budget"))
+    samples = int(params.get("samples", 1000))
+    percentage_sd = float(params.get("percentage_sd", 5))
+    budget_sd_ratio = float(params.get("budget_sd_ratio", 0.1))
+
+    if samples < 1 or samples > MAX_MONTE_CARLO_SAMPLES:
+        raise ValueError(f"samples must be between 1 and {MAX_MONTE_CARLO_SAMPLES}")
+
+    policy_info = POLICY_TYPES[policy_type]
+    rng = random.Random(params.get("seed"))
+
+    metrics = {
+        "pay_gap_reduction": [],
+        "employment_improvement": [],
+        "female_leadership": [],
+        "total_budget_spent": [],
+        "risk_score": []
+    }
+
+    for sample in range(samples):
+        sampled_percentage = min(
+            max(rng.gauss(percentage, percentage_sd), policy_info["min_percentage"]),
+            policy_info["max_percentage"]
+        )
+        sampled_budget = max(rng.gauss(budget, budget * budget_sd_ratio), 0.0)
+
+        results = simulation_engine.run_simulation(
+            policy_type, sampled_percentage, duration, sampled_budget
+        )
+        metrics["pay_gap_reduction"].append(results.pay_gap_reduction)
+        metrics["employment_improvement"].append(results.employment_improvement)
+        metrics["female_leadership"].append(results.female_leadership[-1])
+        metrics["total_budget_spent"].append(results.total_budget_spent)
+        metrics["risk_score"].append(results.risk_score)
+
+        if sample % PROGRESS_CHUNK_SIZE == 0:
+            job.report_progress(sample, samples)
+
+    job.report_progress(samples, samples)
+
+    return {
+        "samples": samples,
+        "metrics": {name: _summarize(values) for name, values in metrics.items()}
+    }
+
+
+def run_paired_uncertainty_job(params, job):
+    """
+    Compare two policies under coefficient and implementation uncertainty
+
+    Both policies are evaluated on common random numbers, drawn as
+    antithetic pairs of randomized Sobol points by default; see
+    services.paired_uncertainty.
+
+    Expected params:
+    {
+        "policy_a": {"policy_type": "equal_pay", "percentage": 75, "duration": 5, "budget": 2000000},
+        "policy_b": {"policy_type": "parental_leave", "percentage": 80, "duration": 5, "budget": 2000000},
+        "method": "sobol",  (optional: random, antithetic or sobol)
+        "samples": 1024,
+        "replicates": 16,
+        "confidence": 0.95,
+        "coefficient_sd_ratio": 0.15,
+        "percentage_sd": 5,
+        "budget_sd_ratio": 0.1,
+        "seed": 42
+    }
+    """
+    options = {name: value for name, value in params.items() if name not in ("policy_a", "policy_b")}
+    comparison, uncertainty = simulation_engine.compare_policies_under_uncertainty(
+        params.get("policy_a") or {},
+        params.get("policy_b") or {},
+        progress=job.report_progress,
+        **parse_options(options)
+    )
+    return {
+        "comparison": comparison.to_dict(),
+        "uncertainty": uncertainty
+    }
+
+
+def _run_rows(rows, job):
+    """Run parsed rows in chunks, reporting progress after each chunk"""
+    total = len(rows)
+    results = []
+    job.report_progress(0, total)
+
+    for chunk in iter_chunks(rows, PROGRESS_CHUNK_SIZE):
+        results.extend(run_scenario_chunk(chunk))
+        job.report_progress(len(results), total)
+
+    return {
+        "count": total,
+        "errors": sum(1 for record in results if record["status"] == "error"),
+        "results": results
+    }
+
+
+def _expand_values(spec, name):
+    """Expand a list or a {start, stop, step} range into a list of numbers"""
+    if isinstance(spec, dict):
+        start = float(spec["start"])
+        stop = float(spec["stop"])
+        step = float(spec.get("step", 1))
+        if step <= 0:
+            raise ValueError(f"{name} step must be positive")
+        values = []
+        value = start
+        while value <= stop + 1e-9:
+            values.append(round(value, 6))
+            value += step
+        return values
+    if isinstance(spec, list) and spec:
+        return [float(value) for value in spec]
+    raise ValueError(f"{name} must be a non-empty list or a start/stop/step range")
+
+
+def _summarize(values):
+    """Mean, spread and percentiles of a sample"""
+    ordered = sorted(values)
+    count = len(ordered)
+
+    def percentile(q):
+        return ordered[min(int(q * count), count - 1)]
+
+    return {
+        "mean": round(statistics.fmean(ordered), 3),
+        "std": round(statistics.pstdev(ordered), 3),
+        "p5": percentile(0.05),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "min": ordered[0],
+        "max": ordered[-1]
+    }
+
+
+JOB_HANDLERS = {
+    "batch": run_batch_job,
+    "sweep": run_sweep_job,
+    "grid_sweep": run_grid_sweep_job,
+    "monte_carlo": run_monte_carlo_job,
+    "paired_uncertainty": run_paired_uncertainty_job
+}
@@ -0,0 +1,296 @@
+"""
+Paired comparison of two policies under coefficient and implementation uncertainty
+Common random numbers, antithetic pairs and randomized Sobol points give tight intervals from few samples
+"""
+import math
+import random
+import statistics
+from array import array
+
+from services.policy_models import POLICY_TYPES, validate_policy_parameters
+from utilities.calculations import calculate_final_metrics_batch
+from utilities.model_registry import COEFFICIENT_FIELDS, get_model
+from utilities.quasi_random import sobol_points
+
+# Every method draws one world per sample and evaluates both policies in
+# it (common random numbers); antithetic adds the mirror image of every
+# draw, and sobol takes the draws from a randomized Sobol sequence instead
+METHOD_RANDOM = "random"
+METHOD_ANTITHETIC = "antithetic"
+METHOD_SOBOL = "sobol"
+SAMPLING_METHODS = (METHOD_RANDOM, METHOD_ANTITHETIC, METHOD_SOBOL)
+
+DEFAULT_SAMPLES = 1024
+DEFAULT_REPLICATES = 16
+MAX_SAMPLES = 100000
+# Larger runs go through the paired_uncertainty background job
+MAX_INLINE_SAMPLES = 16384
+MIN_REPLICATES = 8
+MAX_REPLICATES = 256
+DEFAULT_CONFIDENCE = 0.95
+
+# Relative spread of every coefficient (log-normal around the registered
+# value), and implementation noise as in the Monte Carlo job
+DEFAULT_COEFFICIENT_SD_RATIO = 0.15
+DEFAULT_PERCENTAGE_SD = 5.0
+DEFAULT_BUDGET_SD_RATIO = 0.1
+
+# Strength and budget are implemented separately for each policy (A's two
+# inputs, then B's); coefficient errors are the model's own and so shared
+# by both policies. The inputs that separate the policies come first, where
+# Sobol points are most even.
+IMPLEMENTATION_OFFSETS = (0, 2)
+COEFFICIENT_OFFSET = 4
+DIMENSIONS = COEFFICIENT_OFFSET + len(COEFFICIENT_FIELDS)
+
+# Final metrics compared, with the direction in which a policy is better
+COMPARED_METRICS = (
+    ("pay_gap_reduction", "higher"),
+    ("employment_improvement", "higher"),
+    ("female_leadership", "higher"),
+    ("total_budget_spent", "lower"),
+    ("risk_score", "lower")
+)
+
+
+class _SampledModel:
+    """One policy type's coefficients with one drawn row per sample, as calculate_final_metrics_batch reads them"""
+
+    def __init__(self, model, policy_type, draws, coefficient_sd_ratio):
+        i = model.index_of(policy_type)
+        self.constants = model.constants
+        for k, field in enumerate(COEFFICIENT_FIELDS, start=COEFFICIENT_OFFSET):
+            value = getattr(model, field)[i]
+            setattr(self, field, array("d", (value * math.exp(coefficient_sd_ratio * z[k]) for z in draws)))
+
+    def indices(self, policy_types):
+        return range(len(policy_types))
+
+
+def compare_under_uncertainty(policy_a_params, policy_b_params, method=METHOD_SOBOL,
+                              samples=DEFAULT_SAMPLES, replicates=DEFAULT_REPLICATES,
+                              confidence=DEFAULT_CONFIDENCE,
+                              coefficient_sd_ratio=DEFAULT_COEFFICIENT_SD_RATIO,
+                              percentage_sd=DEFAULT_PERCENTAGE_SD,
+                              budget_sd_ratio=DEFAULT_BUDGET_SD_RATIO,
+                              seed=None, progress=None):
+    """
+    Estimate how likely policy A is to beat policy B on each final metric
+
+    Every model coefficient has a log-normal error that applies to both
+    policies alike, and each policy's strength and budget are implemented
+    with their own noise. Both policies are evaluated in the same sampled
+    world, so the shared error cancels out of their difference instead of
+    swamping it. The samples are split into
+    independently randomized replicates, and the spread of the replicate
+    estimates gives the confidence intervals for every method alike.
+    Sample counts whose share per replicate is a power of two balance the
+    Sobol points best.
+
+    Args:
+        policy_a_params: Dictionary with policy A parameters
+        policy_b_params: Dictionary with policy B parameters
+        method: One of SAMPLING_METHODS
+        samples: Total samples per policy
+        replicates: Independent randomizations the samples are split into
+        confidence: Confidence level of the intervals
+        coefficient_sd_ratio: Log-normal spread of each coefficient
+        percentage_sd: Standard deviation of the implemented strength
+        budget_sd_ratio: Standard deviation of the budget as a share of it
+        seed: Seed of the randomization (None for a fresh one)
+        progress: Optional callable(done, total), called after each replicate
+
+    Returns:
+        Dictionary with the settings used and, per metric, the means of both
+        policies, the probability that A is better (ties count half) and the
+        mean difference A - B, each with a confidence interval
+
+    Raises:
+        ValueError: Invalid policy, method or sampling settings
+    """
+    policy_a = _policy(policy_a_params)
+    policy_b = _policy(policy_b_params)
+
+    if method not in SAMPLING_METHODS:
+        raise ValueError(f"Invalid method: {method}. Must be one of {', '.join(SAMPLING_METHODS)}")
+    if replicates < MIN_REPLICATES or replicates > MAX_REPLICATES:
+        raise ValueError(f"replicates must be between {MIN_REPLICATES} and {MAX_REPLICATES}")
+    if samples < 2 * replicates or samples > MAX_SAMPLES:
+        raise ValueError(f"samples must be between {2 * replicates} and {MAX_SAMPLES}")
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    if coefficient_sd_ratio < 0 or percentage_sd < 0 or budget_sd_ratio < 0:
+        raise ValueError("Uncertainty spreads must not be negative")
+
+    # Read the model once so a concurrent reload never mixes versions
+    model = get_model()
+    rng = random.Random(seed)
+    per_replicate = samples // replicates
+    if method != METHOD_RANDOM:
+        per_replicate -= per_replicate % 2
+    spreads = (coefficient_sd_ratio, percentage_sd, budget_sd_ratio)
+
+    probabilities = {name: [] for name, _ in COMPARED_METRICS}
+    differences = {name: [] for name, _ in COMPARED_METRICS}
+    totals = {name: [0.0, 0.0] for name, _ in COMPARED_METRICS}
+
+    for replicate in range(replicates):
+        draws = _draw(method, per_replicate, rng)
+        metrics_a = _evaluate(model, policy_a, draws, IMPLEMENTATION_OFFSETS[0], spreads)
+        metrics_b = _evaluate(model, policy_b, draws, IMPLEMENTATION_OFFSETS[1], spreads)
+
+        for name, better in COMPARED_METRICS:
+            values_a = metrics_a[name]
+            values_b = metrics_b[name]
+            wins = 0.0
+            for value_a, value_b in zip(values_a, values_b):
+                if value_a == value_b:
+                    wins += 0.5
+                elif (value_a > value_b) == (better == "higher"):
+                    wins += 1.0
+            probabilities[name].append(wins / per_replicate)
+            differences[name].append(math.fsum(a - b for a, b in zip(values_a, values_b)) / per_replicate)
+            totals[name][0] += math.fsum(values_a)
+            totals[name][1] += math.fsum(values_b)
+
+        if progress is not None:
+            progress(replicate + 1, replicates)
+
+    t = _t_quantile((1 + confidence) / 2, replicates - 1)
+    count = per_replicate * replicates
+    return {
+        "method": method,
+        "samples": count,
+        "replicates": replicates,
+        "confidence": confidence,
+        "uncertainty": {
+            "coefficient_sd_ratio": coefficient_sd_ratio,
+            "percentage_sd": percentage_sd,
+            "budget_sd_ratio": budget_sd_ratio
+        },
+        "metrics": {
+            name: {
+                "better": better,
+                "mean_a": round(totals[name][0] / count, 4),
+                "mean_b": round(totals[name][1] / count, 4),
+                "probability_a_better": _interval(probabilities[name], t, 0.0, 1.0),
+                "mean_difference": _interval(differences[name], t)
+            }
+            for name, better in COMPARED_METRICS
+        }
+    }
+
+
+def parse_options(options):
+    """
+    Keyword arguments of compare_under_uncertainty from a JSON object
+
+    Returns:
+        Dictionary with the options that were given, converted to numbers
+
+    Raises:
+        ValueError: An option is unknown or not a number
+    """
+    converters = {
+        "method": str,
+        "samples": int,
+        "replicates": int,
+        "confidence": float,
+        "coefficient_sd_ratio": float,
+        "percentage_sd": float,
+        "budget_sd_ratio": float,
+        "seed": int
+    }
+    unknown = [name for name in options if name not in converters]
+    if unknown:
+        raise ValueError(f"Unknown uncertainty options: {', '.join(unknown)}")
+    try:
+        return {name: converters[name](value) for name, value in options.items() if value is not None}
+    except (TypeError, ValueError):
+        raise ValueError("Uncertainty options must be numbers (method a string)")
+
+
+def _policy(params):
+    """Validated policy type, strength, duration and budget of one policy"""
+    params = params or {}
+    try:
+        policy = {
+            "policy_type": params.get("policy_type"),
+            "percentage": float(params.get("percentage")),
+            "duration": int(params.get("duration")),
+            "budget": float(params.get("budget"))
+        }
+    except (TypeError, ValueError):
+        raise ValueError("percentage, duration and budget must be numbers")
+
+    is_valid, error = validate_policy_parameters(**policy)
+    if not is_valid:
+        raise ValueError(error)
+    return policy
+
+
+def _draw(method, count, rng):
+    """Standard normal inputs of every sample"""
+    if method == METHOD_RANDOM:
+        return _gaussian(count, rng)
+
+    if method == METHOD_ANTITHETIC:
+        half = _gaussian(count // 2, rng)
+    else:
+        normal = statistics.NormalDist()
+        half = [
+            tuple(normal.inv_cdf(u) for u in point)
+            for point in sobol_points(count // 2, DIMENSIONS, seed=rng.getrandbits(64))
+        ]
+    # Mirrored draws: u and 1 - u map to z and -z
+    return half + [tuple(-z for z in point) for point in half]
+
+
+def _gaussian(count, rng):
+    return [tuple(rng.gauss(0.0, 1.0) for _ in range(DIMENSIONS)) for _ in range(count)]
+
+
+def _evaluate(model, policy, draws, offset, spreads):
+    """Final metrics of one policy for every draw, its strength and budget noise read at offset"""
+    coefficient_sd_ratio, percentage_sd, budget_sd_ratio = spreads
+    policy_type = policy["policy_type"]
+    info = POLICY_TYPES[policy_type]
+    low, high = info["min_percentage"], info["max_percentage"]
+    count = len(draws)
+
+    percentages = [min(max(policy["percentage"] + percentage_sd * z[offset], low), high) for z in draws]
+    budgets = [max(policy["budget"] * (1 + budget_sd_ratio * z[offset + 1]), 0.0) for z in draws]
+    return calculate_final_metrics_batch(
+        [policy_type] * count,
+        percentages,
+        [policy["duration"]] * count,
+        budgets,
+        model=_SampledModel(model, policy_type, draws, coefficient_sd_ratio)
+    )
+
+
+def _interval(values, t, low=None, high=None):
+    """Mean of replicate estimates with its standard error and confidence interval"""
+    estimate = statistics.fmean(values)
+    error = statistics.stdev(values) / math.sqrt(len(values))
+    lower = estimate - t * error
+    upper = estimate + t * error
+    if low is not None:
+        lower = max(lower, low)
+        upper = min(upper, high)
+    return {
+        "estimate": round(estimate, 4),
+        "std_error": round(error, 6),
+        "ci_low": round(lower, 4),
+        "ci_high": round(upper, 4)
+    }
+
+
+def _t_quantile(p, df):
+    """Student t quantile from the normal one (Cornish-Fisher expansion, within 0.2% for df >= 7 up to 99.9%)"""
+    z = statistics.NormalDist().inv_cdf(p)
+    g1 = (z ** 3 + z) / 4
+    g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+    g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+    g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+    return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
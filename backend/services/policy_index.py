@@ -0,0 +1,307 @@
+"""
+Persistent, queryable index over the discretized policy space
+Answers range, filter and top-k queries over outcome metrics of every feasible configuration
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from utilities.calculations import calculate_final_metrics_batch, get_risk_level_label
+from utilities.model_registry import get_model
+
+# Discretization of the parameter space; budgets span each type's typical range
+PERCENTAGE_STEP = 1
+DURATIONS = tuple(range(1, 11))
+BUDGET_LEVELS = 21
+
+PARAMETER_COLUMNS = ("policy_type", "percentage", "duration", "budget")
+METRIC_COLUMNS = (
+    "final_pay_gap",
+    "pay_gap_reduction",
+    "final_employment_ratio",
+    "employment_improvement",
+    "female_leadership",
+    "total_budget_spent",
+    "risk_score"
+)
+QUERY_COLUMNS = PARAMETER_COLUMNS + METRIC_COLUMNS + ("risk_level",)
+
+OPERATORS = {"lt": "<", "lte": "<=", "gt": ">", "gte": ">=", "eq": "=", "ne": "!="}
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 1000
+BUILD_CHUNK_ROWS = 4096
+
+DEFAULT_INDEX_FILE = os.path.join(tempfile.gettempdir(), "policysim_policy_index.sqlite")
+
+
+def index_grid(model):
+    """
+    Discretized axes of every policy type in a model
+
+    Returns:
+        Dictionary of policy type to its percentages, durations and budgets
+    """
+    grid = {}
+    for policy_type, info in model.policy_info.items():
+        low, high = info["min_percentage"], info["max_percentage"]
+        percentages = [float(p) for p in range(int(low), int(high) + 1, PERCENTAGE_STEP)]
+        if percentages[-1] != high:
+            percentages.append(float(high))
+
+        min_budget, max_budget = info["typical_budget_range"]
+        step = (max_budget - min_budget) / (BUDGET_LEVELS - 1)
+        budgets = [round(min_budget + n * step, 2) for n in range(BUDGET_LEVELS)]
+
+        grid[policy_type] = {
+            "percentages": percentages,
+            "durations": list(DURATIONS),
+            "budgets": budgets
+        }
+    return grid
+
+
+class PolicySpaceIndex:
+    """
+    SQLite index of outcome metrics over the discretized policy space
+
+    Every metric column carries its own B-tree index, so a range filter on
+    one metric narrows the scan and a top-k on one metric reads the index
+    in order. The file records the model version and grid it was built
+    from; the first query after a model change rebuilds it. Builds write a
+    temporary file and swap it in, so other workers keep reading the old
+    index until the new one is complete.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("POLICYSIM_INDEX_FILE") or DEFAULT_INDEX_FILE
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._model_version = None
+        self.last_build = None
+
+    def ensure_current(self):
+        """Make sure the index on disk matches the current model, rebuilding it if not"""
+        model = get_model()
+        if self._model_version == model.model_version:
+            return model.model_version
+
+        with self._lock:
+            if self._model_version != model.model_version:
+                grid = index_grid(model)
+                if self._read_meta() != (model.model_version, grid):
+                    self.rebuild(model, grid)
+                self._model_version = model.model_version
+        return model.model_version
+
+    def rebuild(self, model=None, grid=None):
+        """
+        Evaluate every configuration and write a fresh index file
+
+        Returns:
+            Dictionary with the row count and build time
+        """
+        model = model or get_model()
+        grid = grid or index_grid(model)
+        started = time.perf_counter()
+
+        temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.execute(
+                "CREATE TABLE configs (id INTEGER PRIMARY KEY, policy_type TEXT, percentage REAL, "
+                "duration INTEGER, budget REAL, "
+                + ", ".join(f"{column} REAL" for column in METRIC_COLUMNS)
+                + ", risk_level TEXT)"
+            )
+
+            rows = 0
+            insert = (f"INSERT INTO configs ({', '.join(QUERY_COLUMNS)}) "
+                      f"VALUES ({', '.join('?' for _ in QUERY_COLUMNS)})")
+            for chunk in _grid_chunks(grid):
+                metrics = calculate_final_metrics_batch(*chunk, model=model)
+                columns = list(chunk) + [metrics[metric] for metric in METRIC_COLUMNS]
+                columns.append([get_risk_level_label(score) for score in metrics["risk_score"]])
+                connection.executemany(insert, zip(*columns))
+                rows += len(chunk[0])
+
+            # Indexes are cheaper to build once over the full table
+            for column in METRIC_COLUMNS + ("budget",):
+                connection.execute(f"CREATE INDEX configs_{column} ON configs ({column})")
+            connection.execute("CREATE INDEX configs_params ON configs (policy_type, duration, percentage)")
+
+            elapsed = time.perf_counter() - started
+            connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+                ("model_version", model.model_version),
+                ("grid", json.dumps(grid, sort_keys=True)),
+                ("rows", str(rows)),
+                ("built_at", str(time.time())),
+                ("build_seconds", str(round(elapsed, 3)))
+            ])
+            connection.commit()
+            connection.execute("ANALYZE")
+            connection.commit()
+        except BaseException:
+            connection.close()
+            os.remove(temp_path)
+            raise
+        connection.close()
+        os.replace(temp_path, self.path)
+
+        self.last_build = {"model_version": model.model_version, "rows": rows, "seconds": round(elapsed, 3)}
+        return self.last_build
+
+    def query(self, where=None, policy_types=None, order_by=None, descending=False,
+              limit=DEFAULT_LIMIT, offset=0, columns=None):
+        """
+        Filter, sort and page the configurations in the index
+
+        Args:
+            where: Dictionary of column to conditions, each a dictionary of
+                operator (lt, lte, gt, gte, eq, ne, in) to value, for example
+                {"risk_score": {"lt": 30}, "pay_gap_reduction": {"gt": 10}}
+            policy_types: Restrict to these policy types
+            order_by: Column to sort by (default index order)
+            descending: Sort descending, so a limit returns the top k
+            limit: Maximum rows to return (up to MAX_LIMIT)
+            offset: Rows to skip
+            columns: Columns to return (default all)
+
+        Returns:
+            Dictionary with the matching row count, the returned rows and
+            the model version they were computed with
+
+        Raises:
+            ValueError: Unknown columns or operators, or an invalid limit
+        """
+        clauses, values = _where_clause(where or {}, policy_types)
+        columns = list(columns or QUERY_COLUMNS)
+        unknown = [column for column in columns if column not in QUERY_COLUMNS]
+        if order_by is not None and order_by not in QUERY_COLUMNS:
+            unknown.append(order_by)
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+
+        limit = int(limit)
+        offset = int(offset)
+        if limit < 1 or limit > MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {MAX_LIMIT}")
+        if offset < 0:
+            raise ValueError("Offset must not be negative")
+
+        where_sql = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        order_sql = f" ORDER BY {order_by or 'id'} {'DESC' if descending else 'ASC'}, id"
+
+        started = time.perf_counter()
+        model_version = self.ensure_current()
+        connection = self._connection()
+        count = connection.execute(f"SELECT COUNT(*) FROM configs{where_sql}", values).fetchone()[0]
+        cursor = connection.execute(
+            f"SELECT {', '.join(columns)} FROM configs{where_sql}{order_sql} LIMIT ? OFFSET ?",
+            values + [limit, offset]
+        )
+        rows = [dict(zip(columns, row)) for row in cursor]
+
+        return {
+            "model_version": model_version,
+            "count": count,
+            "rows": rows,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)
+        }
+
+    def stats(self):
+        """Model version, size and grid of the index on disk"""
+        self.ensure_current()
+        meta = dict(self._connection().execute("SELECT key, value FROM meta"))
+        grid = json.loads(meta["grid"])
+        return {
+            "path": self.path,
+            "model_version": meta["model_version"],
+            "rows": int(meta["rows"]),
+            "built_at": float(meta["built_at"]),
+            "build_seconds": float(meta["build_seconds"]),
+            "grid": {
+                policy_type: {axis: [values[0], values[-1], len(values)] for axis, values in axes.items()}
+                for policy_type, axes in grid.items()
+            },
+            "columns": list(QUERY_COLUMNS)
+        }
+
+    def _connection(self):
+        """Read-only connection of this thread, reopened after a rebuild swaps the file"""
+        local = self._local
+        if getattr(local, "model_version", None) != self._model_version:
+            if getattr(local, "connection", None) is not None:
+                local.connection.close()
+            local.connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            local.model_version = self._model_version
+        return local.connection
+
+    def _read_meta(self):
+        """(model version, grid) recorded in the index file, or None if it is missing or unreadable"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            try:
+                meta = dict(connection.execute("SELECT key, value FROM meta"))
+            finally:
+                connection.close()
+            return meta["model_version"], json.loads(meta["grid"])
+        except (sqlite3.DatabaseError, KeyError, ValueError):
+            return None
+
+
+def _grid_chunks(grid):
+    """Yield column chunks (types, percentages, durations, budgets) covering the grid"""
+    chunk = ([], [], [], [])
+    for policy_type, axes in grid.items():
+        for percentage in axes["percentages"]:
+            for duration in axes["durations"]:
+                for budget in axes["budgets"]:
+                    chunk[0].append(policy_type)
+                    chunk[1].append(percentage)
+                    chunk[2].append(duration)
+                    chunk[3].append(budget)
+                    if len(chunk[0]) >= BUILD_CHUNK_ROWS:
+                        yield chunk
+                        chunk = ([], [], [], [])
+    if chunk[0]:
+        yield chunk
+
+
+def _where_clause(where, policy_types):
+    """Translate query conditions into SQL clauses and parameters"""
+    clauses = []
+    values = []
+    for column, conditions in where.items():
+        if column not in QUERY_COLUMNS:
+            raise ValueError(f"Unknown columns: {column}")
+        if not isinstance(conditions, dict):
+            conditions = {"eq": conditions}
+        for operator, value in conditions.items():
+            if operator == "in":
+                value = list(value)
+                if not value:
+                    raise ValueError(f"Empty 'in' condition on {column}")
+                clauses.append(f"{column} IN ({', '.join('?' for _ in value)})")
+                values.extend(value)
+            elif operator in OPERATORS:
+                clauses.append(f"{column} {OPERATORS[operator]} ?")
+                values.append(value)
+            else:
+                raise ValueError(f"Unknown operator: {operator}")
+
+    if policy_types:
+        clauses.append(f"policy_type IN ({', '.join('?' for _ in policy_types)})")
+        values.extend(policy_types)
+    return clauses, values
+
+
+# Create singleton instance
+policy_space_index = PolicySpaceIndex()
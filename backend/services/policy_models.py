@@ -2,38 +2,11 @@
 Policy models and configurations
 """
 
-POLICY_TYPES = {
-    "equal_pay": {
-        "name": "Equal Pay Policy",
-        "description": "Mandates equal pay for equal work across gender lines",
-        "min_percentage": 50,
-        "max_percentage": 100,
-        "typical_budget_range": [500000, 5000000],
-        "effectiveness": "high",
-        "time_to_impact": "medium",
-        "political_difficulty": "medium"
-    },
-    "leadership_quota": {
-        "name": "Leadership Quota",
-        "description": "Requires minimum percentage of women in leadership positions",
-        "min_percentage": 30,
-        "max_percentage": 50,
-        "typical_budget_range": [300000, 3000000],
-        "effectiveness": "medium",
-        "time_to_impact": "long",
-        "political_difficulty": "high"
-    },
-    "parental_leave": {
-        "name": "Parental Leave Expansion",
-        "description": "Extended paid parental leave for both parents",
-        "min_percentage": 50,
-        "max_percentage": 100,
-        "typical_budget_range": [1000000, 10000000],
-        "effectiveness": "medium",
-        "time_to_impact": "long",
-        "political_difficulty": "low"
-    }
-}
+from utilities.model_registry import model_registry, get_model
+
+# Policy metadata is defined in the model registry; this read-only mapping
+# always reads the current model, so it lists the registered types.
+POLICY_TYPES = model_registry.policy_info
 
 
 def get_policy_info(policy_type):
@@ -65,6 +38,44 @@ def validate_policy_parameters(policy_type, percentage, duration, budget):
     return True, None
 
 
+def validate_schedule_parameters(policy_type, percentages, budgets):
+    """
+    Validate per-year strength and budget schedules
+    
+    Every year runs at a strength inside the policy type's range or at 0
+    (paused); the schedules cover 1-10 years and at least one year is active.
+    
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if policy_type not in POLICY_TYPES:
+        return False, f"Invalid policy type: {policy_type}"
+    
+    policy_info = POLICY_TYPES[policy_type]
+    
+    if len(percentages) != len(budgets):
+        return False, "Strength and budget schedules must cover the same years"
+    
+    if len(percentages) < 1 or len(percentages) > 10:
+        return False, "Duration must be between 1 and 10 years"
+    
+    for year, percentage in enumerate(percentages, start=1):
+        if percentage != 0 and (percentage < policy_info["min_percentage"]
+                                or percentage > policy_info["max_percentage"]):
+            return False, (
+                f"Year {year}: percentage must be 0 or between "
+                f"{policy_info['min_percentage']} and {policy_info['max_percentage']}"
+            )
+    
+    if not any(percentages):
+        return False, "At least one year must have a non-zero strength"
+    
+    if any(budget < 0 for budget in budgets):
+        return False, "Budget must be positive"
+    
+    return True, None
+
+
 def get_policy_recommendations(policy_type, percentage, budget):
     """
     Get recommendations for policy implementation
@@ -103,4 +114,71 @@ def get_policy_recommendations(policy_type, percentage, budget):
             "🤝 This policy typically faces political challenges. Build coalition support early"
         )
     
-    return recommendations
\ No newline at end of file
+    return recommendations
+
+
+def get_interaction_key(policy_type_a, policy_type_b):
+    """Build the interaction key for a pair of policy types"""
+    return "+".join(sorted([policy_type_a, policy_type_b]))
+
+
+def get_interaction_effect(policy_type_a, policy_type_b, overrides=None):
+    """
+    Get the interaction effect between two policy types
+
+    Args:
+        policy_type_a: First policy type
+        policy_type_b: Second policy type
+        overrides: Optional dictionary overriding the model's interaction effects
+
+    Returns:
+        Interaction coefficient (positive = synergy, negative = overlap)
+    """
+    key = get_interaction_key(policy_type_a, policy_type_b)
+    if overrides and key in overrides:
+        return float(overrides[key])
+    return get_model().interactions.get(key, 0.0)
+
+
+def get_interaction_multipliers(components, overrides=None):
+    """
+    Get the effect multiplier of each policy in a portfolio
+
+    Args:
+        components: List of dictionaries with policy_type and percentage
+        overrides: Optional dictionary overriding the model's interaction effects
+
+    Returns:
+        List of multipliers aligned with components
+    """
+    multipliers = []
+    for i, component in enumerate(components):
+        multiplier = 1.0
+        for j, partner in enumerate(components):
+            if i != j:
+                effect = get_interaction_effect(
+                    component["policy_type"], partner["policy_type"], overrides
+                )
+                multiplier += effect * partner["percentage"] / 100
+        multipliers.append(max(multiplier, 0.0))
+    
+    return multipliers
+
+
+def get_funding_requirement(policy_type, percentage, duration):
+    """
+    Get the budget needed to run a policy at a given strength
+
+    The typical budget range is read as a cost curve: the low end funds the
+    minimum strength and the high end the maximum strength of a 5 year program.
+
+    Returns:
+        Minimum total budget required
+    """
+    policy_info = POLICY_TYPES[policy_type]
+    min_budget, max_budget = policy_info["typical_budget_range"]
+    span = policy_info["max_percentage"] - policy_info["min_percentage"]
+    position = (percentage - policy_info["min_percentage"]) / span if span else 1.0
+    position = min(max(position, 0.0), 1.0)
+    
+    return (min_budget + (max_budget - min_budget) * position) * (duration / 5)
@@ -0,0 +1,284 @@
+"""
+Portfolio optimizer for combined policy interventions
+Searches budget and strength allocations across policy types
+"""
+import math
+import time
+from array import array
+
+from utilities.model_registry import get_model
+from utilities.calculations import (
+    get_pay_gap_rate,
+    get_policy_risk_modifier,
+    calculate_portfolio_risk_score
+)
+from services.policy_models import (
+    POLICY_TYPES,
+    get_interaction_effect,
+    get_funding_requirement
+)
+from services.simulation_engine import simulation_engine
+
+
+class PortfolioOptimizer:
+    """
+    Branch-and-bound search over policy portfolios
+
+    Every policy type contributes a list of options (strength plus the
+    smallest budget on the grid that funds it, or "not included"). Options
+    are evaluated once per search into flat arrays; the search then walks
+    the types depth first, pruning branches whose optimistic pay gap bound
+    cannot beat the incumbent or whose risk already exceeds the ceiling.
+    """
+
+    def optimize(self, total_budget, duration, risk_ceiling=60, policy_types=None,
+                 percentage_step=5, budget_step=50000, interactions=None):
+        """
+        Find the portfolio with the largest pay gap reduction
+
+        Args:
+            total_budget: Budget shared by all policies
+            duration: Shared program duration in years (1-10)
+            risk_ceiling: Maximum acceptable portfolio risk score
+            policy_types: Policy types to consider (defaults to all)
+            percentage_step: Strength grid step in percentage points
+            budget_step: Budget grid step; allocations are rounded up to it
+            interactions: Optional overrides for the model's interaction effects
+
+        Returns:
+            Dictionary with the best allocation, its simulation and search statistics
+        """
+        started = time.perf_counter()
+
+        policy_types = list(policy_types or POLICY_TYPES.keys())
+        self._validate(total_budget, duration, risk_ceiling, policy_types,
+                       percentage_step, budget_step)
+
+        tables = [
+            self._build_options(policy_type, duration, total_budget, percentage_step, budget_step)
+            for policy_type in policy_types
+        ]
+        # Search the most effective types first so good incumbents appear early
+        order = sorted(range(len(policy_types)), key=lambda i: -max(tables[i]["rate"], default=0.0))
+        policy_types = [policy_types[i] for i in order]
+        tables = [tables[i] for i in order]
+
+        effects = [
+            [
+                get_interaction_effect(a, b, interactions) if a != b else 0.0
+                for b in policy_types
+            ]
+            for a in policy_types
+        ]
+
+        state = {
+            "best_key": (0.0, 0.0, 0.0),
+            "best_choice": None,
+            "nodes": 0,
+            "pruned": 0,
+            "leaves": 0
+        }
+        search = _Search(tables, effects, duration, total_budget, risk_ceiling, state)
+        search.run()
+
+        if state["best_choice"] is None:
+            raise ValueError(
+                f"No portfolio fits a budget of ${total_budget:,.0f} under risk ceiling {risk_ceiling}"
+            )
+
+        policies = [
+            {
+                "policy_type": policy_types[level],
+                "percentage": tables[level]["percentage"][index],
+                "budget": tables[level]["budget"][index]
+            }
+            for level, index in enumerate(state["best_choice"])
+            if index is not None
+        ]
+        simulation = simulation_engine.run_portfolio_simulation(
+            policies,
+            duration,
+            interactions=interactions,
+            portfolio_name="Optimized Portfolio"
+        )
+
+        return {
+            "allocation": policies,
+            "unallocated_budget": round(total_budget - sum(p["budget"] for p in policies), 2),
+            "simulation": simulation,
+            "search": {
+                "nodes_visited": state["nodes"],
+                "branches_pruned": state["pruned"],
+                "portfolios_evaluated": state["leaves"],
+                "search_space": math.prod(len(table["rate"]) + 1 for table in tables),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+        }
+
+    def _validate(self, total_budget, duration, risk_ceiling, policy_types,
+                  percentage_step, budget_step):
+        """Validate optimizer inputs"""
+        if total_budget <= 0:
+            raise ValueError("Total budget must be positive")
+        if duration < 1 or duration > 10:
+            raise ValueError("Duration must be between 1 and 10 years")
+        if risk_ceiling <= 0 or risk_ceiling > 100:
+            raise ValueError("Risk ceiling must be between 0 and 100")
+        if percentage_step <= 0 or budget_step <= 0:
+            raise ValueError("Grid steps must be positive")
+        if len(set(policy_types)) != len(policy_types):
+            raise ValueError("Policy types must be unique")
+        for policy_type in policy_types:
+            if policy_type not in POLICY_TYPES:
+                raise ValueError(f"Invalid policy type: {policy_type}")
+
+    def _build_options(self, policy_type, duration, total_budget, percentage_step, budget_step):
+        """
+        Evaluate every affordable strength of one policy type
+
+        Spending more than the funding requirement never improves outcomes
+        and only raises risk, so each strength keeps only its cheapest
+        funded budget on the grid.
+        """
+        policy_info = POLICY_TYPES[policy_type]
+        modifier = get_policy_risk_modifier(policy_type)
+
+        table = {
+            "percentage": array("d"),
+            "budget": array("d"),
+            "rate": array("d"),
+            "intensity_risk": array("d"),
+            "modifier": modifier
+        }
+
+        percentage = float(policy_info["min_percentage"])
+        while percentage <= policy_info["max_percentage"]:
+            required = get_funding_requirement(policy_type, percentage, duration)
+            budget = math.ceil(required / budget_step) * budget_step
+            if budget <= total_budget:
+                table["percentage"].append(percentage)
+                table["budget"].append(budget)
+                table["rate"].append(get_pay_gap_rate(policy_type, percentage))
+                table["intensity_risk"].append((percentage / 100) * 25 * modifier)
+            percentage += percentage_step
+
+        return table
+
+
+class _Search:
+    """Depth-first branch-and-bound state for one optimization"""
+
+    def __init__(self, tables, effects, duration, total_budget, risk_ceiling, state):
+        self.tables = tables
+        self.effects = effects
+        self.duration = duration
+        self.total_budget = total_budget
+        self.risk_ceiling = risk_ceiling
+        self.state = state
+        self.levels = len(tables)
+        constants = get_model().constants
+        self.base_gap = constants["base_pay_gap"]
+        self.cap = self.base_gap * constants["max_gap_reduction_share"]
+
+        # Largest rate and strength reachable per type, for optimistic bounds
+        self.max_rate = [max(table["rate"], default=0.0) for table in tables]
+        self.max_percentage = [max(table["percentage"], default=0.0) for table in tables]
+
+    def run(self):
+        """Run the search from the root"""
+        self._visit(0, [], 0.0, 0.0, 0.0)
+
+    def _reduction(self, exponent_rate):
+        """Final pay gap reduction for a combined yearly rate"""
+        reduction = self.base_gap * (1 - math.exp(-exponent_rate * self.duration))
+        return min(reduction, self.cap)
+
+    def _risk(self, budget, max_modifier, intensity_risk):
+        """Portfolio risk score from aggregated terms"""
+        return calculate_portfolio_risk_score(budget, self.duration, max_modifier, intensity_risk)
+
+    def _bound(self, level, choice):
+        """Optimistic combined rate for any completion of a partial choice"""
+        strengths = []
+        for j in range(self.levels):
+            if j < level:
+                index = choice[j]
+                strengths.append(0.0 if index is None else self.tables[j]["percentage"][index])
+            else:
+                strengths.append(self.max_percentage[j])
+
+        total = 0.0
+        for i in range(self.levels):
+            if i < level:
+                index = choice[i]
+                if index is None:
+                    continue
+                rate = self.tables[i]["rate"][index]
+            else:
+                rate = self.max_rate[i]
+            multiplier = 1.0
+            for j in range(self.levels):
+                effect = self.effects[i][j]
+                if j < level:
+                    multiplier += effect * strengths[j] / 100
+                elif effect > 0:
+                    multiplier += effect * strengths[j] / 100
+            total += rate * max(multiplier, 0.0)
+        return total
+
+    def _exact_rate(self, choice):
+        """Combined rate of a complete choice including interactions"""
+        total = 0.0
+        for i, index in enumerate(choice):
+            if index is None:
+                continue
+            multiplier = 1.0
+            for j, partner in enumerate(choice):
+                if partner is not None and i != j:
+                    multiplier += self.effects[i][j] * self.tables[j]["percentage"][partner] / 100
+            total += self.tables[i]["rate"][index] * max(multiplier, 0.0)
+        return total
+
+    def _visit(self, level, choice, budget, max_modifier, intensity_risk):
+        """Expand one node of the search tree"""
+        state = self.state
+        state["nodes"] += 1
+
+        risk_floor = self._risk(budget, max_modifier, intensity_risk)
+        optimistic = (self._reduction(self._bound(level, choice)), -risk_floor, -budget)
+        if risk_floor > self.risk_ceiling or optimistic <= state["best_key"]:
+            state["pruned"] += 1
+            return
+
+        if level == self.levels:
+            state["leaves"] += 1
+            if all(index is None for index in choice):
+                return
+            key = (self._reduction(self._exact_rate(choice)), -risk_floor, -budget)
+            if key > state["best_key"]:
+                state["best_key"] = key
+                state["best_choice"] = list(choice)
+            return
+
+        table = self.tables[level]
+        remaining = self.total_budget - budget
+        modifier = table["modifier"]
+        next_modifier = max(max_modifier, modifier)
+
+        # Strongest options first so strong incumbents tighten the bound early
+        for index in range(len(table["rate"]) - 1, -1, -1):
+            option_budget = table["budget"][index]
+            if option_budget > remaining:
+                continue
+            choice.append(index)
+            self._visit(level + 1, choice, budget + option_budget, next_modifier,
+                        intensity_risk + table["intensity_risk"][index])
+            choice.pop()
+
+        choice.append(None)
+        self._visit(level + 1, choice, budget, max_modifier, intensity_risk)
+        choice.pop()
+
+
+# Create singleton instance
+portfolio_optimizer = PortfolioOptimizer()
@@ -0,0 +1,223 @@
+"""
+Low-latency previews of final metrics and risk for live form updates
+Serves from per-model precomputed tables and drops superseded requests
+"""
+import threading
+from collections import OrderedDict
+
+from utilities.calculations import (
+    calculate_final_metrics_batch,
+    calculate_female_leadership,
+    calculate_pay_gap_reduction,
+    get_risk_level_label
+)
+from utilities.model_registry import get_model
+from services.policy_models import validate_policy_parameters
+
+MIN_DURATION = 1
+MAX_DURATION = 10
+SPARKLINE_POINTS = 6
+MAX_SPARKLINE_POINTS = MAX_DURATION + 1
+MAX_TRACKED_CLIENTS = 10000
+
+
+def sparkline_years(duration, points):
+    """Evenly spaced years from 0 to duration, at most points of them"""
+    points = max(2, min(points, duration + 1))
+    return sorted({round(k * duration / (points - 1)) for k in range(points)})
+
+
+class PreviewTables:
+    """
+    Budget-independent final metrics for every integer strength and duration
+
+    Pay gap, employment and leadership at the final year do not depend on
+    the budget, so they are evaluated once per model for each policy type,
+    integer percentage in the type's range and duration 1-10. Spending and
+    risk are cheap closed forms in the budget and are computed per request.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.model_version = model.model_version
+        self.metrics = {}
+        self.pay_gap = {}
+
+        keys = [
+            (policy_type, percentage, duration)
+            for policy_type, info in model.policy_info.items()
+            for percentage in range(int(info["min_percentage"]), int(info["max_percentage"]) + 1)
+            for duration in range(MIN_DURATION, MAX_DURATION + 1)
+        ]
+        policy_types = [key[0] for key in keys]
+        percentages = [float(key[1]) for key in keys]
+        durations = [key[2] for key in keys]
+        batch = calculate_final_metrics_batch(policy_types, percentages, durations, [0.0] * len(keys))
+
+        base_gap = model.constants["base_pay_gap"]
+        for n, key in enumerate(keys):
+            policy_type, percentage, duration = key
+            female = calculate_female_leadership(policy_type, float(percentage), duration, duration)
+            self.metrics[key] = (
+                batch["final_pay_gap"][n],
+                batch["pay_gap_reduction"][n],
+                batch["final_employment_ratio"][n],
+                batch["employment_improvement"][n],
+                round(female, 1),
+                round(100 - female, 1)
+            )
+            self.pay_gap[key] = tuple(
+                round(base_gap - calculate_pay_gap_reduction(policy_type, float(percentage), year, duration), 2)
+                for year in range(duration + 1)
+            )
+
+
+class PreviewService:
+    """
+    Answers preview requests for slider drags
+
+    Clients tag requests with an increasing seq number. A request whose seq
+    is older than one already seen from the same client is answered as
+    superseded without computing anything, and a repeat of the client's
+    previous parameters gets the previous payload back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables_lock = threading.Lock()
+        self._tables = None
+        self._clients = OrderedDict()
+
+    def get_tables(self):
+        """Tables for the current model, rebuilt when the model version changes"""
+        model = get_model()
+        tables = self._tables
+        if tables is not None and tables.model_version == model.model_version:
+            return tables
+        with self._tables_lock:
+            if self._tables is None or self._tables.model_version != model.model_version:
+                self._tables = PreviewTables(model)
+            return self._tables
+
+    def preview(self, client_id, policy_type, percentage, duration, budget, seq=None,
+                sparkline_points=0):
+        """
+        Preview final metrics and risk for one configuration
+
+        Args:
+            client_id: Identifies the client for coalescing
+            policy_type, percentage, duration, budget: Simulation parameters
+            seq: Client request counter; older requests are dropped
+            sparkline_points: Number of pay gap points to include (0 for none)
+
+        Returns:
+            Preview dictionary, or None if a newer request from the client
+            has already been seen
+
+        Raises:
+            ValueError: Invalid parameters
+        """
+        tables = self.get_tables()
+        key = (tables.model_version, policy_type, percentage, duration, budget, sparkline_points)
+
+        with self._lock:
+            state = self._clients.get(client_id)
+            if state is None:
+                if len(self._clients) >= MAX_TRACKED_CLIENTS:
+                    self._clients.popitem(last=False)
+                state = self._clients[client_id] = [None, None, None]
+            else:
+                self._clients.move_to_end(client_id)
+            if seq is not None:
+                if state[0] is not None and seq < state[0]:
+                    return None
+                state[0] = seq
+            if state[1] == key:
+                return state[2]
+
+        result = self._compute(tables, policy_type, percentage, duration, budget, sparkline_points)
+
+        with self._lock:
+            if seq is None or state[0] == seq:
+                state[1] = key
+                state[2] = result
+        return result
+
+    def _compute(self, tables, policy_type, percentage, duration, budget, sparkline_points):
+        """Look up or evaluate the preview for validated parameters"""
+        is_valid, error = validate_policy_parameters(policy_type, percentage, duration, budget)
+        if not is_valid:
+            raise ValueError(error)
+
+        model = tables.model
+        constants = model.constants
+        i = model.index_of(policy_type)
+
+        key = (policy_type, int(percentage), duration)
+        metrics = tables.metrics.get(key) if percentage == int(percentage) else None
+        timeline = tables.pay_gap.get(key) if metrics is not None else None
+        if metrics is None:
+            # Fractional strength: evaluate exactly, still without a timeline
+            batch = calculate_final_metrics_batch([policy_type], [percentage], [duration], [0.0])
+            female = calculate_female_leadership(policy_type, percentage, duration, duration)
+            metrics = (
+                batch["final_pay_gap"][0],
+                batch["pay_gap_reduction"][0],
+                batch["final_employment_ratio"][0],
+                batch["employment_improvement"][0],
+                round(female, 1),
+                round(100 - female, 1)
+            )
+        final_pay_gap, reduction, ratio, improvement, female, male = metrics
+
+        # Same expressions as calculate_budget_impact and calculate_risk_level
+        spent = (budget / duration) * model.cost_rate[i] * (percentage / 100) * duration
+        budget_risk = min(
+            (budget / constants["budget_risk_scale"]) * constants["budget_risk_weight"],
+            constants["budget_risk_cap"]
+        )
+        intensity_risk = (percentage / 100) * constants["intensity_risk_weight"]
+        duration_risk = max(
+            0, (duration - constants["duration_risk_threshold"]) * constants["duration_risk_weight"]
+        )
+        risk_score = min((budget_risk + intensity_risk + duration_risk) * model.risk_modifier[i], 100)
+
+        result = {
+            "final_metrics": {
+                "final_pay_gap": final_pay_gap,
+                "pay_gap_reduction": reduction,
+                "final_employment_ratio": ratio,
+                "employment_improvement": improvement,
+                "final_leadership": {
+                    "female": female,
+                    "male": male
+                },
+                "total_budget_spent": round(spent, 2)
+            },
+            "risk": {
+                "score": round(risk_score, 1),
+                "level": get_risk_level_label(risk_score)
+            }
+        }
+
+        if sparkline_points:
+            years = sparkline_years(duration, sparkline_points)
+            if timeline is None:
+                base_gap = constants["base_pay_gap"]
+                values = [
+                    round(base_gap - calculate_pay_gap_reduction(policy_type, percentage, year, duration), 2)
+                    for year in years
+                ]
+            else:
+                values = [timeline[year] for year in years]
+            result["sparkline"] = {
+                "metric": "pay_gap",
+                "years": years,
+                "values": values
+            }
+
+        return result
+
+
+# Create singleton instance
+preview_service = PreviewService()
@@ -0,0 +1,342 @@
+"""
+On-demand sampling profiler and slow request capture
+Samples request threads into collapsed stacks and keeps traces of slow requests
+"""
+import os
+import sys
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+DEFAULT_SAMPLE_INTERVAL = 0.005
+MIN_SAMPLE_INTERVAL = 0.001
+MAX_PROFILE_SECONDS = 300
+MAX_STACK_DEPTH = 128
+
+DEFAULT_SLOW_REQUEST_MS = float(os.environ.get("POLICYSIM_SLOW_REQUEST_MS", 1000))
+SLOW_CAPTURE_LIMIT = int(os.environ.get("POLICYSIM_SLOW_CAPTURE_LIMIT", 100))
+MAX_STAGES = 256
+
+_local = threading.local()
+
+
+def _frame_label(frame):
+    """Flame-graph frame name; collapsed stacks use ';' as separator"""
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.basename(code.co_filename)}:{name}".replace(";", ":")
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler for the threads serving selected requests
+
+    A session covers the next N requests or the next T seconds, whichever
+    ends first. While it runs, a sampler thread snapshots the stacks of the
+    threads currently serving a profiled request every interval and counts
+    identical stacks, so the overhead is one stack walk per busy thread
+    per interval and nothing at all between sessions. Results are in the
+    collapsed format flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._session = None
+        self._sampler = None
+
+    def start(self, requests=None, seconds=None, interval=DEFAULT_SAMPLE_INTERVAL):
+        """
+        Start a profiling session, replacing any previous results
+
+        Args:
+            requests: Profile this many requests (None for no limit)
+            seconds: Stop after this long (default MAX_PROFILE_SECONDS)
+            interval: Seconds between samples
+
+        Returns:
+            Session status
+
+        Raises:
+            ValueError: Invalid limits, or a session is already running
+        """
+        if requests is not None and requests < 1:
+            raise ValueError("requests must be at least 1")
+        seconds = MAX_PROFILE_SECONDS if seconds is None else seconds
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise ValueError(f"seconds must be between 0 and {MAX_PROFILE_SECONDS}")
+        if interval < MIN_SAMPLE_INTERVAL:
+            raise ValueError(f"interval must be at least {MIN_SAMPLE_INTERVAL * 1000:g} ms")
+
+        with self._lock:
+            if self._session is not None and self._session["state"] == "running":
+                raise ValueError("A profiling session is already running")
+            now = time.time()
+            self._session = {
+                "state": "running",
+                "started_at": now,
+                "deadline": now + seconds,
+                "stopped_at": None,
+                "interval": interval,
+                "request_limit": requests,
+                "requests_started": 0,
+                "requests_finished": 0,
+                "samples": 0,
+                "stacks": {}
+            }
+            self._threads = {}
+            self._sampler = threading.Thread(target=self._run, args=(self._session,),
+                                             name="policysim-profiler", daemon=True)
+            self._sampler.start()
+            return self._status(self._session)
+
+    def stop(self):
+        """Stop the running session early; its samples are kept"""
+        with self._lock:
+            if self._session is not None and self._session["state"] == "running":
+                self._finish(self._session)
+            return self._status(self._session)
+
+    def begin_request(self):
+        """Claim a profiling slot for the current thread's request; False if not profiled"""
+        session = self._session
+        if session is None or session["state"] != "running":
+            return False
+        with self._lock:
+            if session is not self._session or session["state"] != "running":
+                return False
+            limit = session["request_limit"]
+            if limit is not None and session["requests_started"] >= limit:
+                return False
+            session["requests_started"] += 1
+            self._threads[threading.get_ident()] = session
+            return True
+
+    def end_request(self):
+        """Release the current thread; ends the session after its last request"""
+        with self._lock:
+            session = self._threads.pop(threading.get_ident(), None)
+            if session is None:
+                return
+            session["requests_finished"] += 1
+            limit = session["request_limit"]
+            if session["state"] == "running" and limit is not None and session["requests_finished"] >= limit:
+                self._finish(session)
+
+    def status(self):
+        with self._lock:
+            return self._status(self._session)
+
+    def collapsed(self):
+        """Aggregated stacks as 'frame;frame;frame count' lines, hottest first"""
+        with self._lock:
+            stacks = dict(self._session["stacks"]) if self._session else {}
+        return "\n".join(
+            f"{stack} {count}"
+            for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+        )
+
+    def _run(self, session):
+        """Sampler loop for one session"""
+        interval = session["interval"]
+        stacks = session["stacks"]
+        own_ident = threading.get_ident()
+        while session["state"] == "running":
+            if time.time() >= session["deadline"]:
+                with self._lock:
+                    if session["state"] == "running":
+                        self._finish(session)
+                break
+
+            with self._lock:
+                idents = [ident for ident, owner in self._threads.items() if owner is session]
+            if idents:
+                frames = sys._current_frames()
+                sampled = []
+                for ident in idents:
+                    frame = frames.get(ident)
+                    if frame is None or ident == own_ident:
+                        continue
+                    labels = []
+                    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    sampled.append(";".join(reversed(labels)))
+                del frames, frame
+
+                with self._lock:
+                    for key in sampled:
+                        stacks[key] = stacks.get(key, 0) + 1
+                    session["samples"] += len(sampled)
+            time.sleep(interval)
+
+    def _finish(self, session):
+        """Mark a session finished (caller holds the lock)"""
+        session["state"] = "finished"
+        session["stopped_at"] = time.time()
+        for ident in [ident for ident, owner in self._threads.items() if owner is session]:
+            del self._threads[ident]
+
+    def _status(self, session):
+        if session is None:
+            return {"state": "idle"}
+        return {
+            "state": session["state"],
+            "started_at": session["started_at"],
+            "stopped_at": session["stopped_at"],
+            "deadline": session["deadline"],
+            "interval_ms": session["interval"] * 1000,
+            "request_limit": session["request_limit"],
+            "requests_profiled": session["requests_started"],
+            "requests_finished": session["requests_finished"],
+            "samples": session["samples"],
+            "distinct_stacks": len(session["stacks"])
+        }
+
+
+class RequestTracer:
+    """
+    Per-request stage timings with a ring buffer of slow requests
+
+    Every request gets a lightweight trace; code marks stages with
+    trace_stage() or @traced. Requests slower than the threshold are kept,
+    with their stage timings and payload sizes, in a bounded buffer that
+    drops the oldest capture when full. Traces of fast requests are
+    discarded.
+    """
+
+    def __init__(self, threshold_ms=DEFAULT_SLOW_REQUEST_MS, capacity=SLOW_CAPTURE_LIMIT):
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+        self._captures = deque(maxlen=capacity)
+        self.requests_traced = 0
+        self.requests_captured = 0
+
+    def begin(self, method, path, request_bytes):
+        _local.trace = {
+            "method": method,
+            "path": path,
+            "request_bytes": request_bytes,
+            "started": time.perf_counter(),
+            "started_at": time.time(),
+            "stages": []
+        }
+
+    def finish(self, error=None):
+        """
+        Close the current thread's trace and keep it if it was slow
+
+        Returns:
+            The capture if the request was slow, otherwise None
+        """
+        trace = getattr(_local, "trace", None)
+        if trace is None:
+            return None
+        _local.trace = None
+
+        duration_ms = (time.perf_counter() - trace["started"]) * 1000
+        with self._lock:
+            self.requests_traced += 1
+            if duration_ms < self.threshold_ms:
+                return None
+            self.requests_captured += 1
+            capture = {
+                "method": trace["method"],
+                "path": trace["path"],
+                "status": trace.get("status"),
+                "started_at": trace["started_at"],
+                "duration_ms": round(duration_ms, 3),
+                "request_bytes": trace["request_bytes"],
+                "response_bytes": trace.get("response_bytes"),
+                "error": error,
+                "stages": sorted(trace["stages"], key=lambda stage: stage["offset_ms"])
+            }
+            self._captures.append(capture)
+            return capture
+
+    def set_response(self, status, response_bytes):
+        """Remember the response status and size for the capture"""
+        trace = getattr(_local, "trace", None)
+        if trace is not None:
+            trace["status"] = status
+            trace["response_bytes"] = response_bytes
+
+    def captures(self, limit=None):
+        """Slow request captures, newest first"""
+        with self._lock:
+            captures = list(self._captures)
+        captures.reverse()
+        return captures[:limit] if limit else captures
+
+    def configure(self, threshold_ms=None, capacity=None):
+        with self._lock:
+            if threshold_ms is not None:
+                if threshold_ms < 0:
+                    raise ValueError("threshold_ms must not be negative")
+                self.threshold_ms = threshold_ms
+            if capacity is not None:
+                if capacity < 1:
+                    raise ValueError("capacity must be at least 1")
+                self._captures = deque(self._captures, maxlen=capacity)
+        return self.stats()
+
+    def clear(self):
+        with self._lock:
+            self._captures.clear()
+
+    def stats(self):
+        return {
+            "threshold_ms": self.threshold_ms,
+            "capacity": self._captures.maxlen,
+            "stored": len(self._captures),
+            "requests_traced": self.requests_traced,
+            "requests_captured": self.requests_captured
+        }
+
+
+class trace_stage:
+    """
+    Time a stage of the current request, for slow request captures
+
+    A no-op outside a traced request. Stages may nest; each records its
+    offset from the request start and its duration.
+    """
+
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = getattr(_local, "trace", None)
+        if self.trace is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        trace = self.trace
+        if trace is not None and len(trace["stages"]) < MAX_STAGES:
+            now = time.perf_counter()
+            trace["stages"].append({
+                "stage": self.name,
+                "offset_ms": round((self.started - trace["started"]) * 1000, 3),
+                "duration_ms": round((now - self.started) * 1000, 3)
+            })
+        return False
+
+
+def traced(name):
+    """Decorator recording every call of a function as a request stage"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with trace_stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Create singleton instances
+sampling_profiler = SamplingProfiler()
+request_tracer = RequestTracer()
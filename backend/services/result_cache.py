@@ -0,0 +1,372 @@
+"""
+Two-tier result cache shared by every worker process on a host
+Per-process LRU in front of a local SQLite file, with keys versioned by the model
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from services.single_flight import canonical_key
+from utilities.model_registry import get_model
+
+DEFAULT_CACHE_FILE = os.path.join(tempfile.gettempdir(), "policysim_result_cache.sqlite")
+DEFAULT_HOT_ENTRIES = 256
+DEFAULT_HOT_BYTES = 64 * 1024 * 1024
+DEFAULT_SHARED_BYTES = 512 * 1024 * 1024
+
+# Values larger than this are never cached (reports of this size stream from disk)
+MAX_VALUE_BYTES = 8 * 1024 * 1024
+
+# The shared tier is trimmed to its size limit once per this many writes
+EVICT_EVERY_PUTS = 64
+
+# Stored value encodings
+KIND_JSON = "json"
+KIND_BYTES = "bytes"
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def encode_value(value):
+    """
+    Encode a result for the shared tier
+
+    Bytes (PDF reports) are stored as they are; everything else as JSON,
+    with result objects rendered through to_dict like a response is.
+
+    Returns:
+        Tuple of (kind, payload bytes)
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return KIND_BYTES, bytes(value)
+    encoded = json.dumps(value, default=_to_dict, separators=(",", ":"))
+    return KIND_JSON, encoded.encode("utf-8")
+
+
+def decode_value(kind, payload):
+    """Inverse of encode_value"""
+    if kind == KIND_BYTES:
+        return bytes(payload)
+    return json.loads(payload)
+
+
+def _to_dict(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not cacheable")
+
+
+class ResultCache:
+    """
+    Result cache with a hot tier per process and a shared tier per host
+
+    Lookups try this process's LRU first, then the SQLite file every worker
+    reads and writes; shared hits are promoted into the LRU. Keys carry the
+    model version, so a coefficient change never serves an old result and
+    the first write under a new version drops the old version's entries.
+    The shared file runs in WAL mode so readers never block the writer; if
+    it is unavailable the cache degrades to the hot tier alone.
+
+    Values from the shared tier come back as decoded JSON (or bytes), which
+    render to the same response as the original result objects. Cached
+    results keep the timestamp of the run that produced them.
+    """
+
+    def __init__(self, path=None, hot_entries=None, hot_bytes=None, shared_bytes=None):
+        self.path = path or os.environ.get("POLICYSIM_CACHE_FILE") or DEFAULT_CACHE_FILE
+        self.hot_entries = hot_entries or _env_int("POLICYSIM_CACHE_HOT_ENTRIES", DEFAULT_HOT_ENTRIES)
+        self.hot_bytes = hot_bytes or _env_int("POLICYSIM_CACHE_HOT_BYTES", DEFAULT_HOT_BYTES)
+        self.shared_bytes = shared_bytes or _env_int("POLICYSIM_CACHE_SHARED_BYTES", DEFAULT_SHARED_BYTES)
+
+        self._lock = threading.Lock()
+        self._hot = OrderedDict()
+        self._hot_size = 0
+        self._local = threading.local()
+        self._schema_ready = False
+        self._model_version = None
+        self._puts_since_evict = 0
+        self._stats = {}
+        self._shared_errors = 0
+        self._evicted_shared = 0
+
+    def key(self, namespace, params):
+        """
+        Cache key for a computation under the current model
+
+        The key keeps canonical_key's namespace prefix, so it also serves
+        as the single-flight key for the same computation.
+
+        Args:
+            namespace: Kind of computation (for example "simulate")
+            params: JSON-compatible inputs
+
+        Returns:
+            String key "namespace:model_version:digest"
+        """
+        namespace, digest = canonical_key(namespace, params).split(":", 1)
+        return f"{namespace}:{get_model().model_version}:{digest}"
+
+    def get(self, key):
+        """
+        Look a key up in the hot tier, then the shared tier
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            entry = self._hot.get(key)
+            if entry is not None:
+                self._hot.move_to_end(key)
+                self._bucket(namespace)["hot_hits"] += 1
+                return entry[0]
+
+        row = self._shared_get(key)
+        if row is None:
+            with self._lock:
+                self._bucket(namespace)["misses"] += 1
+            return None
+
+        kind, payload = row
+        value = decode_value(kind, payload)
+        with self._lock:
+            self._bucket(namespace)["shared_hits"] += 1
+            self._hot_put(key, value, len(payload))
+        return value
+
+    def put(self, key, value):
+        """
+        Store a value in both tiers
+
+        None and values over MAX_VALUE_BYTES are not cached.
+        """
+        if value is None:
+            return
+        kind, payload = encode_value(value)
+        namespace, model_version, _ = key.split(":", 2)
+        with self._lock:
+            bucket = self._bucket(namespace)
+            if len(payload) > MAX_VALUE_BYTES:
+                bucket["oversize"] += 1
+                return
+            bucket["puts"] += 1
+            self._hot_put(key, value, len(payload))
+            new_version = model_version != self._model_version
+            self._model_version = model_version
+            self._puts_since_evict += 1
+            evict = self._puts_since_evict >= EVICT_EVERY_PUTS
+            if evict:
+                self._puts_since_evict = 0
+
+        self._shared_put(key, namespace, model_version, kind, payload)
+        if new_version:
+            self._drop_other_versions(model_version)
+        if evict:
+            self._evict_shared()
+
+    def get_or_compute(self, key, fn):
+        """
+        Return the cached value for key, computing and storing it on a miss
+
+        Args:
+            key: Key from key()
+            fn: Zero-argument callable computing the value; wrap it in
+                single_flight.do to also coalesce concurrent misses
+
+        Returns:
+            The value
+        """
+        value = self.get(key)
+        if value is None:
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Empty this process's hot tier and the shared tier"""
+        with self._lock:
+            self._hot.clear()
+            self._hot_size = 0
+        self._shared_execute("DELETE FROM results")
+
+    def stats(self):
+        """Hits, misses and sizes of both tiers, per namespace and in total"""
+        with self._lock:
+            namespaces = {}
+            totals = {"hot_hits": 0, "shared_hits": 0, "misses": 0, "puts": 0, "oversize": 0}
+            for namespace, bucket in self._stats.items():
+                namespaces[namespace] = _with_hit_ratio(bucket)
+                for field in totals:
+                    totals[field] += bucket[field]
+            hot = {
+                "entries": len(self._hot),
+                "bytes": self._hot_size,
+                "max_entries": self.hot_entries,
+                "max_bytes": self.hot_bytes
+            }
+            shared_errors = self._shared_errors
+            evicted_shared = self._evicted_shared
+
+        shared = {
+            "path": self.path,
+            "max_bytes": self.shared_bytes,
+            "evicted": evicted_shared,
+            "errors": shared_errors,
+            "available": False
+        }
+        rows = self._shared_execute(
+            "SELECT namespace, model_version, COUNT(*), COALESCE(SUM(size), 0)"
+            " FROM results GROUP BY namespace, model_version"
+        )
+        if rows is not None:
+            shared["available"] = True
+            shared["entries"] = sum(row[2] for row in rows)
+            shared["bytes"] = sum(row[3] for row in rows)
+            shared["by_namespace"] = {}
+            shared["model_versions"] = sorted({row[1] for row in rows})
+            for namespace, _, count, size in rows:
+                entry = shared["by_namespace"].setdefault(namespace, {"entries": 0, "bytes": 0})
+                entry["entries"] += count
+                entry["bytes"] += size
+
+        return {
+            "model_version": get_model().model_version,
+            "pid": os.getpid(),
+            "totals": _with_hit_ratio(totals),
+            "namespaces": namespaces,
+            "hot": hot,
+            "shared": shared
+        }
+
+    def _bucket(self, namespace):
+        bucket = self._stats.get(namespace)
+        if bucket is None:
+            bucket = self._stats[namespace] = {
+                "hot_hits": 0,
+                "shared_hits": 0,
+                "misses": 0,
+                "puts": 0,
+                "oversize": 0
+            }
+        return bucket
+
+    def _hot_put(self, key, value, size):
+        """Insert into the LRU and evict from its cold end (caller holds the lock)"""
+        previous = self._hot.pop(key, None)
+        if previous is not None:
+            self._hot_size -= previous[1]
+        self._hot[key] = (value, size)
+        self._hot_size += size
+        while self._hot and (len(self._hot) > self.hot_entries or self._hot_size > self.hot_bytes):
+            _, (_, evicted_size) = self._hot.popitem(last=False)
+            self._hot_size -= evicted_size
+
+    def _connection(self):
+        """SQLite connection for this thread, reopened after a fork"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " namespace TEXT NOT NULL,"
+                " model_version TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at)")
+            self._schema_ready = True
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _shared_execute(self, sql, parameters=()):
+        """
+        Run one statement on the shared tier
+
+        Returns:
+            List of rows, or None if the shared tier is unavailable
+        """
+        try:
+            return self._connection().execute(sql, parameters).fetchall()
+        except sqlite3.Error:
+            with self._lock:
+                self._shared_errors += 1
+            return None
+
+    def _shared_get(self, key):
+        rows = self._shared_execute("SELECT kind, value FROM results WHERE key = ?", (key,))
+        if not rows:
+            return None
+        # Recency feeds eviction; a lost update only makes eviction less exact
+        self._shared_execute("UPDATE results SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return rows[0]
+
+    def _shared_put(self, key, namespace, model_version, kind, payload):
+        now = time.time()
+        self._shared_execute(
+            "INSERT OR REPLACE INTO results"
+            " (key, namespace, model_version, kind, value, size, created_at, accessed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, namespace, model_version, kind, sqlite3.Binary(payload), len(payload), now, now)
+        )
+
+    def _drop_other_versions(self, model_version):
+        """Remove results computed under any other model version from both tiers"""
+        with self._lock:
+            for key in [key for key in self._hot if key.split(":", 2)[1] != model_version]:
+                self._hot_size -= self._hot.pop(key)[1]
+        self._shared_execute("DELETE FROM results WHERE model_version != ?", (model_version,))
+
+    def _evict_shared(self):
+        """Delete least recently used shared entries until the file fits its limit"""
+        rows = self._shared_execute("SELECT COALESCE(SUM(size), 0) FROM results")
+        if not rows or rows[0][0] <= self.shared_bytes:
+            return
+        excess = rows[0][0] - self.shared_bytes
+        candidates = self._shared_execute("SELECT key, size FROM results ORDER BY accessed_at")
+        if candidates is None:
+            return
+        doomed = []
+        for key, size in candidates:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+        try:
+            self._connection().executemany("DELETE FROM results WHERE key = ?", doomed)
+        except sqlite3.Error:
+            with self._lock:
+                self._shared_errors += 1
+            return
+        with self._lock:
+            self._evicted_shared += len(doomed)
+
+
+def _with_hit_ratio(bucket):
+    lookups = bucket["hot_hits"] + bucket["shared_hits"] + bucket["misses"]
+    hits = bucket["hot_hits"] + bucket["shared_hits"]
+    return {
+        **bucket,
+        "lookups": lookups,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0
+    }
+
+
+# Create singleton instance
+result_cache = ResultCache()
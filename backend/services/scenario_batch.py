@@ -0,0 +1,184 @@
+"""
+Batch scenario processing for bulk simulation runs
+Parses scenario rows incrementally and formats results as they complete
+"""
+import csv
+import io
+import json
+import math
+
+from services.simulation_engine import simulation_engine
+from services.policy_models import validate_policy_parameters
+
+REQUIRED_COLUMNS = ["policy_type", "percentage", "duration", "budget"]
+
+RESULT_COLUMNS = [
+    "row",
+    "status",
+    "error",
+    "policy_name",
+    "policy_type",
+    "percentage",
+    "duration",
+    "budget",
+    "final_pay_gap",
+    "pay_gap_reduction",
+    "final_employment_ratio",
+    "employment_improvement",
+    "female_leadership",
+    "total_budget_spent",
+    "risk_score",
+    "risk_level"
+]
+
+
+def read_scenario_header(reader):
+    """
+    Read and check the header row of a scenario CSV
+
+    Args:
+        reader: csv.reader positioned at the start of the file
+
+    Returns:
+        Tuple of (column_index, error_message)
+    """
+    header = next(reader, None)
+    if not header:
+        return None, "Scenario file is empty"
+
+    column_index = {name.strip(): i for i, name in enumerate(header)}
+    missing = [name for name in REQUIRED_COLUMNS if name not in column_index]
+    if missing:
+        return None, f"Missing required columns: {', '.join(missing)}"
+
+    return column_index, None
+
+
+def parse_scenario_row(values, column_index):
+    """
+    Convert one CSV row into simulation parameters
+
+    Applies the same checks as validate_policy_parameters so rows fail here
+    with a readable message rather than inside the engine.
+
+    Returns:
+        Tuple of (params, error_message)
+    """
+    def field(name, default=""):
+        index = column_index.get(name)
+        if index is None or index >= len(values):
+            return default
+        return values[index].strip()
+
+    policy_type = field("policy_type")
+    try:
+        percentage = float(field("percentage"))
+        budget = float(field("budget"))
+        duration = float(field("duration"))
+    except ValueError:
+        return None, "percentage, duration and budget must be numbers"
+
+    # nan and inf parse as floats and slip through the range comparisons
+    if not all(math.isfinite(value) for value in (percentage, budget, duration)):
+        return None, "percentage, duration and budget must be finite numbers"
+
+    if not duration.is_integer():
+        return None, "Duration must be a whole number of years"
+    duration = int(duration)
+
+    is_valid, error = validate_policy_parameters(policy_type, percentage, duration, budget)
+    if not is_valid:
+        return None, error
+
+    return {
+        "policy_type": policy_type,
+        "percentage": percentage,
+        "duration": duration,
+        "budget": budget,
+        "policy_name": field("policy_name") or "Unnamed Policy"
+    }, None
+
+
+def iter_scenarios(reader, column_index, start_row=2):
+    """
+    Lazily yield (row_number, params, error) for every data row
+
+    Row numbers are 1-based file lines, so the first data row is 2.
+    Blank lines are skipped.
+    """
+    for row_number, values in enumerate(reader, start=start_row):
+        if not any(value.strip() for value in values):
+            continue
+        params, error = parse_scenario_row(values, column_index)
+        yield row_number, params, error
+
+
+def iter_chunks(items, chunk_size):
+    """Group an iterator into lists of at most chunk_size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_scenario_chunk(chunk):
+    """
+    Run a chunk of parsed scenarios through the simulation engine
+
+    Args:
+        chunk: List of (row_number, params, error) tuples
+
+    Returns:
+        List of flat result dictionaries keyed by RESULT_COLUMNS
+    """
+    results = []
+    for row_number, params, error in chunk:
+        record = {"row": row_number, "status": "ok", "error": ""}
+        if params is not None:
+            record.update(params)
+            try:
+                simulation = simulation_engine.run_simulation(**params)
+            except ValueError as e:
+                error = str(e)
+            else:
+                record.update({
+                    "final_pay_gap": simulation.final_pay_gap,
+                    "pay_gap_reduction": simulation.pay_gap_reduction,
+                    "final_employment_ratio": simulation.final_employment_ratio,
+                    "employment_improvement": simulation.employment_improvement,
+                    "female_leadership": simulation.female_leadership[-1],
+                    "total_budget_spent": simulation.total_budget_spent,
+                    "risk_score": simulation.risk_score,
+                    "risk_level": simulation.risk_level
+                })
+        if error:
+            record["status"] = "error"
+            record["error"] = error
+        results.append(record)
+
+    return results
+
+
+def format_csv_chunk(records, include_header=False):
+    """Render result records as CSV text"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=RESULT_COLUMNS, extrasaction="ignore")
+    if include_header:
+        writer.writeheader()
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+def format_columnar_chunk(records):
+    """
+    Render result records as one JSON line holding a column per field
+
+    Failed rows keep their position in every column (with nulls for the
+    missing metrics) so columns stay aligned on the row column.
+    """
+    columns = {name: [record.get(name) for record in records] for name in RESULT_COLUMNS}
+    return json.dumps(columns, separators=(",", ":")) + "\n"
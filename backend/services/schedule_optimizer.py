@@ -0,0 +1,242 @@
+"""
+Multi-stage optimizer for per-year budget and strength schedules
+Dynamic programming over years with memoized per-year transitions
+"""
+import math
+import time
+
+from utilities.model_registry import get_model
+from utilities.calculations import get_pay_gap_rate, calculate_risk_level
+from services.policy_models import POLICY_TYPES, get_funding_requirement
+from services.simulation_engine import simulation_engine
+
+# Previous-strength state of a year following a paused (or no) year
+NO_STRENGTH = -1
+
+
+class ScheduleOptimizer:
+    """
+    Dynamic program over year-by-year strength schedules
+
+    Each year picks a strength on the grid (or pauses at 0) and is
+    allocated the smallest budget on the budget grid that funds that
+    strength for one year; spending more never improves outcomes and only
+    raises risk. A year is charged the larger of its allocation and what
+    the simulation spends from it (allocation * cost rate * strength), so
+    neither the allocations nor the simulated spending exceed the budget. Final pay gap reduction depends on the schedule only
+    through its accumulated exposure, which is proportional to the sum of
+    yearly strengths, and risk grows with both that sum and the total
+    budget. The program therefore finds, for every reachable strength sum,
+    the cheapest schedule reaching it, with the previous year's strength
+    as state when year-to-year changes are limited. The best sum that fits
+    the budget and risk ceiling wins.
+    """
+
+    def optimize(self, policy_type, total_budget, duration, risk_ceiling=60,
+                 percentage_step=5, budget_step=10000, max_strength_change=None,
+                 max_yearly_budget=None, allow_pause=True):
+        """
+        Find the schedule with the largest final pay gap reduction
+
+        Args:
+            policy_type: Policy type to schedule
+            total_budget: Budget available over the whole program
+            duration: Program duration in years (1-10)
+            risk_ceiling: Maximum acceptable risk score
+            percentage_step: Strength grid step in percentage points
+            budget_step: Budget grid step; yearly allocations are rounded up to it
+            max_strength_change: Largest change in strength between
+                consecutive active years (None for no limit)
+            max_yearly_budget: Largest allocation in any one year (None for no limit)
+            allow_pause: Whether a year may run at strength 0
+
+        Returns:
+            Dictionary with the schedule, its simulation and search statistics
+
+        Raises:
+            ValueError: Invalid inputs, or no schedule fits the constraints
+        """
+        started = time.perf_counter()
+        self._validate(policy_type, total_budget, duration, risk_ceiling,
+                       percentage_step, budget_step, max_strength_change)
+
+        options = self._build_options(policy_type, total_budget, percentage_step,
+                                      budget_step, max_yearly_budget, allow_pause)
+        if len(options) == (1 if allow_pause else 0):
+            raise ValueError(f"No strength of {policy_type} can be funded for a year within the budget")
+
+        model = get_model()
+        cost_rate = model.cost_rate[model.index_of(policy_type)]
+        charges = [max(budget, budget * cost_rate * (percentage / 100)) for percentage, budget in options]
+        layers, stats = _solve(options, charges, duration, total_budget, percentage_step, max_strength_change)
+
+        # Cheapest final state for every reachable strength sum
+        cheapest = {}
+        for (previous, units), (cost, _, _) in layers[-1].items():
+            if units not in cheapest or cost < layers[-1][cheapest[units]][0]:
+                cheapest[units] = (previous, units)
+
+        constants = model.constants
+        base_gap = constants["base_pay_gap"]
+        gap_cap = base_gap * constants["max_gap_reduction_share"]
+
+        best_key = None
+        best_state = None
+        for units, state in cheapest.items():
+            if units == 0:
+                continue
+            cost = sum(options[option][1] for option in _walk(layers, state))
+            strength_sum = units * percentage_step
+            risk = calculate_risk_level(policy_type, round(strength_sum / duration, 2), cost, duration)["score"]
+            if risk > risk_ceiling:
+                continue
+            exposure = get_pay_gap_rate(policy_type, strength_sum)
+            reduction = min(base_gap * (1 - math.exp(-exposure)), gap_cap)
+            key = (round(reduction, 2), -risk, -cost)
+            if best_key is None or key > best_key:
+                best_key = key
+                best_state = state
+
+        if best_state is None:
+            raise ValueError(
+                f"No schedule fits a budget of ${total_budget:,.0f} under risk ceiling {risk_ceiling}"
+            )
+
+        schedule = [options[option] for option in _walk(layers, best_state)]
+
+        percentages = [percentage for percentage, _ in schedule]
+        budgets = [budget for _, budget in schedule]
+        simulation = simulation_engine.run_schedule_simulation(
+            policy_type,
+            percentages,
+            budgets,
+            policy_name="Optimized Schedule"
+        )
+
+        return {
+            "policy_type": policy_type,
+            "schedule": {
+                "percentages": percentages,
+                "budgets": budgets
+            },
+            "total_allocated": round(sum(budgets), 2),
+            "unallocated_budget": round(total_budget - sum(budgets), 2),
+            "simulation": simulation,
+            "search": {
+                "strength_options": len(options),
+                "states": stats["states"],
+                "transitions": stats["transitions"],
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+            }
+        }
+
+    def _validate(self, policy_type, total_budget, duration, risk_ceiling,
+                  percentage_step, budget_step, max_strength_change):
+        """Validate optimizer inputs"""
+        if policy_type not in POLICY_TYPES:
+            raise ValueError(f"Invalid policy type: {policy_type}")
+        if total_budget <= 0:
+            raise ValueError("Total budget must be positive")
+        if duration < 1 or duration > 10:
+            raise ValueError("Duration must be between 1 and 10 years")
+        if risk_ceiling <= 0 or risk_ceiling > 100:
+            raise ValueError("Risk ceiling must be between 0 and 100")
+        if percentage_step <= 0 or budget_step <= 0:
+            raise ValueError("Grid steps must be positive")
+        if max_strength_change is not None and max_strength_change < 0:
+            raise ValueError("Maximum strength change must not be negative")
+
+    def _build_options(self, policy_type, total_budget, percentage_step, budget_step,
+                       max_yearly_budget, allow_pause):
+        """
+        Strengths available in any one year with their funded yearly budget
+
+        Strengths are multiples of the step so strength sums stay on an
+        integer grid; the first option is the pause when allowed.
+        """
+        policy_info = POLICY_TYPES[policy_type]
+        yearly_limit = total_budget if max_yearly_budget is None else min(total_budget, max_yearly_budget)
+
+        options = [(0.0, 0.0)] if allow_pause else []
+        units = math.ceil(policy_info["min_percentage"] / percentage_step - 1e-9)
+        while units * percentage_step <= policy_info["max_percentage"] + 1e-9:
+            percentage = round(units * percentage_step, 6)
+            required = get_funding_requirement(policy_type, percentage, 1)
+            budget = math.ceil(required / budget_step) * budget_step
+            if budget <= yearly_limit:
+                options.append((percentage, float(budget)))
+            units += 1
+        return options
+
+
+def _solve(options, charges, duration, total_budget, percentage_step, max_strength_change):
+    """
+    Forward dynamic program over years
+
+    A state is (previous strength option, strength sum in grid units) and
+    holds the cheapest way to reach it as (cost, parent state, option),
+    where each option costs its charge against the total budget.
+    Allowed next options depend only on the previous option, so they are
+    computed once per option and reused by every year and strength sum.
+
+    Returns:
+        Tuple of (one state dictionary per year, statistics)
+    """
+    units = [round(percentage / percentage_step) for percentage, _ in options]
+
+    transitions = {}
+
+    def allowed_after(previous):
+        """Options that may follow the previous option (memoized)"""
+        if previous not in transitions:
+            if previous == NO_STRENGTH or max_strength_change is None:
+                transitions[previous] = list(range(len(options)))
+            else:
+                last = options[previous][0]
+                transitions[previous] = [
+                    k for k, (percentage, _) in enumerate(options)
+                    if percentage == 0 or abs(percentage - last) <= max_strength_change + 1e-9
+                ]
+        return transitions[previous]
+
+    def state_after(option):
+        """Previous-strength state after running an option"""
+        if max_strength_change is None or options[option][0] == 0:
+            return NO_STRENGTH
+        return option
+
+    layers = []
+    frontier = {(NO_STRENGTH, 0): (0.0, None, None)}
+    stats = {"states": 1, "transitions": 0}
+    for _ in range(duration):
+        layer = {}
+        for state, (cost, _, _) in frontier.items():
+            previous, total_units = state
+            for option in allowed_after(previous):
+                next_cost = cost + charges[option]
+                if next_cost > total_budget:
+                    continue
+                stats["transitions"] += 1
+                next_state = (state_after(option), total_units + units[option])
+                entry = layer.get(next_state)
+                if entry is None or next_cost < entry[0]:
+                    layer[next_state] = (next_cost, state, option)
+        stats["states"] += len(layer)
+        layers.append(layer)
+        frontier = layer
+    return layers, stats
+
+
+def _walk(layers, state):
+    """Options of the schedule ending in a final state, first year first"""
+    chosen = []
+    for layer in reversed(layers):
+        _, parent, option = layer[state]
+        chosen.append(option)
+        state = parent
+    chosen.reverse()
+    return chosen
+
+
+# Create singleton instance
+schedule_optimizer = ScheduleOptimizer()
@@ -0,0 +1,329 @@
+"""
+Sharded parallel parameter sweeps over a local process pool
+Workers write final metrics straight into shared memory result columns
+"""
+import copy
+import itertools
+import multiprocessing
+import os
+import time
+from array import array
+from multiprocessing import shared_memory
+
+from utilities.calculations import calculate_final_metrics_batch, calculate_budget_metrics_batch
+from utilities.model_registry import PolicyModel, get_model
+
+SWEEP_METRICS = (
+    "final_pay_gap",
+    "pay_gap_reduction",
+    "final_employment_ratio",
+    "employment_improvement",
+    "female_leadership",
+    "total_budget_spent",
+    "risk_score"
+)
+BUDGET_METRICS = ("total_budget_spent", "risk_score")
+NAN = float("nan")
+
+# One result column holds 8 bytes per cell per metric
+MAX_RESULT_BYTES = 8 * 1024 ** 3
+SHARDS_PER_WORKER = 8
+MAX_SHARD_ROWS = 4096
+
+# Per-process state set up once by _init_worker
+_worker = {}
+
+
+class SweepGrid:
+    """
+    The axes of a sweep and the mapping between cells and configurations
+
+    Cells are numbered row-major over (baseline, policy type, percentage,
+    duration, budget) with budget varying fastest. A row is one
+    (baseline, type, percentage, duration) with a cell per budget, and
+    shards are contiguous ranges of rows.
+    """
+
+    def __init__(self, policy_types, percentages, durations, budgets, baselines=None):
+        self.policy_types = list(policy_types)
+        self.percentages = [float(value) for value in percentages]
+        self.durations = [int(value) for value in durations]
+        self.budgets = [float(value) for value in budgets]
+        self.baselines = [dict(baseline) for baseline in (baselines or [{}])]
+
+        self.row_count = (len(self.baselines) * len(self.policy_types)
+                          * len(self.percentages) * len(self.durations))
+        self.cell_count = self.row_count * len(self.budgets)
+
+    def axes(self):
+        return (self.policy_types, self.percentages, self.durations, self.budgets, self.baselines)
+
+    def row(self, row):
+        """Decode a row number into (baseline index, type, percentage, duration)"""
+        row, duration_i = divmod(row, len(self.durations))
+        row, percentage_i = divmod(row, len(self.percentages))
+        baseline_i, type_i = divmod(row, len(self.policy_types))
+        return (baseline_i, self.policy_types[type_i],
+                self.percentages[percentage_i], self.durations[duration_i])
+
+    def config_at(self, cell):
+        """Decode a cell number into its full configuration"""
+        row, budget_i = divmod(cell, len(self.budgets))
+        baseline_i, policy_type, percentage, duration = self.row(row)
+        return {
+            "baseline": baseline_i,
+            "policy_type": policy_type,
+            "percentage": percentage,
+            "duration": duration,
+            "budget": self.budgets[budget_i]
+        }
+
+
+class SweepResult:
+    """
+    Result columns of a sharded sweep, backed by one shared memory block
+
+    Columns are float64 memoryviews over the shared block, so reading
+    them copies nothing. Cells whose percentage is outside the policy
+    type's valid range hold NaN and are left out of the statistics.
+    Call close() (or use the result as a context manager) to release
+    the block.
+    """
+
+    def __init__(self, grid, metrics, memory, stats, shards, workers, elapsed):
+        self.grid = grid
+        self.metrics = metrics
+        self.memory = memory
+        self.stats = stats
+        self.shards = shards
+        self.workers = workers
+        self.elapsed = elapsed
+        self._views = []
+
+    def column(self, metric):
+        """Zero-copy float64 view of one metric over every cell"""
+        index = self.metrics.index(metric)
+        count = self.grid.cell_count
+        view = self.memory.buf.cast("d")[index * count:(index + 1) * count]
+        self._views.append(view)
+        return view
+
+    def summary(self):
+        """Valid cell count, min, max, mean and argmax configuration of every metric"""
+        return {
+            metric: {
+                "count": stats["count"],
+                "min": stats["min"],
+                "max": stats["max"],
+                "mean": stats["sum"] / stats["count"],
+                "argmax": self.grid.config_at(stats["argmax"])
+            }
+            for metric, stats in self.stats.items()
+        }
+
+    def close(self):
+        """Release every column view and free the shared memory"""
+        for view in self._views:
+            view.release()
+        self._views = []
+        if self.memory is not None:
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_sharded_sweep(policy_types, percentages, durations, budgets, baselines=None,
+                      metrics=None, workers=None, progress=None):
+    """
+    Evaluate final metrics over a full parameter grid in parallel
+
+    The grid is split into many more shards than workers so uneven shards
+    balance out. Workers attach to one shared memory block holding a
+    float64 column per metric and write their cells in place; only small
+    per-shard statistics travel back to the parent. Budget-independent
+    metrics are evaluated once per row and filled across its budgets.
+
+    Args:
+        policy_types, percentages, durations, budgets: Grid axes
+        baselines: List of model constant overrides (for example
+            {"base_pay_gap": 18.0}); each is a separate baseline profile
+        metrics: Subset of SWEEP_METRICS to keep (default all)
+        workers: Process count (default os.cpu_count())
+        progress: Optional callback(done_cells, total_cells)
+
+    Returns:
+        SweepResult; the caller must close it
+
+    Raises:
+        ValueError: Invalid axes or the output would be too large
+    """
+    grid = SweepGrid(policy_types, percentages, durations, budgets, baselines)
+    metrics = tuple(metrics or SWEEP_METRICS)
+    unknown = [metric for metric in metrics if metric not in SWEEP_METRICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+
+    model = get_model()
+    unknown = [policy_type for policy_type in grid.policy_types if policy_type not in model.policy_info]
+    if unknown:
+        raise ValueError(f"Invalid policy types: {', '.join(unknown)}")
+    for baseline in grid.baselines:
+        unknown = [name for name in baseline if name not in model.constants]
+        if unknown:
+            raise ValueError(f"Unknown baseline constants: {', '.join(unknown)}")
+    if not grid.cell_count:
+        raise ValueError("Sweep grid is empty")
+    if any(duration < 1 for duration in grid.durations):
+        raise ValueError("Durations must be at least 1 year")
+
+    size = grid.cell_count * len(metrics) * 8
+    if size > MAX_RESULT_BYTES:
+        raise ValueError(
+            f"Sweep output would need {size / 1024 ** 3:.1f} GiB (limit {MAX_RESULT_BYTES / 1024 ** 3:.0f} GiB); "
+            "narrow the grid or keep fewer metrics"
+        )
+
+    workers = max(1, min(workers or os.cpu_count() or 1, grid.row_count))
+    shard_rows = max(1, min(MAX_SHARD_ROWS, -(-grid.row_count // (workers * SHARDS_PER_WORKER))))
+    shards = [(start, min(start + shard_rows, grid.row_count))
+              for start in range(0, grid.row_count, shard_rows)]
+
+    memory = shared_memory.SharedMemory(create=True, size=size)
+    started = time.perf_counter()
+    try:
+        stats = {}
+        done = 0
+        # Spawned workers do not inherit the server's threads or locks
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(
+            workers,
+            initializer=_init_worker,
+            initargs=(memory.name, grid.axes(), metrics, model.definition)
+        ) as pool:
+            for shard_stats, cells in pool.imap_unordered(_run_shard, shards):
+                _merge_stats(stats, shard_stats)
+                done += cells
+                if progress:
+                    progress(done, grid.cell_count)
+    except BaseException:
+        memory.close()
+        memory.unlink()
+        raise
+
+    return SweepResult(grid, metrics, memory, stats, len(shards), workers,
+                       time.perf_counter() - started)
+
+
+def _init_worker(memory_name, axes, metrics, definition):
+    """Attach to the result block and build one model per baseline profile"""
+    policy_types, percentages, durations, budgets, baselines = axes
+    grid = SweepGrid(policy_types, percentages, durations, budgets, baselines)
+
+    models = []
+    for baseline in baselines:
+        profile = copy.deepcopy(definition)
+        profile["constants"].update(baseline)
+        models.append(PolicyModel(profile))
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    _worker.update({
+        "grid": grid,
+        "metrics": metrics,
+        "models": models,
+        "memory": memory,
+        "columns": memory.buf.cast("d")
+    })
+
+
+def _run_shard(shard):
+    """
+    Evaluate the rows of one shard into the shared columns
+
+    Returns:
+        Tuple of (per-metric statistics, cells written)
+    """
+    grid = _worker["grid"]
+    metrics = _worker["metrics"]
+    models = _worker["models"]
+    columns = _worker["columns"]
+    budgets = grid.budgets
+    budget_count = len(budgets)
+    cell_count = grid.cell_count
+    offsets = {metric: index * cell_count for index, metric in enumerate(metrics)}
+    keep_budget_metrics = any(metric in BUDGET_METRICS for metric in metrics)
+    stats = {}
+
+    start, stop = shard
+    rows = []
+    for row in range(start, stop):
+        decoded = grid.row(row)
+        info = models[decoded[0]].policy_info[decoded[1]]
+        if info["min_percentage"] <= decoded[2] <= info["max_percentage"]:
+            rows.append((row, decoded))
+        else:
+            # Outside the policy type's valid strength range: no result
+            first_cell = row * budget_count
+            for metric in metrics:
+                offset = offsets[metric] + first_cell
+                columns[offset:offset + budget_count] = array("d", (NAN,)) * budget_count
+
+    # Rows of one baseline are contiguous, so each group shares a model
+    for baseline_i, group in itertools.groupby(rows, key=lambda item: item[1][0]):
+        group = list(group)
+        model = models[baseline_i]
+        batch = calculate_final_metrics_batch(
+            [decoded[1] for _, decoded in group],
+            [decoded[2] for _, decoded in group],
+            [decoded[3] for _, decoded in group],
+            [0.0] * len(group),
+            model=model
+        )
+
+        for n, (row, (_, policy_type, percentage, duration)) in enumerate(group):
+            first_cell = row * budget_count
+
+            row_values = {}
+            if keep_budget_metrics:
+                spent, risk = calculate_budget_metrics_batch(policy_type, percentage, duration, budgets, model=model)
+                row_values = {"total_budget_spent": spent, "risk_score": risk}
+
+            for metric in metrics:
+                offset = offsets[metric] + first_cell
+                values = row_values.get(metric)
+                if values is None:
+                    value = batch[metric][n]
+                    columns[offset:offset + budget_count] = array("d", (value,)) * budget_count
+                    _update_stats(stats, metric, value, value, value * budget_count, budget_count, first_cell)
+                else:
+                    columns[offset:offset + budget_count] = values
+                    high = max(values)
+                    _update_stats(stats, metric, min(values), high, sum(values), budget_count,
+                                  first_cell + values.index(high))
+
+    return stats, (stop - start) * budget_count
+
+
+def _update_stats(stats, metric, low, high, total, count, argmax):
+    """Fold one block's min, max, sum, count and argmax into the running statistics"""
+    entry = stats.get(metric)
+    if entry is None:
+        stats[metric] = {"min": low, "max": high, "sum": total, "count": count, "argmax": argmax}
+        return
+    entry["sum"] += total
+    entry["count"] += count
+    entry["min"] = min(entry["min"], low)
+    if high > entry["max"] or (high == entry["max"] and argmax < entry["argmax"]):
+        entry["max"] = high
+        entry["argmax"] = argmax
+
+
+def _merge_stats(stats, shard_stats):
+    """Merge per-shard statistics; ties on the max keep the lowest cell"""
+    for metric, entry in shard_stats.items():
+        _update_stats(stats, metric, entry["min"], entry["max"], entry["sum"], entry["count"], entry["argmax"])
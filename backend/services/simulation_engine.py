@@ -1,9 +1,23 @@
 """
 Core simulation engine for policy impact modeling
 """
-from utilities.data_generator import generate_simulation_data, get_final_metrics
-from utilities.calculations import calculate_risk_level
-from services.policy_models import get_policy_info, validate_policy_parameters
+from utilities.data_generator import (
+    generate_simulation_arrays,
+    generate_schedule_arrays,
+    generate_portfolio_data,
+    get_final_metrics
+)
+from utilities.calculations import calculate_risk_level, calculate_portfolio_risk_level
+from services.policy_models import (
+    get_policy_info,
+    validate_policy_parameters,
+    validate_schedule_parameters,
+    get_interaction_multipliers
+)
+from services.simulation_results import SimulationResult, ComparisonResult
+from services.paired_uncertainty import compare_under_uncertainty
+from services.profiler import traced
+import time
 
 
 class SimulationEngine:
@@ -12,6 +26,7 @@ class SimulationEngine:
     def __init__(self):
         self.current_simulation = None
     
+    @traced("run_simulation")
     def run_simulation(self, policy_type, percentage, duration, budget, policy_name="Unnamed Policy"):
         """
         Run a complete policy simulation
@@ -24,7 +39,8 @@ class SimulationEngine:
             policy_name: Custom name for the policy
         
         Returns:
-            Complete simulation results dictionary
+            SimulationResult; it reads like the results dictionary and renders
+            to it with to_dict() when serialized
         """
         # Validate parameters
         is_valid, error = validate_policy_parameters(policy_type, percentage, duration, budget)
@@ -35,34 +51,132 @@ class SimulationEngine:
         policy_info = get_policy_info(policy_type)
         
         # Generate simulation data
-        simulation_data = generate_simulation_data(policy_type, percentage, duration, budget)
+        timeline_arrays = generate_simulation_arrays(policy_type, percentage, duration, budget)
         
         # Calculate risk
         risk = calculate_risk_level(policy_type, percentage, budget, duration)
         
-        # Get final metrics
-        final_metrics = get_final_metrics(simulation_data)
-        
         # Compile results
-        results = {
-            "policy": {
-                "name": policy_name,
-                "type": policy_type,
-                "type_name": policy_info["name"],
-                "description": policy_info["description"],
+        results = SimulationResult(
+            policy_name,
+            policy_type,
+            policy_info,
+            percentage,
+            duration,
+            budget,
+            timeline_arrays,
+            risk,
+            time.time()
+        )
+        
+        self.current_simulation = results
+        return results
+    
+    @traced("run_schedule_simulation")
+    def run_schedule_simulation(self, policy_type, percentages, budgets, policy_name="Unnamed Policy"):
+        """
+        Run a simulation with per-year strength and budget schedules
+        
+        Args:
+            policy_type: Type of policy
+            percentages: Strength per year (0 pauses the policy for a year)
+            budgets: Budget allocated per year
+            policy_name: Custom name for the policy
+        
+        Returns:
+            SimulationResult whose percentage is the mean yearly strength and
+            whose budget is the total allocation; risk is assessed on those
+        """
+        percentages = [float(p) for p in percentages]
+        budgets = [float(b) for b in budgets]
+        is_valid, error = validate_schedule_parameters(policy_type, percentages, budgets)
+        if not is_valid:
+            raise ValueError(error)
+        
+        duration = len(percentages)
+        mean_percentage = round(sum(percentages) / duration, 2)
+        total_budget = round(sum(budgets), 2)
+        
+        results = SimulationResult(
+            policy_name,
+            policy_type,
+            get_policy_info(policy_type),
+            mean_percentage,
+            duration,
+            total_budget,
+            generate_schedule_arrays(policy_type, percentages, budgets),
+            calculate_risk_level(policy_type, mean_percentage, total_budget, duration),
+            time.time()
+        )
+        
+        self.current_simulation = results
+        return results
+    
+    def run_portfolio_simulation(self, policies, duration, interactions=None,
+                                 portfolio_name="Unnamed Portfolio"):
+        """
+        Run several policies concurrently under one program
+        
+        Args:
+            policies: List of dictionaries with policy_type, percentage and budget
+            duration: Shared simulation duration in years (1-10)
+            interactions: Optional overrides for the model's interaction effects
+            portfolio_name: Custom name for the portfolio
+        
+        Returns:
+            Portfolio results with combined timeline, final metrics and risk
+        """
+        if not policies:
+            raise ValueError("Portfolio must contain at least one policy")
+        
+        components = []
+        seen_types = set()
+        for policy in policies:
+            policy_type = policy.get("policy_type")
+            percentage = float(policy.get("percentage", 0))
+            budget = float(policy.get("budget", 0))
+            
+            is_valid, error = validate_policy_parameters(policy_type, percentage, duration, budget)
+            if not is_valid:
+                raise ValueError(error)
+            if policy_type in seen_types:
+                raise ValueError(f"Duplicate policy type in portfolio: {policy_type}")
+            seen_types.add(policy_type)
+            
+            components.append({
+                "policy_type": policy_type,
                 "percentage": percentage,
-                "duration": duration,
                 "budget": budget
+            })
+        
+        multipliers = get_interaction_multipliers(components, interactions)
+        simulation_data = generate_portfolio_data(components, duration, multipliers)
+        risk = calculate_portfolio_risk_level(components, duration)
+        final_metrics = get_final_metrics(simulation_data)
+        
+        return {
+            "portfolio": {
+                "name": portfolio_name,
+                "duration": duration,
+                "budget": sum(component["budget"] for component in components),
+                "policies": [
+                    {
+                        "type": component["policy_type"],
+                        "type_name": get_policy_info(component["policy_type"])["name"],
+                        "percentage": component["percentage"],
+                        "budget": component["budget"],
+                        "interaction_multiplier": round(multiplier, 3)
+                    }
+                    for component, multiplier in zip(components, multipliers)
+                ]
             },
             "timeline": simulation_data,
             "final_metrics": final_metrics,
             "risk": risk,
             "timestamp": self._get_timestamp()
         }
-        
-        self.current_simulation = results
-        return results
     
+    @traced("compare_policies")
     def compare_policies(self, policy_a_params, policy_b_params):
         """
         Compare two policy configurations
@@ -72,39 +186,51 @@ class SimulationEngine:
             policy_b_params: Dictionary with policy B parameters
         
         Returns:
-            Comparison results with recommendations
+            ComparisonResult with both simulations and recommendations
         """
         # Run both simulations
         sim_a = self.run_simulation(**policy_a_params)
         sim_b = self.run_simulation(**policy_b_params)
         
         # Compare key metrics
-        comparison = {
-            "policy_a": sim_a,
-            "policy_b": sim_b,
-            "analysis": self._analyze_comparison(sim_a, sim_b)
-        }
+        return ComparisonResult(sim_a, sim_b, self._analyze_comparison(sim_a, sim_b))
+    
+    @traced("compare_policies_under_uncertainty")
+    def compare_policies_under_uncertainty(self, policy_a_params, policy_b_params, **options):
+        """
+        Compare two policy configurations and how certain each verdict is
         
-        return comparison
+        Args:
+            policy_a_params: Dictionary with policy A parameters
+            policy_b_params: Dictionary with policy B parameters
+            **options: Sampling options of compare_under_uncertainty
+        
+        Returns:
+            Tuple of the ComparisonResult at the planned values and the
+            paired uncertainty analysis (probability that A beats B per
+            metric, with confidence intervals)
+        """
+        comparison = self.compare_policies(policy_a_params, policy_b_params)
+        return comparison, compare_under_uncertainty(policy_a_params, policy_b_params, **options)
     
     def _analyze_comparison(self, sim_a, sim_b):
         """Analyze differences between two simulations"""
         
         # Compare pay gap reduction
-        pay_gap_a = sim_a["final_metrics"]["pay_gap_reduction"]
-        pay_gap_b = sim_b["final_metrics"]["pay_gap_reduction"]
+        pay_gap_a = sim_a.pay_gap_reduction
+        pay_gap_b = sim_b.pay_gap_reduction
         
         # Compare budget
-        budget_a = sim_a["final_metrics"]["total_budget_spent"]
-        budget_b = sim_b["final_metrics"]["total_budget_spent"]
+        budget_a = sim_a.total_budget_spent
+        budget_b = sim_b.total_budget_spent
         
         # Compare risk
-        risk_a = sim_a["risk"]["score"]
-        risk_b = sim_b["risk"]["score"]
+        risk_a = sim_a.risk_score
+        risk_b = sim_b.risk_score
         
         # Compare employment
-        employment_a = sim_a["final_metrics"]["employment_improvement"]
-        employment_b = sim_b["final_metrics"]["employment_improvement"]
+        employment_a = sim_a.employment_improvement
+        employment_b = sim_b.employment_improvement
         
         # Generate recommendations
         recommendations = []
@@ -133,12 +259,12 @@ class SimulationEngine:
         
         if risk_a < risk_b:
             recommendations.append(
-                f"Policy A has lower risk ({sim_a['risk']['level']} vs {sim_b['risk']['level']})"
+                f"Policy A has lower risk ({sim_a.risk_level} vs {sim_b.risk_level})"
             )
             better_risk = "a"
         else:
             recommendations.append(
-                f"Policy B has lower risk ({sim_b['risk']['level']} vs {sim_a['risk']['level']})"
+                f"Policy B has lower risk ({sim_b.risk_level} vs {sim_a.risk_level})"
             )
             better_risk = "b"
         
@@ -0,0 +1,186 @@
+"""
+Compact result objects for simulations and comparisons
+Results are stored as slots and float arrays and rendered to the JSON
+response shape only when a response is serialized
+"""
+from collections.abc import Mapping
+from datetime import datetime
+
+from utilities.model_registry import get_model
+
+SIMULATION_SECTIONS = ("policy", "timeline", "final_metrics", "risk", "timestamp")
+COMPARISON_SECTIONS = ("policy_a", "policy_b", "analysis")
+
+
+class SimulationResult(Mapping):
+    """
+    One simulation run
+
+    Timelines are array('d') columns and the per-year leadership dicts,
+    final metrics and ISO timestamp are rebuilt on demand. Reading a top
+    level key (result["final_metrics"]) renders just that section, so code
+    written against the old dictionary results keeps working; to_dict()
+    renders the full response shape.
+    """
+
+    __slots__ = (
+        "policy_name",
+        "policy_type",
+        "policy_info",
+        "percentage",
+        "duration",
+        "budget",
+        "pay_gap",
+        "employment_ratio",
+        "female_leadership",
+        "male_leadership",
+        "budget_spent",
+        "risk_score",
+        "risk_level",
+        "created_at",
+        "base_pay_gap",
+        "base_employment_ratio"
+    )
+
+    def __init__(self, policy_name, policy_type, policy_info, percentage, duration, budget,
+                 timeline_arrays, risk, created_at):
+        self.policy_name = policy_name
+        self.policy_type = policy_type
+        self.policy_info = policy_info
+        self.percentage = percentage
+        self.duration = duration
+        self.budget = budget
+        (self.pay_gap, self.employment_ratio, self.female_leadership,
+         self.male_leadership, self.budget_spent) = timeline_arrays
+        self.risk_score = risk["score"]
+        self.risk_level = risk["level"]
+        self.created_at = created_at
+
+        constants = get_model().constants
+        self.base_pay_gap = constants["base_pay_gap"]
+        self.base_employment_ratio = constants["base_employment_ratio"]
+
+    # Final metrics as scalars, without building dictionaries
+
+    @property
+    def final_pay_gap(self):
+        return self.pay_gap[-1]
+
+    @property
+    def pay_gap_reduction(self):
+        return round(self.base_pay_gap - self.pay_gap[-1], 2)
+
+    @property
+    def final_employment_ratio(self):
+        return self.employment_ratio[-1]
+
+    @property
+    def employment_improvement(self):
+        return round((self.employment_ratio[-1] - self.base_employment_ratio) * 100, 2)
+
+    @property
+    def total_budget_spent(self):
+        return self.budget_spent[-1]
+
+    # Lazy rendering
+
+    def render_policy(self):
+        return {
+            "name": self.policy_name,
+            "type": self.policy_type,
+            "type_name": self.policy_info["name"],
+            "description": self.policy_info["description"],
+            "percentage": self.percentage,
+            "duration": self.duration,
+            "budget": self.budget
+        }
+
+    def render_timeline(self):
+        return {
+            "years": list(range(self.duration + 1)),
+            "pay_gap": self.pay_gap.tolist(),
+            "employment_ratio": self.employment_ratio.tolist(),
+            "leadership": [
+                {"female": female, "male": male}
+                for female, male in zip(self.female_leadership, self.male_leadership)
+            ],
+            "budget_spent": self.budget_spent.tolist(),
+            "duration": self.duration
+        }
+
+    def render_final_metrics(self):
+        return {
+            "final_pay_gap": self.final_pay_gap,
+            "pay_gap_reduction": self.pay_gap_reduction,
+            "final_employment_ratio": self.final_employment_ratio,
+            "employment_improvement": self.employment_improvement,
+            "final_leadership": {
+                "female": self.female_leadership[-1],
+                "male": self.male_leadership[-1]
+            },
+            "total_budget_spent": self.total_budget_spent
+        }
+
+    def render_risk(self):
+        return {
+            "score": self.risk_score,
+            "level": self.risk_level
+        }
+
+    def render_timestamp(self):
+        return datetime.fromtimestamp(self.created_at).isoformat()
+
+    def to_dict(self):
+        """Render the full simulation response shape"""
+        return {
+            "policy": self.render_policy(),
+            "timeline": self.render_timeline(),
+            "final_metrics": self.render_final_metrics(),
+            "risk": self.render_risk(),
+            "timestamp": self.render_timestamp()
+        }
+
+    def __getitem__(self, key):
+        if key not in SIMULATION_SECTIONS:
+            raise KeyError(key)
+        return getattr(self, f"render_{key}")()
+
+    def __iter__(self):
+        return iter(SIMULATION_SECTIONS)
+
+    def __len__(self):
+        return len(SIMULATION_SECTIONS)
+
+    def __repr__(self):
+        return (f"SimulationResult({self.policy_type!r}, percentage={self.percentage}, "
+                f"duration={self.duration}, budget={self.budget})")
+
+
+class ComparisonResult(Mapping):
+    """Two simulation results plus the comparison analysis"""
+
+    __slots__ = ("policy_a", "policy_b", "analysis")
+
+    def __init__(self, policy_a, policy_b, analysis):
+        self.policy_a = policy_a
+        self.policy_b = policy_b
+        self.analysis = analysis
+
+    def to_dict(self):
+        """Render the full comparison response shape"""
+        return {
+            "policy_a": self.policy_a.to_dict(),
+            "policy_b": self.policy_b.to_dict(),
+            "analysis": self.analysis
+        }
+
+    def __getitem__(self, key):
+        if key not in COMPARISON_SECTIONS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(COMPARISON_SECTIONS)
+
+    def __len__(self):
+        return len(COMPARISON_SECTIONS)
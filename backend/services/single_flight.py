@@ -0,0 +1,237 @@
+"""
+Single-flight coalescing of identical concurrent computations
+Concurrent callers with the same canonical key share one execution and its result
+"""
+import hashlib
+import json
+import threading
+import time
+
+
+def canonical_key(namespace, params):
+    """
+    Stable key for a computation's inputs
+
+    Dictionaries are keyed independent of order and integral floats equal
+    their ints (75 and 75.0 are the same strength), so requests that differ
+    only in JSON formatting coalesce.
+
+    Args:
+        namespace: Kind of computation (for example "simulate")
+        params: JSON-compatible inputs
+
+    Returns:
+        String key
+    """
+    encoded = json.dumps(_canonical(params), sort_keys=True, separators=(",", ":"))
+    return f"{namespace}:{hashlib.sha256(encoded.encode()).hexdigest()}"
+
+
+def _canonical(value):
+    """Normalize numbers and containers for canonical_key"""
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return str(value)
+
+
+class _Flight:
+    """One in-progress computation and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 1
+        self.values = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs each distinct key at most once at a time within this process
+
+    The first caller for a key (the leader) runs the computation; callers
+    arriving while it runs wait and receive the same result, or the same
+    exception. Nothing is cached: once the leader finishes, the next call
+    runs again. Results must be safe to share between threads; values that
+    are not (open files) are split with a fork function that turns the
+    result into one value per waiter.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._stats = {}
+
+    def do(self, key, fn, fork=None):
+        """
+        Run fn, or wait for an identical in-flight call and share its result
+
+        Args:
+            key: Canonical key (see canonical_key); its prefix up to the
+                first colon names the metrics bucket
+            fn: Zero-argument callable computing the result
+            fork: Optional callable(value, count) returning count values,
+                one per waiter, the first for the leader
+
+        Returns:
+            The result
+
+        Raises:
+            Whatever fn raised, in every waiter
+        """
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                slot = flight.waiters
+                flight.waiters += 1
+                self._bucket(namespace)["coalesced"] += 1
+            else:
+                slot = 0
+                flight = self._flights[key] = _Flight()
+
+        if slot:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.values[slot]
+
+        started = time.perf_counter()
+        value = None
+        try:
+            value = fn()
+        except BaseException as e:
+            flight.error = e
+        finally:
+            # No waiter can join once the flight is removed, so the count is final
+            with self._lock:
+                del self._flights[key]
+                waiters = flight.waiters
+                self._record(namespace, waiters, time.perf_counter() - started, flight.error is not None)
+
+        if flight.error is None:
+            try:
+                flight.values = fork(value, waiters) if fork else [value] * waiters
+            except BaseException as e:
+                flight.error = e
+        flight.done.set()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.values[0]
+
+    def stats(self):
+        """Executions, coalesced callers and collapsed compute time per namespace"""
+        with self._lock:
+            stats = {}
+            for namespace, bucket in self._stats.items():
+                requests = bucket["executions"] + bucket["coalesced"]
+                stats[namespace] = {
+                    "requests": requests,
+                    "executions": bucket["executions"],
+                    "coalesced": bucket["coalesced"],
+                    "coalesced_ratio": round(bucket["coalesced"] / requests, 4) if requests else 0.0,
+                    "errors": bucket["errors"],
+                    "max_waiters": bucket["max_waiters"],
+                    "execution_seconds": round(bucket["execution_seconds"], 4),
+                    "saved_seconds": round(bucket["saved_seconds"], 4)
+                }
+            stats["in_flight"] = len(self._flights)
+            return stats
+
+    def _bucket(self, namespace):
+        bucket = self._stats.get(namespace)
+        if bucket is None:
+            bucket = self._stats[namespace] = {
+                "executions": 0,
+                "coalesced": 0,
+                "errors": 0,
+                "max_waiters": 0,
+                "execution_seconds": 0.0,
+                "saved_seconds": 0.0
+            }
+        return bucket
+
+    def _record(self, namespace, waiters, elapsed, failed):
+        """Fold one finished flight into the metrics (caller holds the lock)"""
+        bucket = self._bucket(namespace)
+        bucket["executions"] += 1
+        bucket["errors"] += failed
+        bucket["max_waiters"] = max(bucket["max_waiters"], waiters)
+        bucket["execution_seconds"] += elapsed
+        # Each follower would otherwise have run the computation itself
+        bucket["saved_seconds"] += elapsed * (waiters - 1)
+
+
+class SharedFile:
+    """
+    Independent readers over one seekable file
+
+    Each reader keeps its own position, so one generated report can be
+    streamed to several coalesced requests at once. The file is closed
+    when the last reader closes.
+    """
+
+    def __init__(self, file, readers):
+        self.file = file
+        self._lock = threading.Lock()
+        self._open = readers
+
+    def readers(self, count):
+        return [_SharedFileReader(self) for _ in range(count)]
+
+    def read_at(self, position, size):
+        with self._lock:
+            self.file.seek(position)
+            return self.file.read(size)
+
+    def release(self):
+        with self._lock:
+            self._open -= 1
+            if self._open == 0:
+                self.file.close()
+
+
+class _SharedFileReader:
+    """File-like reader over a SharedFile with its own position"""
+
+    def __init__(self, shared):
+        self._shared = shared
+        self._position = 0
+        self.closed = False
+
+    def read(self, size=-1):
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        data = self._shared.read_at(self._position, size)
+        self._position += len(data)
+        return data
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._shared.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def fork_file(value, count):
+    """fork function for (file, size) results: one independent reader per waiter"""
+    file, size = value
+    readers = SharedFile(file, count).readers(count)
+    return [(reader, size) for reader in readers]
+
+
+# Create singleton instance
+single_flight = SingleFlight()
@@ -1,7 +1,15 @@
 """
 Utility functions for policy impact calculations
+
+Coefficients come from the versioned model registry and are looked up by
+integer policy index, so every curve is evaluated the same way for every
+policy type (unknown types use the registry's default row).
 """
 import math
+from array import array
+
+from utilities.model_registry import get_model
+
 
 def calculate_pay_gap_reduction(policy_type, percentage, year, duration):
     """
@@ -16,26 +24,17 @@ def calculate_pay_gap_reduction(policy_type, percentage, year, duration):
     Returns:
         Pay gap reduction percentage
     """
-    base_gap = 23.0  # Starting gender pay gap percentage
+    model = get_model()
+    constants = model.constants
+    i = model.index_of(policy_type)
+    base_gap = constants["base_pay_gap"]
     
     # Different policies have different effectiveness curves
-    if policy_type == "equal_pay":
-        # Direct impact, faster reduction
-        reduction_rate = (percentage / 100) * 0.35
-        reduction = base_gap * (1 - math.exp(-reduction_rate * year))
-    elif policy_type == "leadership_quota":
-        # Gradual impact through representation
-        reduction_rate = (percentage / 100) * 0.25
-        reduction = base_gap * (1 - math.exp(-reduction_rate * year * 0.8))
-    elif policy_type == "parental_leave":
-        # Slower but steady impact
-        reduction_rate = (percentage / 100) * 0.20
-        reduction = base_gap * (1 - math.exp(-reduction_rate * year * 0.6))
-    else:
-        reduction = 0
+    reduction_rate = (percentage / 100) * model.pay_gap_rate[i]
+    reduction = base_gap * (1 - math.exp(-reduction_rate * year * model.pay_gap_time_scale[i]))
     
     # Cap reduction at 90% of original gap
-    return min(reduction, base_gap * 0.9)
+    return min(reduction, base_gap * constants["max_gap_reduction_share"])
 
 
 def calculate_employment_ratio(policy_type, percentage, year, duration):
@@ -45,20 +44,17 @@ def calculate_employment_ratio(policy_type, percentage, year, duration):
     Returns:
         Employment ratio (baseline is 0.82)
     """
-    base_ratio = 0.82
-    target_ratio = 0.95  # Near parity
+    model = get_model()
+    constants = model.constants
+    i = model.index_of(policy_type)
+    base_ratio = constants["base_employment_ratio"]
+    target_ratio = constants["target_employment_ratio"]
     
-    if policy_type == "equal_pay":
-        improvement_rate = (percentage / 100) * 0.15
-    elif policy_type == "leadership_quota":
-        improvement_rate = (percentage / 100) * 0.18
-    elif policy_type == "parental_leave":
-        improvement_rate = (percentage / 100) * 0.22
-    else:
-        improvement_rate = 0.1
+    improvement_rate = (percentage / 100) * model.employment_rate[i] + model.employment_rate_floor[i]
     
     # Sigmoid curve for realistic growth
-    improvement = (target_ratio - base_ratio) * (1 / (1 + math.exp(-0.5 * (year - duration/2))))
+    slope = constants["employment_sigmoid_slope"]
+    improvement = (target_ratio - base_ratio) * (1 / (1 + math.exp(-slope * (year - duration/2))))
     return base_ratio + (improvement * improvement_rate)
 
 
@@ -69,24 +65,7 @@ def calculate_leadership_distribution(policy_type, percentage, year, duration):
     Returns:
         Dictionary with male and female percentages
     """
-    base_female = 30.0  # Starting percentage of female leaders
-    
-    if policy_type == "leadership_quota":
-        # Direct quota impact
-        target_increase = percentage * 0.6
-        current_increase = target_increase * (year / duration)
-    elif policy_type == "equal_pay":
-        # Indirect impact
-        target_increase = percentage * 0.3
-        current_increase = target_increase * (year / duration) * 0.7
-    elif policy_type == "parental_leave":
-        # Moderate indirect impact
-        target_increase = percentage * 0.25
-        current_increase = target_increase * (year / duration) * 0.6
-    else:
-        current_increase = 0
-    
-    female_percentage = min(base_female + current_increase, 65.0)  # Cap at 65%
+    female_percentage = calculate_female_leadership(policy_type, percentage, year, duration)
     male_percentage = 100 - female_percentage
     
     return {
@@ -95,6 +74,27 @@ def calculate_leadership_distribution(policy_type, percentage, year, duration):
     }
 
 
+def calculate_female_leadership(policy_type, percentage, year, duration):
+    """
+    Calculate the unrounded percentage of female leaders
+    
+    Returns:
+        Female leadership percentage (capped at 65%)
+    """
+    model = get_model()
+    constants = model.constants
+    i = model.index_of(policy_type)
+    
+    # Direct quota impact or damped indirect impact
+    target_increase = percentage * model.leadership_rate[i]
+    current_increase = target_increase * (year / duration) * model.leadership_damping[i]
+    
+    return min(
+        constants["base_female_leadership"] + current_increase,
+        constants["max_female_leadership"]
+    )
+
+
 def calculate_budget_impact(policy_type, percentage, budget, year, duration):
     """
     Calculate cumulative budget spending
@@ -102,18 +102,14 @@ def calculate_budget_impact(policy_type, percentage, budget, year, duration):
     Returns:
         Budget spent up to current year
     """
-    yearly_cost_rate = {
-        "equal_pay": 1.2,
-        "leadership_quota": 0.8,
-        "parental_leave": 1.5
-    }
-    
-    rate = yearly_cost_rate.get(policy_type, 1.0)
+    model = get_model()
+    constants = model.constants
+    rate = model.cost_rate[model.index_of(policy_type)]
     intensity_factor = percentage / 100
     
     # Spending ramps up in early years, stabilizes later
-    if year <= duration * 0.3:
-        yearly_spend = (budget / duration) * rate * intensity_factor * 1.3
+    if year <= duration * constants["spending_ramp_share"]:
+        yearly_spend = (budget / duration) * rate * intensity_factor * constants["spending_ramp_factor"]
     else:
         yearly_spend = (budget / duration) * rate * intensity_factor
     
@@ -127,37 +123,106 @@ def calculate_risk_level(policy_type, percentage, budget, duration):
     Returns:
         Risk score (0-100) and level (low/medium/high)
     """
+    model = get_model()
+    constants = model.constants
+    
     # Risk factors
-    budget_risk = min((budget / 10000000) * 20, 30)  # Budget over 10M increases risk
-    intensity_risk = (percentage / 100) * 25  # Higher percentage = higher risk
-    duration_risk = max(0, (duration - 5) * 5)  # Longer duration = higher uncertainty
-    
-    # Policy-specific risk modifiers
-    policy_risk_modifier = {
-        "equal_pay": 1.0,  # Moderate risk
-        "leadership_quota": 1.2,  # Higher political risk
-        "parental_leave": 0.9   # Lower risk, proven policy
-    }
+    budget_risk = min(
+        (budget / constants["budget_risk_scale"]) * constants["budget_risk_weight"],
+        constants["budget_risk_cap"]
+    )
+    intensity_risk = (percentage / 100) * constants["intensity_risk_weight"]
+    duration_risk = max(
+        0, (duration - constants["duration_risk_threshold"]) * constants["duration_risk_weight"]
+    )
     
-    modifier = policy_risk_modifier.get(policy_type, 1.0)
+    modifier = model.risk_modifier[model.index_of(policy_type)]
     total_risk = (budget_risk + intensity_risk + duration_risk) * modifier
     
     # Normalize to 0-100
     risk_score = min(total_risk, 100)
     
-    if risk_score < 30:
-        level = "low"
-    elif risk_score < 60:
-        level = "medium"
-    else:
-        level = "high"
+    return {
+        "score": round(risk_score, 1),
+        "level": get_risk_level_label(risk_score)
+    }
+
+
+def calculate_portfolio_risk_level(components, duration):
+    """
+    Calculate overall risk level of several policies run together
+    
+    Budget and duration risk are assessed on the shared program and scaled
+    by the riskiest policy; intensity risk accumulates per policy. A single
+    component portfolio scores the same as calculate_risk_level.
+    
+    Args:
+        components: List of dictionaries with policy_type, percentage and budget
+        duration: Shared program duration
+    
+    Returns:
+        Risk score (0-100) and level (low/medium/high)
+    """
+    model = get_model()
+    intensity_weight = model.constants["intensity_risk_weight"]
+    
+    total_budget = 0.0
+    max_modifier = 0.0
+    intensity_risk = 0.0
+    for component in components:
+        modifier = model.risk_modifier[model.index_of(component["policy_type"])]
+        total_budget += component["budget"]
+        max_modifier = max(max_modifier, modifier)
+        intensity_risk += (component["percentage"] / 100) * intensity_weight * modifier
+    
+    risk_score = calculate_portfolio_risk_score(total_budget, duration, max_modifier, intensity_risk)
     
     return {
         "score": round(risk_score, 1),
-        "level": level
+        "level": get_risk_level_label(risk_score)
     }
 
 
+def calculate_portfolio_risk_score(total_budget, duration, max_modifier, intensity_risk):
+    """
+    Calculate the raw portfolio risk score from aggregated components
+    
+    Args:
+        total_budget: Budget summed over all policies
+        duration: Shared program duration
+        max_modifier: Largest policy risk modifier in the portfolio
+        intensity_risk: Sum of modifier-weighted intensity risks
+    
+    Returns:
+        Risk score (0-100)
+    """
+    constants = get_model().constants
+    budget_risk = min(
+        (total_budget / constants["budget_risk_scale"]) * constants["budget_risk_weight"],
+        constants["budget_risk_cap"]
+    )
+    duration_risk = max(
+        0, (duration - constants["duration_risk_threshold"]) * constants["duration_risk_weight"]
+    )
+    return min((budget_risk + duration_risk) * max_modifier + intensity_risk, 100)
+
+
+def get_policy_risk_modifier(policy_type):
+    """Get the policy-specific risk modifier"""
+    model = get_model()
+    return model.risk_modifier[model.index_of(policy_type)]
+
+
+def get_risk_level_label(risk_score):
+    """Map a 0-100 risk score to low/medium/high"""
+    constants = get_model().constants
+    if risk_score < constants["risk_medium_threshold"]:
+        return "low"
+    elif risk_score < constants["risk_high_threshold"]:
+        return "medium"
+    return "high"
+
+
 def format_currency(amount):
     """Format currency for display"""
     if amount >= 1000000:
@@ -165,4 +230,165 @@ def format_currency(amount):
     elif amount >= 1000:
         return f"${amount/1000:.0f}K"
     else:
-        return f"${amount:.0f}"
\ No newline at end of file
+        return f"${amount:.0f}"
+
+
+def get_pay_gap_rate(policy_type, percentage):
+    """
+    Get the yearly exponent rate driving pay gap reduction
+    
+    Returns:
+        Rate such that reduction = base_gap * (1 - exp(-rate * year))
+    """
+    model = get_model()
+    i = model.index_of(policy_type)
+    return (percentage / 100) * model.pay_gap_rate[i] * model.pay_gap_time_scale[i]
+
+
+def get_employment_rate(policy_type, percentage):
+    """
+    Get the employment improvement rate applied to the sigmoid curve
+    
+    Returns:
+        Improvement rate (share of the gap to parity that is closed)
+    """
+    model = get_model()
+    i = model.index_of(policy_type)
+    return (percentage / 100) * model.employment_rate[i] + model.employment_rate_floor[i]
+
+
+def get_leadership_increase(policy_type, percentage):
+    """
+    Get the female leadership increase reached at the end of the policy
+    
+    Returns:
+        Percentage points added to the baseline by the final year
+    """
+    model = get_model()
+    i = model.index_of(policy_type)
+    return percentage * model.leadership_rate[i] * model.leadership_damping[i]
+
+
+def calculate_final_metrics_batch(policy_types, percentages, durations, budgets, model=None):
+    """
+    Evaluate final-year metrics and risk for many configurations at once
+    
+    Mixed policy types are handled by gathering coefficients through their
+    integer indices, so every configuration runs the same arithmetic.
+    Values match get_final_metrics and calculate_risk_level exactly,
+    including rounding.
+    
+    Args:
+        policy_types: Sequence of policy types
+        percentages: Sequence of policy strengths
+        durations: Sequence of durations in years (>= 1)
+        budgets: Sequence of total budgets
+        model: PolicyModel to evaluate (defaults to the current model)
+    
+    Returns:
+        Dictionary of equal-length arrays, one per metric
+    """
+    model = model or get_model()
+    constants = model.constants
+    indices = model.indices(policy_types)
+    
+    base_gap = constants["base_pay_gap"]
+    gap_cap = base_gap * constants["max_gap_reduction_share"]
+    base_ratio = constants["base_employment_ratio"]
+    ratio_span = constants["target_employment_ratio"] - base_ratio
+    slope = constants["employment_sigmoid_slope"]
+    base_female = constants["base_female_leadership"]
+    max_female = constants["max_female_leadership"]
+    budget_scale = constants["budget_risk_scale"]
+    budget_weight = constants["budget_risk_weight"]
+    budget_cap = constants["budget_risk_cap"]
+    intensity_weight = constants["intensity_risk_weight"]
+    duration_threshold = constants["duration_risk_threshold"]
+    duration_weight = constants["duration_risk_weight"]
+    
+    gap_rate = [model.pay_gap_rate[i] for i in indices]
+    time_scale = [model.pay_gap_time_scale[i] for i in indices]
+    employment_rate = [model.employment_rate[i] for i in indices]
+    employment_floor = [model.employment_rate_floor[i] for i in indices]
+    leadership_rate = [model.leadership_rate[i] for i in indices]
+    damping = [model.leadership_damping[i] for i in indices]
+    cost_rate = [model.cost_rate[i] for i in indices]
+    modifier = [model.risk_modifier[i] for i in indices]
+    
+    final_pay_gap = array("d", (
+        round(base_gap - min(base_gap * (1 - math.exp(-((p / 100) * r) * d * s)), gap_cap), 2)
+        for p, d, r, s in zip(percentages, durations, gap_rate, time_scale)
+    ))
+    pay_gap_reduction = array("d", (round(base_gap - gap, 2) for gap in final_pay_gap))
+    
+    employment_ratio = array("d", (
+        round(base_ratio + (ratio_span * (1 / (1 + math.exp(-slope * (d - d/2))))) * ((p / 100) * r + f), 3)
+        for p, d, r, f in zip(percentages, durations, employment_rate, employment_floor)
+    ))
+    employment_improvement = array("d", (
+        round((ratio - base_ratio) * 100, 2) for ratio in employment_ratio
+    ))
+    
+    female_leadership = array("d", (
+        round(min(base_female + p * r * (d / d) * m, max_female), 1)
+        for p, d, r, m in zip(percentages, durations, leadership_rate, damping)
+    ))
+    
+    # The final year is past the spending ramp for every duration >= 1
+    total_budget_spent = array("d", (
+        round((b / d) * c * (p / 100) * d, 2)
+        for p, d, b, c in zip(percentages, durations, budgets, cost_rate)
+    ))
+    
+    risk_score = array("d", (
+        round(min((
+            min((b / budget_scale) * budget_weight, budget_cap)
+            + (p / 100) * intensity_weight
+            + max(0, (d - duration_threshold) * duration_weight)
+        ) * m, 100), 1)
+        for p, d, b, m in zip(percentages, durations, budgets, modifier)
+    ))
+    
+    return {
+        "final_pay_gap": final_pay_gap,
+        "pay_gap_reduction": pay_gap_reduction,
+        "final_employment_ratio": employment_ratio,
+        "employment_improvement": employment_improvement,
+        "female_leadership": female_leadership,
+        "total_budget_spent": total_budget_spent,
+        "risk_score": risk_score
+    }
+
+
+def calculate_budget_metrics_batch(policy_type, percentage, duration, budgets, model=None):
+    """
+    Evaluate the budget-dependent final metrics of one configuration over many budgets
+    
+    Spending and risk are the only final metrics that depend on the budget,
+    so sweeps evaluate the rest once per configuration and only these per
+    budget. Values match calculate_final_metrics_batch exactly.
+    
+    Returns:
+        Tuple of arrays (total_budget_spent, risk_score)
+    """
+    model = model or get_model()
+    constants = model.constants
+    i = model.index_of(policy_type)
+    
+    cost_rate = model.cost_rate[i]
+    modifier = model.risk_modifier[i]
+    budget_scale = constants["budget_risk_scale"]
+    budget_weight = constants["budget_risk_weight"]
+    budget_cap = constants["budget_risk_cap"]
+    intensity_risk = (percentage / 100) * constants["intensity_risk_weight"]
+    duration_risk = max(0, (duration - constants["duration_risk_threshold"]) * constants["duration_risk_weight"])
+    
+    total_budget_spent = array("d", (
+        round((b / duration) * cost_rate * (percentage / 100) * duration, 2) for b in budgets
+    ))
+    risk_score = array("d", (
+        round(min((min((b / budget_scale) * budget_weight, budget_cap) + intensity_risk + duration_risk) * modifier, 100), 1)
+        for b in budgets
+    ))
+    
+    return total_budget_spent, risk_score
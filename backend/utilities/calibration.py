@@ -0,0 +1,433 @@
+"""
+Calibration of model coefficients against historical outcome time series
+Fits every policy type and organization segment in one pass and emits a
+new versioned coefficient set for the model registry
+
+Usage (from the backend directory):
+    python -m utilities.calibration history.csv --output calibrated.json
+    python -m utilities.calibration history.csv --segment retail --output retail_model.json
+"""
+import argparse
+import copy
+import csv
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from utilities.model_registry import get_model, validate_model_definition
+
+HISTORY_COLUMNS = ("policy_type", "percentage", "duration", "year")
+OUTCOME_COLUMNS = ("pay_gap", "employment_ratio", "female_leadership")
+POOLED_SEGMENT = "_all"
+DEFAULT_SEGMENT = "default"
+
+# A curve needs this many informative observations before it is fitted
+MIN_POINTS = 5
+
+# Candidate employment sigmoid slopes; the slope is shared by all policy
+# types of a segment, the per-type rates are solved exactly for each
+SIGMOID_SLOPES = tuple(round(0.05 * step, 2) for step in range(2, 41))
+
+
+class HistoryTable:
+    """Historical observations held as parallel columns"""
+
+    def __init__(self):
+        self.segments = []
+        self.policy_types = []
+        self.percentages = []
+        self.durations = []
+        self.years = []
+        self.outcomes = {name: [] for name in OUTCOME_COLUMNS}
+
+    def __len__(self):
+        return len(self.years)
+
+
+def read_history(source):
+    """
+    Read historical observations from a CSV file or file object
+
+    Required columns are policy_type, percentage, duration and year.
+    segment is optional, and any of pay_gap, employment_ratio and
+    female_leadership may be present; blank cells are missing values.
+
+    Returns:
+        HistoryTable
+
+    Raises:
+        ValueError: Missing columns or unreadable values
+    """
+    handle = open(source, "r", encoding="utf-8-sig", newline="") if isinstance(source, str) else source
+    try:
+        reader = csv.DictReader(handle)
+        fields = set(reader.fieldnames or [])
+        missing = [name for name in HISTORY_COLUMNS if name not in fields]
+        if missing:
+            raise ValueError(f"Missing required columns: {', '.join(missing)}")
+        if not fields.intersection(OUTCOME_COLUMNS):
+            raise ValueError(f"History needs at least one of: {', '.join(OUTCOME_COLUMNS)}")
+
+        table = HistoryTable()
+        present = [name for name in OUTCOME_COLUMNS if name in fields]
+        for line, row in enumerate(reader, start=2):
+            try:
+                percentage = float(row["percentage"])
+                duration = int(float(row["duration"]))
+                year = float(row["year"])
+                outcomes = {
+                    name: float(row[name]) if (row.get(name) or "").strip() else None
+                    for name in present
+                }
+            except (TypeError, ValueError):
+                raise ValueError(f"Line {line}: percentage, duration, year and outcomes must be numbers")
+            if duration < 1:
+                raise ValueError(f"Line {line}: duration must be at least 1")
+
+            table.segments.append((row.get("segment") or "").strip() or DEFAULT_SEGMENT)
+            table.policy_types.append(row["policy_type"].strip())
+            table.percentages.append(percentage)
+            table.durations.append(duration)
+            table.years.append(year)
+            for name in OUTCOME_COLUMNS:
+                table.outcomes[name].append(outcomes.get(name))
+        return table
+    finally:
+        if isinstance(source, str):
+            handle.close()
+
+
+def calibrate(table, model=None, version=None):
+    """
+    Fit effectiveness coefficients per segment and policy type
+
+    Each curve is linear in its coefficients once transformed, so the data
+    is reduced in a single pass to least-squares sufficient statistics for
+    every (segment, policy type) at once, and each fit is then a closed
+    form solve:
+
+    - pay gap: -ln(gap / G) = (p / 100 * year) * rate * time_scale,
+      with G the segment's mean year-0 gap; capped points are skipped
+    - leadership: female - F = (p * year / duration) * rate * damping,
+      with F the segment's mean year-0 share; capped points are skipped
+    - employment: (ratio - b0) / span = sigmoid * (p / 100 * rate + floor);
+      the shared sigmoid slope is searched over SIGMOID_SLOPES and the two
+      rates solved exactly for each candidate, from statistics grouped by
+      (year, duration) so the search does not revisit the rows
+
+    time_scale and damping keep their current values and only the products
+    are identified. Types with too little data in a segment use the pooled
+    fit over all segments, then the current coefficients; a segment that
+    borrows pooled employment rates also uses the pooled sigmoid slope.
+
+    Args:
+        table: HistoryTable
+        model: PolicyModel to start from (defaults to the current model)
+        version: Version string for the new coefficient set
+
+    Returns:
+        Coefficient set: per segment a complete model definition plus
+        fit diagnostics
+    """
+    started = time.perf_counter()
+    model = model or get_model()
+    constants = model.constants
+    version = version or f"{model.version}-cal.{datetime.now().strftime('%Y%m%d%H%M%S')}"
+
+    known = set(model.policy_types)
+    segments = sorted(set(table.segments))
+    baselines = _fit_baselines(table, segments, constants)
+    stats = _accumulate(table, baselines, constants, known)
+
+    result_segments = {}
+    pooled = None
+    for segment in [POOLED_SEGMENT] + segments:
+        fits = _fill_from(_solve_segment(stats[segment], model), pooled or {}, stats[segment])
+        if segment == POOLED_SEGMENT:
+            pooled = fits
+        result_segments[segment] = {
+            "model": _definition(model, version, segment, baselines[segment], fits),
+            "baselines": baselines[segment],
+            "fits": fits
+        }
+
+    return {
+        "version": version,
+        "base_model_version": model.model_version,
+        "created_at": datetime.now().isoformat(),
+        "rows": len(table),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "segments": result_segments
+    }
+
+
+def _fit_baselines(table, segments, constants):
+    """Mean year-0 pay gap and female leadership per segment (and pooled)"""
+    sums = defaultdict(lambda: [0.0, 0, 0.0, 0])
+    for i, year in enumerate(table.years):
+        if year != 0:
+            continue
+        for segment in (table.segments[i], POOLED_SEGMENT):
+            entry = sums[segment]
+            gap = table.outcomes["pay_gap"][i]
+            if gap is not None:
+                entry[0] += gap
+                entry[1] += 1
+            female = table.outcomes["female_leadership"][i]
+            if female is not None:
+                entry[2] += female
+                entry[3] += 1
+
+    baselines = {}
+    for segment in [POOLED_SEGMENT] + segments:
+        gap_sum, gap_count, female_sum, female_count = sums[segment]
+        baselines[segment] = {
+            "base_pay_gap": gap_sum / gap_count if gap_count else constants["base_pay_gap"],
+            "base_female_leadership": (female_sum / female_count if female_count
+                                       else constants["base_female_leadership"])
+        }
+    return baselines
+
+
+def _accumulate(table, baselines, constants, known):
+    """
+    One pass over the rows collecting sufficient statistics
+
+    Returns:
+        {segment: {"pay_gap": {type: [n, Sxx, Sxy, Syy]},
+                   "leadership": {type: [n, Sxx, Sxy, Syy]},
+                   "employment": {type: {(year, duration): [n, Su, Suu, Sy, Suy, Syy]}}}}
+    """
+    def new_segment():
+        return {
+            "pay_gap": defaultdict(lambda: [0, 0.0, 0.0, 0.0]),
+            "leadership": defaultdict(lambda: [0, 0.0, 0.0, 0.0]),
+            "employment": defaultdict(lambda: defaultdict(lambda: [0, 0.0, 0.0, 0.0, 0.0, 0.0]))
+        }
+    stats = defaultdict(new_segment)
+
+    gap_share = 1 - constants["max_gap_reduction_share"]
+    max_female = constants["max_female_leadership"]
+    base_ratio = constants["base_employment_ratio"]
+    ratio_span = constants["target_employment_ratio"] - base_ratio
+    gaps = table.outcomes["pay_gap"]
+    ratios = table.outcomes["employment_ratio"]
+    females = table.outcomes["female_leadership"]
+
+    def add_line(entry, x, y):
+        entry[0] += 1
+        entry[1] += x * x
+        entry[2] += x * y
+        entry[3] += y * y
+
+    for i, policy_type in enumerate(table.policy_types):
+        if policy_type not in known:
+            continue
+        year = table.years[i]
+        if year <= 0:
+            continue
+        segment = table.segments[i]
+        percentage = table.percentages[i]
+        duration = table.durations[i]
+
+        for target in (segment, POOLED_SEGMENT):
+            bucket = stats[target]
+            baseline = baselines[target]
+
+            gap = gaps[i]
+            base_gap = baseline["base_pay_gap"]
+            if gap is not None and base_gap * gap_share < gap < base_gap:
+                add_line(bucket["pay_gap"][policy_type], percentage / 100 * year, -math.log(gap / base_gap))
+
+            female = females[i]
+            if female is not None and female < max_female:
+                add_line(bucket["leadership"][policy_type], percentage * year / duration,
+                         female - baseline["base_female_leadership"])
+
+            ratio = ratios[i]
+            if ratio is not None:
+                u = percentage / 100
+                y = (ratio - base_ratio) / ratio_span
+                entry = bucket["employment"][policy_type][(year, duration)]
+                entry[0] += 1
+                entry[1] += u
+                entry[2] += u * u
+                entry[3] += y
+                entry[4] += u * y
+                entry[5] += y * y
+
+    return stats
+
+
+def _fit_line(entry):
+    """Least squares slope through the origin with its RMSE"""
+    n, sxx, sxy, syy = entry
+    if n < MIN_POINTS or sxx <= 0:
+        return None
+    slope = sxy / sxx
+    sse = max(syy - 2 * slope * sxy + slope * slope * sxx, 0.0)
+    return {"value": slope, "points": n, "rmse": math.sqrt(sse / n)}
+
+
+def _solve_employment(groups, slope):
+    """
+    Solve the employment rate and floor for one policy type at a given slope
+
+    Returns:
+        (rate, floor, sse, points) or None when the system is singular
+    """
+    a = b = c = d = e = syy = 0.0
+    points = 0
+    for (year, duration), (n, su, suu, sy, suy, yy) in groups.items():
+        sigmoid = 1 / (1 + math.exp(-slope * (year - duration / 2)))
+        sigmoid2 = sigmoid * sigmoid
+        a += sigmoid2 * suu
+        b += sigmoid2 * su
+        c += sigmoid2 * n
+        d += sigmoid * suy
+        e += sigmoid * sy
+        syy += yy
+        points += n
+    determinant = a * c - b * b
+    if points < MIN_POINTS or abs(determinant) <= 1e-12 * max(a * c, 1e-300):
+        return None
+    rate = (d * c - b * e) / determinant
+    floor = (a * e - b * d) / determinant
+    sse = syy - 2 * (rate * d + floor * e) + rate * rate * a + 2 * rate * floor * b + floor * floor * c
+    return rate, floor, max(sse, 0.0), points
+
+
+def _solve_segment(bucket, model):
+    """Closed-form fits for every policy type of one segment"""
+    fits = {policy_type: {} for policy_type in model.policy_types}
+
+    for policy_type in model.policy_types:
+        i = model.index_of(policy_type)
+        line = _fit_line(bucket["pay_gap"].get(policy_type, [0, 0.0, 0.0, 0.0]))
+        if line and model.pay_gap_time_scale[i] > 0:
+            line["value"] = max(line["value"], 0.0) / model.pay_gap_time_scale[i]
+            fits[policy_type]["pay_gap_rate"] = line
+
+        line = _fit_line(bucket["leadership"].get(policy_type, [0, 0.0, 0.0, 0.0]))
+        if line and model.leadership_damping[i] > 0:
+            line["value"] = max(line["value"], 0.0) / model.leadership_damping[i]
+            fits[policy_type]["leadership_rate"] = line
+
+    # The sigmoid slope is one constant, so pick it by total error over types
+    best = None
+    for slope in SIGMOID_SLOPES:
+        solved = {}
+        total = 0.0
+        for policy_type, groups in bucket["employment"].items():
+            solution = _solve_employment(groups, slope)
+            if solution:
+                solved[policy_type] = solution
+                total += solution[2]
+        if solved and (best is None or total < best[0]):
+            best = (total, slope, solved)
+
+    if best:
+        _, slope, solved = best
+        for policy_type, (rate, floor, sse, points) in solved.items():
+            rmse = math.sqrt(sse / points)
+            fits[policy_type]["employment_rate"] = {"value": rate, "points": points, "rmse": rmse}
+            fits[policy_type]["employment_rate_floor"] = {"value": floor, "points": points, "rmse": rmse}
+        fits["_constants"] = {"employment_sigmoid_slope": {"value": slope, "points": sum(
+            solution[3] for solution in solved.values()
+        )}}
+
+    return fits
+
+
+def _fill_from(fits, pooled, bucket):
+    """
+    Mark fitted values and borrow missing ones from the pooled fit
+
+    Employment rates are only meaningful at the sigmoid slope they were
+    solved at. When a type borrows the pooled rates, the segment takes the
+    pooled slope as well and its own employment rates are solved again at
+    that slope.
+    """
+    filled = {}
+    for key, values in fits.items():
+        entry = {name: dict(fit, source="segment") for name, fit in values.items()}
+        for name, fit in pooled.get(key, {}).items():
+            if name not in entry:
+                entry[name] = dict(fit, source="pooled")
+        filled[key] = entry
+
+    pooled_slope = pooled.get("_constants", {}).get("employment_sigmoid_slope")
+    borrows_employment = any(
+        values.get("employment_rate", {}).get("source") == "pooled"
+        for key, values in filled.items() if key != "_constants"
+    )
+    if pooled_slope is None or not borrows_employment:
+        return filled
+
+    slope = pooled_slope["value"]
+    filled["_constants"] = {"employment_sigmoid_slope": dict(pooled_slope, source="pooled")}
+    for policy_type, values in filled.items():
+        if policy_type == "_constants" or values.get("employment_rate", {}).get("source") != "segment":
+            continue
+        solution = _solve_employment(bucket["employment"][policy_type], slope)
+        if solution:
+            rate, floor, sse, points = solution
+            rmse = math.sqrt(sse / points)
+            values["employment_rate"] = {"value": rate, "points": points, "rmse": rmse, "source": "segment"}
+            values["employment_rate_floor"] = {"value": floor, "points": points, "rmse": rmse, "source": "segment"}
+        else:
+            values["employment_rate"] = dict(pooled[policy_type]["employment_rate"], source="pooled")
+            values["employment_rate_floor"] = dict(pooled[policy_type]["employment_rate_floor"], source="pooled")
+    return filled
+
+
+def _definition(model, version, segment, baseline, fits):
+    """Build a complete model definition from the current one plus fits"""
+    definition = copy.deepcopy(model.definition)
+    definition["version"] = version if segment == POOLED_SEGMENT else f"{version}.{segment}"
+    definition["constants"].update(baseline)
+    for name, fit in fits.get("_constants", {}).items():
+        definition["constants"][name] = fit["value"]
+    for policy_type, values in fits.items():
+        if policy_type == "_constants":
+            continue
+        coefficients = definition["policy_types"][policy_type]["coefficients"]
+        for name, fit in values.items():
+            coefficients[name] = fit["value"]
+    return validate_model_definition(definition)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calibrate model coefficients from historical outcomes")
+    parser.add_argument("history", help="CSV of historical observations")
+    parser.add_argument("--output", help="Write the coefficient set here instead of stdout")
+    parser.add_argument("--segment", help="Write only this segment's model definition "
+                                          "(loadable with POLICYSIM_MODEL_FILE)")
+    parser.add_argument("--version", help="Version for the new coefficient set")
+    args = parser.parse_args(argv)
+
+    table = read_history(args.history)
+    coefficient_set = calibrate(table, version=args.version)
+    if args.segment:
+        if args.segment not in coefficient_set["segments"]:
+            parser.error(f"Unknown segment {args.segment}")
+        output = coefficient_set["segments"][args.segment]["model"]
+    else:
+        output = coefficient_set
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    print(f"Calibrated {len(coefficient_set['segments']) - 1} segments from {coefficient_set['rows']} rows "
+          f"in {coefficient_set['elapsed_seconds']}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
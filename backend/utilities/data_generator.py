@@ -4,43 +4,253 @@ Generate realistic simulation data
 from utilities.calculations import (
     calculate_pay_gap_reduction,
     calculate_employment_ratio,
-    calculate_leadership_distribution,
-    calculate_budget_impact
+    calculate_female_leadership,
+    calculate_budget_impact,
+    get_pay_gap_rate,
+    get_employment_rate,
+    get_leadership_increase
 )
+from utilities.model_registry import get_model
+from array import array
+import math
 
-def generate_simulation_data(policy_type, percentage, duration, budget):
+def generate_simulation_arrays(policy_type, percentage, duration, budget):
     """
-    Generate complete simulation data over time
+    Generate the simulation timeline as flat float arrays
+
+    Evaluates the same curves as the per-series generators below, reading
+    the model once and filling all columns in one pass.
+
+    Returns:
+        Tuple of arrays (pay_gap, employment_ratio, female_leadership,
+        male_leadership, budget_spent), each with duration + 1 entries
+    """
+    model = get_model()
+    constants = model.constants
+    i = model.index_of(policy_type)
+
+    base_gap = constants["base_pay_gap"]
+    gap_cap = base_gap * constants["max_gap_reduction_share"]
+    gap_rate = -((percentage / 100) * model.pay_gap_rate[i])
+    gap_time_scale = model.pay_gap_time_scale[i]
+
+    base_ratio = constants["base_employment_ratio"]
+    ratio_span = constants["target_employment_ratio"] - base_ratio
+    slope = constants["employment_sigmoid_slope"]
+    midpoint = duration / 2
+    improvement_rate = (percentage / 100) * model.employment_rate[i] + model.employment_rate_floor[i]
+
+    base_female = constants["base_female_leadership"]
+    max_female = constants["max_female_leadership"]
+    target_increase = percentage * model.leadership_rate[i]
+    damping = model.leadership_damping[i]
+
+    ramp_end = duration * constants["spending_ramp_share"]
+    steady_spend = (budget / duration) * model.cost_rate[i] * (percentage / 100)
+    ramp_spend = steady_spend * constants["spending_ramp_factor"]
+
+    pay_gap_data = array("d")
+    employment_data = array("d")
+    female_data = array("d")
+    male_data = array("d")
+    budget_data = array("d")
+
+    for year in range(duration + 1):
+        reduction = base_gap * (1 - math.exp(gap_rate * year * gap_time_scale))
+        pay_gap_data.append(round(base_gap - min(reduction, gap_cap), 2))
+
+        improvement = ratio_span * (1 / (1 + math.exp(-slope * (year - midpoint))))
+        employment_data.append(round(base_ratio + improvement * improvement_rate, 3))
+
+        female_percentage = min(base_female + target_increase * (year / duration) * damping, max_female)
+        female_data.append(round(female_percentage, 1))
+        male_data.append(round(100 - female_percentage, 1))
+
+        yearly_spend = ramp_spend if year <= ramp_end else steady_spend
+        budget_data.append(round(yearly_spend * year, 2))
+
+    return pay_gap_data, employment_data, female_data, male_data, budget_data
+
+
+def generate_pay_gap_series(policy_type, percentage, duration, budget):
+    """Pay gap per year as an array (independent of budget)"""
+    base_pay_gap = get_model().constants["base_pay_gap"]
+    return array("d", (
+        round(base_pay_gap - calculate_pay_gap_reduction(policy_type, percentage, year, duration), 2)
+        for year in range(duration + 1)
+    ))
+
+
+def generate_employment_series(policy_type, percentage, duration, budget):
+    """Employment ratio per year as an array (independent of budget)"""
+    return array("d", (
+        round(calculate_employment_ratio(policy_type, percentage, year, duration), 3)
+        for year in range(duration + 1)
+    ))
+
+
+def generate_leadership_series(policy_type, percentage, duration, budget):
+    """Female and male leadership shares per year as a pair of arrays (independent of budget)"""
+    female_data = array("d")
+    male_data = array("d")
+    for year in range(duration + 1):
+        female_percentage = calculate_female_leadership(policy_type, percentage, year, duration)
+        female_data.append(round(female_percentage, 1))
+        male_data.append(round(100 - female_percentage, 1))
+    return female_data, male_data
+
+
+def generate_budget_series(policy_type, percentage, duration, budget):
+    """Cumulative spending per year as an array"""
+    return array("d", (
+        round(calculate_budget_impact(policy_type, percentage, budget, year, duration), 2)
+        for year in range(duration + 1)
+    ))
+
+
+# Timeline series by name, each taking (policy_type, percentage, duration, budget)
+SERIES_GENERATORS = {
+    "pay_gap": generate_pay_gap_series,
+    "employment_ratio": generate_employment_series,
+    "leadership": generate_leadership_series,
+    "budget_spent": generate_budget_series
+}
+
+
+def generate_schedule_arrays(policy_type, percentages, budgets):
+    """
+    Generate the simulation timeline for per-year strength and budget schedules
+
+    Year y (1-based) runs at percentages[y-1] and is allocated budgets[y-1].
+    Pay gap reduction follows the accumulated yearly exposure, leadership
+    the accumulated yearly increases and employment the mean strength so
+    far, so a constant schedule reproduces the fixed-strength curves.
+    Spending replaces the fixed ramp: each year spends its allocation
+    scaled by the policy's cost rate and that year's strength.
+
+    Args:
+        policy_type: Type of policy
+        percentages: Strength per year (0 pauses the policy for that year)
+        budgets: Budget allocated per year
+
+    Returns:
+        Tuple of arrays (pay_gap, employment_ratio, female_leadership,
+        male_leadership, budget_spent), each with len(percentages) + 1 entries
+    """
+    model = get_model()
+    constants = model.constants
+    i = model.index_of(policy_type)
+    duration = len(percentages)
+
+    base_gap = constants["base_pay_gap"]
+    gap_cap = base_gap * constants["max_gap_reduction_share"]
+    base_ratio = constants["base_employment_ratio"]
+    ratio_span = constants["target_employment_ratio"] - base_ratio
+    slope = constants["employment_sigmoid_slope"]
+    base_female = constants["base_female_leadership"]
+    max_female = constants["max_female_leadership"]
+    cost_rate = model.cost_rate[i]
+
+    pay_gap_data = array("d")
+    employment_data = array("d")
+    female_data = array("d")
+    male_data = array("d")
+    budget_data = array("d")
+
+    # Accumulated exposure and leadership increase are the fixed-strength
+    # expressions evaluated at the mean strength so far
+    strength_total = 0.0
+    spent = 0.0
+    for year in range(duration + 1):
+        if year:
+            percentage = percentages[year - 1]
+            strength_total += percentage
+            spent += budgets[year - 1] * cost_rate * (percentage / 100)
+            mean_strength = strength_total / year
+        else:
+            mean_strength = percentages[0]
+
+        reduction_rate = (mean_strength / 100) * model.pay_gap_rate[i]
+        reduction = base_gap * (1 - math.exp(-reduction_rate * year * model.pay_gap_time_scale[i]))
+        pay_gap_data.append(round(base_gap - min(reduction, gap_cap), 2))
+
+        sigmoid = 1 / (1 + math.exp(-slope * (year - duration / 2)))
+        improvement_rate = (mean_strength / 100) * model.employment_rate[i] + model.employment_rate_floor[i]
+        employment_data.append(round(base_ratio + ratio_span * sigmoid * improvement_rate, 3))
+
+        leadership_increase = mean_strength * model.leadership_rate[i] * (year / duration) * model.leadership_damping[i]
+        female_percentage = min(base_female + leadership_increase, max_female)
+        female_data.append(round(female_percentage, 1))
+        male_data.append(round(100 - female_percentage, 1))
+
+        budget_data.append(round(spent, 2))
+
+    return pay_gap_data, employment_data, female_data, male_data, budget_data
+
+
+def generate_portfolio_data(components, duration, multipliers):
+    """
+    Generate timeline data for several policies running concurrently
+    
+    Pay gap rates, employment rates and leadership increases of the
+    components add up after scaling by their interaction multipliers,
+    and spending is the sum of each component's spending curve.
+    
+    Args:
+        components: List of dictionaries with policy_type, percentage and budget
+        duration: Shared program duration
+        multipliers: Interaction multiplier for each component
     
     Returns:
-        Dictionary with timeline data for all metrics
+        Dictionary with the same timeline shape as SimulationResult.render_timeline
     """
     years = list(range(duration + 1))
     
-    # Initialize data structures
+    constants = get_model().constants
+    base_pay_gap = constants["base_pay_gap"]
+    base_ratio = constants["base_employment_ratio"]
+    target_ratio = constants["target_employment_ratio"]
+    base_female = constants["base_female_leadership"]
+    
+    pay_gap_rate = 0.0
+    employment_rate = 0.0
+    leadership_increase = 0.0
+    for component, multiplier in zip(components, multipliers):
+        pay_gap_rate += get_pay_gap_rate(component["policy_type"], component["percentage"]) * multiplier
+        employment_rate += get_employment_rate(component["policy_type"], component["percentage"]) * multiplier
+        leadership_increase += get_leadership_increase(component["policy_type"], component["percentage"]) * multiplier
+    
     pay_gap_data = []
     employment_data = []
     leadership_data = []
     budget_data = []
     
-    base_pay_gap = 23.0
-    
     for year in years:
-        # Calculate pay gap
-        reduction = calculate_pay_gap_reduction(policy_type, percentage, year, duration)
-        current_gap = base_pay_gap - reduction
-        pay_gap_data.append(round(current_gap, 2))
+        reduction = min(
+            base_pay_gap * (1 - math.exp(-pay_gap_rate * year)),
+            base_pay_gap * constants["max_gap_reduction_share"]
+        )
+        pay_gap_data.append(round(base_pay_gap - reduction, 2))
         
-        # Calculate employment ratio
-        ratio = calculate_employment_ratio(policy_type, percentage, year, duration)
+        sigmoid = 1 / (1 + math.exp(-constants["employment_sigmoid_slope"] * (year - duration / 2)))
+        ratio = min(base_ratio + (target_ratio - base_ratio) * sigmoid * employment_rate, target_ratio)
         employment_data.append(round(ratio, 3))
         
-        # Calculate leadership distribution
-        leadership = calculate_leadership_distribution(policy_type, percentage, year, duration)
-        leadership_data.append(leadership)
+        female_percentage = min(
+            base_female + leadership_increase * (year / duration),
+            constants["max_female_leadership"]
+        )
+        leadership_data.append({
+            "female": round(female_percentage, 1),
+            "male": round(100 - female_percentage, 1)
+        })
         
-        # Calculate budget impact
-        spent = calculate_budget_impact(policy_type, percentage, budget, year, duration)
+        spent = sum(
+            calculate_budget_impact(
+                component["policy_type"], component["percentage"], component["budget"], year, duration
+            )
+            for component in components
+        )
         budget_data.append(round(spent, 2))
     
     return {
@@ -61,13 +271,16 @@ def get_final_metrics(simulation_data):
         Dictionary with end-state metrics
     """
     final_index = -1
+    constants = get_model().constants
     
     return {
         "final_pay_gap": simulation_data["pay_gap"][final_index],
-        "pay_gap_reduction": round(23.0 - simulation_data["pay_gap"][final_index], 2),
+        "pay_gap_reduction": round(
+            constants["base_pay_gap"] - simulation_data["pay_gap"][final_index], 2
+        ),
         "final_employment_ratio": simulation_data["employment_ratio"][final_index],
         "employment_improvement": round(
-            (simulation_data["employment_ratio"][final_index] - 0.82) * 100, 2
+            (simulation_data["employment_ratio"][final_index] - constants["base_employment_ratio"]) * 100, 2
         ),
         "final_leadership": simulation_data["leadership"][final_index],
         "total_budget_spent": simulation_data["budget_spent"][final_index]
@@ -0,0 +1,338 @@
+"""
+Versioned coefficient registry for the policy impact model
+All policy-specific coefficients live here and are read through
+integer-indexed arrays, one column per coefficient
+"""
+import copy
+import hashlib
+import json
+import os
+import threading
+from array import array
+from collections.abc import Mapping
+
+# Per-policy coefficients, one array column each
+COEFFICIENT_FIELDS = (
+    "pay_gap_rate",          # Exponent rate of pay gap reduction at 100% strength
+    "pay_gap_time_scale",    # Multiplier on elapsed years (slower-acting policies < 1)
+    "employment_rate",       # Share of the gap to target employment closed at 100% strength
+    "employment_rate_floor", # Strength-independent employment rate
+    "leadership_rate",       # Leadership points gained per strength point
+    "leadership_damping",    # Indirect-effect damping on leadership gains
+    "cost_rate",             # Yearly spending as a share of the budget per year
+    "risk_modifier"          # Policy-specific risk multiplier
+)
+
+REQUIRED_INFO_FIELDS = ("name", "description", "min_percentage", "max_percentage", "typical_budget_range")
+
+DEFAULT_MODEL = {
+    "version": "1.0.0",
+    "constants": {
+        "base_pay_gap": 23.0,                 # Starting gender pay gap percentage
+        "max_gap_reduction_share": 0.9,       # Reduction is capped at 90% of the gap
+        "base_employment_ratio": 0.82,        # Women/men employment ratio today
+        "target_employment_ratio": 0.95,      # Near parity
+        "employment_sigmoid_slope": 0.5,
+        "base_female_leadership": 30.0,       # Starting percentage of female leaders
+        "max_female_leadership": 65.0,
+        "spending_ramp_share": 0.3,           # Share of years with ramped-up spending
+        "spending_ramp_factor": 1.3,
+        "budget_risk_scale": 10000000,        # Budget over 10M increases risk
+        "budget_risk_weight": 20,
+        "budget_risk_cap": 30,
+        "intensity_risk_weight": 25,          # Higher percentage = higher risk
+        "duration_risk_threshold": 5,         # Longer duration = higher uncertainty
+        "duration_risk_weight": 5,
+        "risk_medium_threshold": 30,
+        "risk_high_threshold": 60
+    },
+    # Used for unknown policy types so lookups never branch
+    "default_coefficients": {
+        "pay_gap_rate": 0.0,
+        "pay_gap_time_scale": 0.0,
+        "employment_rate": 0.0,
+        "employment_rate_floor": 0.1,
+        "leadership_rate": 0.0,
+        "leadership_damping": 0.0,
+        "cost_rate": 1.0,
+        "risk_modifier": 1.0
+    },
+    "policy_types": {
+        "equal_pay": {
+            "info": {
+                "name": "Equal Pay Policy",
+                "description": "Mandates equal pay for equal work across gender lines",
+                "min_percentage": 50,
+                "max_percentage": 100,
+                "typical_budget_range": [500000, 5000000],
+                "effectiveness": "high",
+                "time_to_impact": "medium",
+                "political_difficulty": "medium"
+            },
+            # Direct impact, faster reduction
+            "coefficients": {
+                "pay_gap_rate": 0.35,
+                "pay_gap_time_scale": 1.0,
+                "employment_rate": 0.15,
+                "employment_rate_floor": 0.0,
+                "leadership_rate": 0.3,
+                "leadership_damping": 0.7,
+                "cost_rate": 1.2,
+                "risk_modifier": 1.0   # Moderate risk
+            }
+        },
+        "leadership_quota": {
+            "info": {
+                "name": "Leadership Quota",
+                "description": "Requires minimum percentage of women in leadership positions",
+                "min_percentage": 30,
+                "max_percentage": 50,
+                "typical_budget_range": [300000, 3000000],
+                "effectiveness": "medium",
+                "time_to_impact": "long",
+                "political_difficulty": "high"
+            },
+            # Gradual impact through representation, direct quota impact on leadership
+            "coefficients": {
+                "pay_gap_rate": 0.25,
+                "pay_gap_time_scale": 0.8,
+                "employment_rate": 0.18,
+                "employment_rate_floor": 0.0,
+                "leadership_rate": 0.6,
+                "leadership_damping": 1.0,
+                "cost_rate": 0.8,
+                "risk_modifier": 1.2   # Higher political risk
+            }
+        },
+        "parental_leave": {
+            "info": {
+                "name": "Parental Leave Expansion",
+                "description": "Extended paid parental leave for both parents",
+                "min_percentage": 50,
+                "max_percentage": 100,
+                "typical_budget_range": [1000000, 10000000],
+                "effectiveness": "medium",
+                "time_to_impact": "long",
+                "political_difficulty": "low"
+            },
+            # Slower but steady impact
+            "coefficients": {
+                "pay_gap_rate": 0.20,
+                "pay_gap_time_scale": 0.6,
+                "employment_rate": 0.22,
+                "employment_rate_floor": 0.0,
+                "leadership_rate": 0.25,
+                "leadership_damping": 0.6,
+                "cost_rate": 1.5,
+                "risk_modifier": 0.9   # Lower risk, proven policy
+            }
+        }
+    },
+    # Pairwise interaction effects between concurrently running policies.
+    # Keys are the two policy types joined with "+" in alphabetical order; the
+    # value scales each policy's effect by (1 + effect * partner_strength / 100).
+    "interactions": {
+        "equal_pay+parental_leave": 0.10,
+        "equal_pay+leadership_quota": 0.05,
+        "leadership_quota+parental_leave": -0.05
+    }
+}
+
+
+class PolicyModel:
+    """
+    Immutable compiled view of one model definition
+
+    Policy types get consecutive integer indices; the extra last index holds
+    the default coefficients used for unknown types. Read the current model
+    once per computation so a concurrent reload never mixes versions.
+    """
+
+    def __init__(self, definition):
+        self.definition = copy.deepcopy(definition)
+        self.version = definition["version"]
+
+        digest = hashlib.sha256(
+            json.dumps(definition, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        # Version plus content hash, so any coefficient change yields a new cache key
+        self.model_version = f"{self.version}+{digest}"
+
+        self.constants = dict(definition["constants"])
+        self.policy_types = list(definition["policy_types"])
+        self.index = {name: i for i, name in enumerate(self.policy_types)}
+        self.default_index = len(self.policy_types)
+        self.policy_info = {
+            name: copy.deepcopy(entry["info"])
+            for name, entry in definition["policy_types"].items()
+        }
+        self.interactions = dict(definition.get("interactions", {}))
+
+        self.pay_gap_rate = self._column("pay_gap_rate")
+        self.pay_gap_time_scale = self._column("pay_gap_time_scale")
+        self.employment_rate = self._column("employment_rate")
+        self.employment_rate_floor = self._column("employment_rate_floor")
+        self.leadership_rate = self._column("leadership_rate")
+        self.leadership_damping = self._column("leadership_damping")
+        self.cost_rate = self._column("cost_rate")
+        self.risk_modifier = self._column("risk_modifier")
+
+    def _column(self, field):
+        """Build one coefficient column with the default row appended"""
+        policy_types = self.definition["policy_types"]
+        column = array("d", (policy_types[name]["coefficients"][field] for name in self.policy_types))
+        column.append(self.definition["default_coefficients"][field])
+        return column
+
+    def index_of(self, policy_type):
+        """Integer index of a policy type (the default row if unknown)"""
+        return self.index.get(policy_type, self.default_index)
+
+    def indices(self, policy_types):
+        """Integer indices for a sequence of policy types"""
+        index = self.index
+        default_index = self.default_index
+        return array("i", (index.get(policy_type, default_index) for policy_type in policy_types))
+
+
+class PolicyInfoView(Mapping):
+    """
+    Read-only view of the current model's policy types
+
+    Every lookup goes to the policy_info of the model current at that
+    moment, which is never modified, so readers see either the old or the
+    new types during a reload. items(), keys() and values() iterate a
+    single model's dictionary.
+    """
+
+    def __init__(self, registry):
+        self._registry = registry
+
+    def _snapshot(self):
+        return self._registry.current.policy_info
+
+    def __getitem__(self, policy_type):
+        return self._snapshot()[policy_type]
+
+    def __contains__(self, policy_type):
+        return policy_type in self._snapshot()
+
+    def __iter__(self):
+        return iter(self._snapshot())
+
+    def __len__(self):
+        return len(self._snapshot())
+
+    def get(self, policy_type, default=None):
+        return self._snapshot().get(policy_type, default)
+
+    def keys(self):
+        return self._snapshot().keys()
+
+    def items(self):
+        return self._snapshot().items()
+
+    def values(self):
+        return self._snapshot().values()
+
+
+class ModelRegistry:
+    """
+    Holds the current PolicyModel and swaps it atomically on reload
+
+    policy_info is a live view of the current model's policy types, so
+    modules that imported POLICY_TYPES keep seeing the current types.
+    """
+
+    def __init__(self, definition):
+        self._lock = threading.Lock()
+        self.current = PolicyModel(validate_model_definition(definition))
+        self.policy_info = PolicyInfoView(self)
+
+    @property
+    def model_version(self):
+        return self.current.model_version
+
+    def load(self, definition):
+        """
+        Replace the model with a new definition
+
+        Returns:
+            The new PolicyModel
+        """
+        model = PolicyModel(validate_model_definition(definition))
+        with self._lock:
+            self.current = model
+        return model
+
+    def load_file(self, path):
+        """Load a model definition from a JSON file"""
+        with open(path, "r", encoding="utf-8") as model_file:
+            return self.load(json.load(model_file))
+
+    def register_policy_type(self, policy_type, info, coefficients, interactions=None):
+        """
+        Add or replace a policy type on top of the current definition
+
+        Args:
+            policy_type: Key of the policy type
+            info: Metadata (name, description, percentage bounds, budget range)
+            coefficients: Value for every name in COEFFICIENT_FIELDS
+            interactions: Optional interaction effects to add, keyed like "a+b"
+
+        Returns:
+            The new PolicyModel
+        """
+        definition = copy.deepcopy(self.current.definition)
+        definition["policy_types"][policy_type] = {
+            "info": info,
+            "coefficients": coefficients
+        }
+        definition.setdefault("interactions", {}).update(interactions or {})
+        return self.load(definition)
+
+
+def validate_model_definition(definition):
+    """
+    Check a model definition is complete
+
+    Returns:
+        The definition, unchanged
+
+    Raises:
+        ValueError: A required section or field is missing
+    """
+    for section in ("version", "constants", "default_coefficients", "policy_types"):
+        if section not in definition:
+            raise ValueError(f"Model definition is missing '{section}'")
+
+    missing = [name for name in DEFAULT_MODEL["constants"] if name not in definition["constants"]]
+    if missing:
+        raise ValueError(f"Model constants missing: {', '.join(missing)}")
+
+    missing = [field for field in COEFFICIENT_FIELDS if field not in definition["default_coefficients"]]
+    if missing:
+        raise ValueError(f"Default coefficients missing: {', '.join(missing)}")
+
+    for policy_type, entry in definition["policy_types"].items():
+        info = entry.get("info", {})
+        missing = [field for field in REQUIRED_INFO_FIELDS if field not in info]
+        if missing:
+            raise ValueError(f"Policy type {policy_type} info missing: {', '.join(missing)}")
+        coefficients = entry.get("coefficients", {})
+        missing = [field for field in COEFFICIENT_FIELDS if field not in coefficients]
+        if missing:
+            raise ValueError(f"Policy type {policy_type} coefficients missing: {', '.join(missing)}")
+
+    return definition
+
+
+def get_model():
+    """Get the current compiled model"""
+    return model_registry.current
+
+
+# Create singleton instance; POLICYSIM_MODEL_FILE points at an alternative JSON definition
+model_registry = ModelRegistry(DEFAULT_MODEL)
+if os.environ.get("POLICYSIM_MODEL_FILE"):
+    model_registry.load_file(os.environ["POLICYSIM_MODEL_FILE"])
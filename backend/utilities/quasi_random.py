@@ -0,0 +1,109 @@
+"""
+Randomized Sobol low-discrepancy sequences
+Each randomization is a random linear scramble plus digital shift, so independent replicates give unbiased error estimates
+"""
+import random
+from functools import lru_cache
+
+BITS = 32
+SCALE = 2.0 ** -BITS
+
+# Primitive polynomial degree s, coefficient bits a and initial direction
+# numbers m_1..m_s for dimensions 2 onwards (Joe and Kuo, new-joe-kuo-6.21201);
+# the first dimension is the van der Corput sequence
+DIRECTION_NUMBERS = (
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49))
+)
+
+MAX_DIMENSIONS = len(DIRECTION_NUMBERS) + 1
+
+
+@lru_cache(maxsize=None)
+def _direction_integers(dimension):
+    """The BITS direction integers of one dimension (0-based)"""
+    if dimension == 0:
+        return tuple(1 << (BITS - 1 - k) for k in range(BITS))
+
+    degree, coefficients, initial = DIRECTION_NUMBERS[dimension - 1]
+    m = list(initial)
+    for k in range(degree, BITS):
+        value = m[k - degree] ^ (m[k - degree] << degree)
+        for j in range(1, degree):
+            if (coefficients >> (degree - 1 - j)) & 1:
+                value ^= m[k - j] << j
+        m.append(value)
+    return tuple(m[k] << (BITS - 1 - k) for k in range(BITS))
+
+
+def _scrambled(directions, rng):
+    """
+    Direction integers under a random lower triangular scramble
+
+    Output digit k is digit k plus a random combination of the more
+    significant digits (mod 2). The scramble is linear, so scrambling the
+    direction integers scrambles every point; it is applied as the sum of
+    the matrix columns of the digits that are set.
+    """
+    columns = [(1 << (BITS - 1 - k)) | rng.getrandbits(BITS - 1 - k) if k < BITS - 1 else 1
+               for k in range(BITS)]
+    scrambled = []
+    for direction in directions:
+        value = 0
+        for k, column in enumerate(columns):
+            if direction >> (BITS - 1 - k) & 1:
+                value ^= column
+        scrambled.append(value)
+    return scrambled
+
+
+def sobol_points(count, dimensions, seed=None):
+    """
+    First count points of a scrambled and shifted Sobol sequence
+
+    The plain point set of 2^k points puts exactly one point in every
+    interval of width 2^-k along each dimension; the scramble and shift
+    keep that structure while making every point uniformly distributed.
+    Coordinates are centred in their 2^-32 cell, so they are never
+    exactly 0 or 1.
+
+    Args:
+        count: Number of points (powers of two balance best)
+        dimensions: Coordinates per point (at most MAX_DIMENSIONS)
+        seed: Seed of the scramble and shift (None for a fresh one)
+
+    Returns:
+        List of count tuples of floats in (0, 1)
+
+    Raises:
+        ValueError: More dimensions than there are direction numbers for
+    """
+    if dimensions < 1 or dimensions > MAX_DIMENSIONS:
+        raise ValueError(f"Sobol dimensions must be between 1 and {MAX_DIMENSIONS}")
+
+    rng = random.Random(seed)
+    directions = [_scrambled(_direction_integers(dimension), rng) for dimension in range(dimensions)]
+    shifts = [rng.getrandbits(BITS) for _ in range(dimensions)]
+    half = SCALE / 2
+
+    state = [0] * dimensions
+    points = []
+    for index in range(count):
+        points.append(tuple((value ^ shift) * SCALE + half for value, shift in zip(state, shifts)))
+        # Gray code order: flip the direction of the lowest zero bit of index
+        bit = (~index & (index + 1)).bit_length() - 1
+        state = [value ^ direction[bit] for value, direction in zip(state, directions)]
+    return points
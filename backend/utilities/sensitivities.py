@@ -0,0 +1,160 @@
+"""
+Closed-form sensitivities of final metrics and risk
+Exact derivatives of every final_metrics field and the risk score with
+respect to percentage, budget and duration
+"""
+import math
+from array import array
+
+from utilities.model_registry import get_model
+
+SENSITIVITY_FIELDS = (
+    "final_pay_gap",
+    "pay_gap_reduction",
+    "final_employment_ratio",
+    "employment_improvement",
+    "female_leadership",
+    "male_leadership",
+    "total_budget_spent",
+    "risk_score"
+)
+
+SENSITIVITY_PARAMETERS = ("percentage", "budget", "duration")
+
+
+def calculate_sensitivities_batch(policy_types, percentages, durations, budgets):
+    """
+    Evaluate final metrics and their analytic derivatives for many configurations
+
+    Every curve is closed form at the final year (year == duration), so each
+    derivative is computed from the same intermediate terms as the forward
+    value in a single pass. Derivatives are taken on the unrounded model;
+    duration is treated as continuous. At a cap or threshold the derivative
+    is one-sided in the direction of increasing the parameter (for example,
+    a capped pay gap reduction has zero sensitivity).
+
+    Derivatives are per unit: per percentage point, per dollar and per year.
+    Multiply the budget derivative by 100000 for the effect of $100k.
+
+    Args:
+        policy_types: Sequence of policy types
+        percentages: Sequence of policy strengths
+        durations: Sequence of durations in years (>= 1)
+        budgets: Sequence of total budgets
+
+    Returns:
+        Dictionary with "values", "derivatives" and "elasticities"; values
+        map field -> array, derivatives and elasticities map
+        field -> parameter -> array
+    """
+    model = get_model()
+    constants = model.constants
+    indices = model.indices(policy_types)
+
+    base_gap = constants["base_pay_gap"]
+    gap_cap = base_gap * constants["max_gap_reduction_share"]
+    base_ratio = constants["base_employment_ratio"]
+    ratio_span = constants["target_employment_ratio"] - base_ratio
+    slope = constants["employment_sigmoid_slope"]
+    base_female = constants["base_female_leadership"]
+    max_female = constants["max_female_leadership"]
+    budget_scale = constants["budget_risk_scale"]
+    budget_weight = constants["budget_risk_weight"]
+    budget_cap = constants["budget_risk_cap"]
+    intensity_weight = constants["intensity_risk_weight"]
+    duration_threshold = constants["duration_risk_threshold"]
+    duration_weight = constants["duration_risk_weight"]
+
+    values = {field: array("d") for field in SENSITIVITY_FIELDS}
+    derivatives = {
+        field: {parameter: array("d") for parameter in SENSITIVITY_PARAMETERS}
+        for field in SENSITIVITY_FIELDS
+    }
+
+    def emit(field, value, d_percentage, d_budget, d_duration):
+        values[field].append(value)
+        column = derivatives[field]
+        column["percentage"].append(d_percentage)
+        column["budget"].append(d_budget)
+        column["duration"].append(d_duration)
+
+    for i, p, d, b in zip(indices, percentages, durations, budgets):
+        # Pay gap: R = G * (1 - exp(-k * D)), k = (p / 100) * rate * time_scale
+        rate_scale = model.pay_gap_rate[i] * model.pay_gap_time_scale[i]
+        k = (p / 100) * rate_scale
+        decay = math.exp(-k * d)
+        reduction = base_gap * (1 - decay)
+        if reduction < gap_cap:
+            d_reduction_p = base_gap * decay * d * rate_scale / 100
+            d_reduction_d = base_gap * decay * k
+        else:
+            reduction = gap_cap
+            d_reduction_p = d_reduction_d = 0.0
+        emit("pay_gap_reduction", reduction, d_reduction_p, 0.0, d_reduction_d)
+        emit("final_pay_gap", base_gap - reduction, -d_reduction_p, 0.0, -d_reduction_d)
+
+        # Employment: ratio = b0 + span * sigmoid(slope * D / 2) * ((p / 100) * e + floor)
+        sigmoid = 1 / (1 + math.exp(-slope * (d - d / 2)))
+        employment_rate = model.employment_rate[i]
+        improvement_rate = (p / 100) * employment_rate + model.employment_rate_floor[i]
+        ratio = base_ratio + ratio_span * sigmoid * improvement_rate
+        d_ratio_p = ratio_span * sigmoid * employment_rate / 100
+        d_ratio_d = ratio_span * improvement_rate * sigmoid * (1 - sigmoid) * slope / 2
+        emit("final_employment_ratio", ratio, d_ratio_p, 0.0, d_ratio_d)
+        emit("employment_improvement", (ratio - base_ratio) * 100, d_ratio_p * 100, 0.0, d_ratio_d * 100)
+
+        # Leadership at the final year: base + p * rate * damping (year / duration == 1)
+        leadership_slope = model.leadership_rate[i] * model.leadership_damping[i]
+        female = base_female + p * leadership_slope
+        if female < max_female:
+            d_female_p = leadership_slope
+        else:
+            female = max_female
+            d_female_p = 0.0
+        emit("female_leadership", female, d_female_p, 0.0, 0.0)
+        emit("male_leadership", 100 - female, -d_female_p, 0.0, 0.0)
+
+        # Spending at the final year is past the ramp: (B / D) * cost * (p / 100) * D
+        cost_rate = model.cost_rate[i]
+        emit("total_budget_spent", b * cost_rate * p / 100,
+             b * cost_rate / 100, cost_rate * p / 100, 0.0)
+
+        # Risk: min((min(budget term, cap) + intensity + duration term) * modifier, 100)
+        modifier = model.risk_modifier[i]
+        budget_term = (b / budget_scale) * budget_weight
+        d_budget_term = budget_weight / budget_scale
+        if budget_term >= budget_cap:
+            budget_term = budget_cap
+            d_budget_term = 0.0
+        duration_term = (d - duration_threshold) * duration_weight
+        d_duration_term = duration_weight
+        if duration_term < 0:
+            duration_term = 0.0
+            d_duration_term = 0.0
+        risk = (budget_term + (p / 100) * intensity_weight + duration_term) * modifier
+        if risk < 100:
+            emit("risk_score", risk, modifier * intensity_weight / 100,
+                 modifier * d_budget_term, modifier * d_duration_term)
+        else:
+            emit("risk_score", 100.0, 0.0, 0.0, 0.0)
+
+    elasticities = {
+        field: {
+            parameter: array("d", (
+                derivative * x / y if y else 0.0
+                for derivative, x, y in zip(
+                    derivatives[field][parameter],
+                    {"percentage": percentages, "budget": budgets, "duration": durations}[parameter],
+                    values[field]
+                )
+            ))
+            for parameter in SENSITIVITY_PARAMETERS
+        }
+        for field in SENSITIVITY_FIELDS
+    }
+
+    return {
+        "values": values,
+        "derivatives": derivatives,
+        "elasticities": elasticities
+    }
@@ -5,7 +5,7 @@ import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import PolicyForm from '../components/policyform';
 import LineChart from '../components/charts/linechart';
-import { runSimulation } from '../services/api';
+import { runSimulation, previewSimulation } from '../services/api';
 import '../styles/createsimulation.css';
 
 const CreateSimulation = () => {
@@ -13,20 +13,28 @@ const CreateSimulation = () => {
   const [isLoading, setIsLoading] = useState(false);
   const [previewData, setPreviewData] = useState(null);
 
-  // Generate preview data for quick visualization
-  const generatePreview = (formData) => {
-    const years = [];
-    const values = [];
-    const baseGap = 23.0;
-    
-    for (let i = 0; i <= formData.duration; i++) {
-      years.push(`Y${i}`);
-      // Simple preview calculation
-      const reduction = (formData.percentage / 100) * 0.3 * i;
-      values.push(baseGap - reduction);
+  // Fetch a live preview from the server's precomputed tables
+  const generatePreview = async (formData) => {
+    if (!Number.isFinite(formData.budget) || !Number.isFinite(formData.percentage)) {
+      return;
     }
     
-    setPreviewData({ labels: years, values });
+    try {
+      // One sparkline point per year (durations are at most 10 years)
+      const preview = await previewSimulation(formData, { sparkline: 11 });
+      if (!preview) {
+        return; // Superseded by a newer slider position
+      }
+      
+      setPreviewData({
+        labels: preview.sparkline.years.map((year) => `Y${year}`),
+        values: preview.sparkline.values,
+        finalMetrics: preview.final_metrics,
+        risk: preview.risk,
+      });
+    } catch (error) {
+      // Out-of-range values while typing; keep the last good preview
+    }
   };
 
   const handleFormChange = (formData) => {
@@ -85,6 +93,11 @@ const CreateSimulation = () => {
                   yAxisLabel="Pay Gap (%)"
                   color="#6366F1"
                 />
+                <div className="preview-metrics">
+                  <span>Pay gap: {previewData.finalMetrics.final_pay_gap}%</span>
+                  <span>Women in leadership: {previewData.finalMetrics.final_leadership.female}%</span>
+                  <span>Risk: {previewData.risk.score} ({previewData.risk.level})</span>
+                </div>
                 <p className="preview-note">
                   This is a quick preview. Run the simulation for detailed analysis.
                 </p>
@@ -4,7 +4,7 @@
 import React, { useState } from 'react';
 import '../styles/policyform.css';
 
-const PolicyForm = ({ onSubmit, isLoading = false, initialValues = null }) => {
+const PolicyForm = ({ onSubmit, onChange, isLoading = false, initialValues = null }) => {
   const [formData, setFormData] = useState({
     policy_name: initialValues?.policy_name || '',
     policy_type: initialValues?.policy_type || 'equal_pay',
@@ -35,10 +35,14 @@ const PolicyForm = ({ onSubmit, isLoading = false, initialValues = null }) => {
   };
 
   const handleChange = (field, value) => {
-    setFormData(prev => ({
-      ...prev,
+    const updated = {
+      ...formData,
       [field]: value,
-    }));
+    };
+    setFormData(updated);
+    if (onChange) {
+      onChange(updated);
+    }
   };
 
   const handleSubmit = (e) => {
@@ -24,6 +24,70 @@ export const runSimulation = async (policyData) => {
   }
 };
 
+// What-if edit: recompute only the fields affected by `changes` and merge
+// them over the previous result. `previous` is the last /api/simulate data.
+export const updateSimulation = async (previous, changes) => {
+  try {
+    const policy = previous.policy;
+    const response = await api.post('/api/simulate/update', {
+      previous: {
+        policy_name: policy.name,
+        policy_type: policy.type,
+        percentage: policy.percentage,
+        duration: policy.duration,
+        budget: policy.budget,
+      },
+      changes,
+    });
+    const { changed, data } = response.data;
+    const merged = { ...previous };
+    Object.entries(data).forEach(([section, value]) => {
+      merged[section] = value !== null && typeof value === 'object' && !Array.isArray(value)
+        && section !== 'risk'
+        ? { ...previous[section], ...value }
+        : value;
+    });
+    return { success: true, changed, data: merged };
+  } catch (error) {
+    throw new Error(error.response?.data?.error || 'Simulation update failed');
+  }
+};
+
+// Identifies this browser tab so the server can drop superseded previews
+const CLIENT_ID = `tab-${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+let previewSeq = 0;
+
+/**
+ * Preview final metrics and risk while a slider is being dragged
+ *
+ * Resolves to null when a newer preview has been requested in the meantime,
+ * so callers can simply ignore that response.
+ */
+export const previewSimulation = async (policyData, { sparkline = false } = {}) => {
+  const seq = ++previewSeq;
+  try {
+    const response = await api.post('/api/preview', {
+      policy_type: policyData.policy_type,
+      percentage: policyData.percentage,
+      duration: policyData.duration,
+      budget: policyData.budget,
+      sparkline,
+      seq,
+    }, {
+      headers: { 'X-Client-Id': CLIENT_ID },
+    });
+    if (response.data.superseded || seq !== previewSeq) {
+      return null;
+    }
+    return response.data.data;
+  } catch (error) {
+    if (seq !== previewSeq) {
+      return null;
+    }
+    throw new Error(error.response?.data?.error || 'Preview failed');
+  }
+};
+
 /**
  * Get AI explanation for simulation results
  */
@@ -38,16 +102,97 @@ export const getExplanation = async (simulationResults) => {
   }
 };
 
+// Baselines of delta-encoded comparisons, by baseline_id, so repeated
+// comparisons against the same baseline do not download it again
+const MAX_BASELINES = 8;
+const baselines = new Map();
+
+const timelineSeries = (timeline) => ({
+  pay_gap: timeline.pay_gap,
+  employment_ratio: timeline.employment_ratio,
+  leadership_female: timeline.leadership.map((entry) => entry.female),
+  leadership_male: timeline.leadership.map((entry) => entry.male),
+  budget_spent: timeline.budget_spent,
+});
+
+const decodeAlternative = (baseline, delta) => {
+  const policy = { ...baseline.policy, ...delta.policy };
+  const base = timelineSeries(baseline.timeline);
+  const series = {};
+  Object.keys(base).forEach((name) => {
+    const entry = delta.timeline?.[name];
+    if (!entry) {
+      series[name] = base[name];
+    } else if (entry.values) {
+      series[name] = entry.values;
+    } else {
+      // Round back to the series' decimals so values match the full encoding exactly
+      const scale = 10 ** entry.decimals;
+      series[name] = base[name].map((value, i) => Math.round((value + entry.delta[i]) * scale) / scale);
+    }
+  });
+  return {
+    policy,
+    timeline: {
+      years: Array.from({ length: policy.duration + 1 }, (_, year) => year),
+      pay_gap: series.pay_gap,
+      employment_ratio: series.employment_ratio,
+      leadership: series.leadership_female.map((female, i) => ({ female, male: series.leadership_male[i] })),
+      budget_spent: series.budget_spent,
+      duration: policy.duration,
+    },
+    final_metrics: { ...baseline.final_metrics, ...delta.final_metrics },
+    risk: { ...baseline.risk, ...delta.risk },
+    timestamp: delta.timestamp,
+  };
+};
+
+/**
+ * Rebuild a full comparison from its baseline-plus-delta encoding
+ */
+export const decodeComparison = (encoded) => {
+  const known = encoded.baseline || baselines.get(encoded.baseline_id);
+  if (!known) {
+    throw new Error('Comparison baseline is not available');
+  }
+  baselines.delete(encoded.baseline_id);
+  baselines.set(encoded.baseline_id, known);
+  if (baselines.size > MAX_BASELINES) {
+    baselines.delete(baselines.keys().next().value);
+  }
+
+  const baseline = { ...known, timestamp: encoded.baseline_timestamp };
+  const comparison = { [encoded.baseline_key]: baseline };
+  Object.entries(encoded.alternatives).forEach(([key, delta]) => {
+    comparison[key] = decodeAlternative(baseline, delta);
+  });
+  comparison.analysis = encoded.analysis;
+  return comparison;
+};
+
+const postComparison = (policyA, policyB, baselineId) => api.post('/api/compare', {
+  policy_a: policyA,
+  policy_b: policyB,
+  encoding: 'delta',
+  baseline_id: baselineId,
+});
+
 /**
  * Compare two policies
+ *
+ * Policy A is the baseline of a delta-encoded response; the result has the
+ * same shape as an unencoded comparison.
  */
 export const comparepolicies = async (policyA, policyB) => {
   try {
-    const response = await api.post('/api/compare', {
-      policy_a: policyA,
-      policy_b: policyB,
-    });
-    return response.data;
+    const baselineId = [...baselines.keys()].pop();
+    let response = await postComparison(policyA, policyB, baselineId);
+    if (!response.data.data.baseline && !baselines.has(response.data.data.baseline_id)) {
+      response = await postComparison(policyA, policyB, undefined);
+    }
+    const { data, ...rest } = response.data;
+    delete rest.encoding;
+    return { ...rest, data: decodeComparison(data) };
   } catch (error) {
     throw new Error(error.response?.data?.error || 'Comparison failed');
   }